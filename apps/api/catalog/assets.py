@@ -0,0 +1,321 @@
+import logging
+import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework import status
+from jobs.queue import enqueue
+from .models import AssetBlob, BookAsset, BookPage, storage_service
+
+logger = logging.getLogger(__name__)
+
+# Blob keys embed their content hash, so the bytes behind a URL never change
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def content_addressed_enabled():
+    return getattr(settings, 'CONTENT_ADDRESSED_ASSETS', False)
+
+def expected_upload_key(book, asset_type, page_number=1):
+    """
+    Key a confirmed upload of ``asset_type`` must have been written to.
+
+    Confirming moves (and in content-addressed mode deletes) the object, so
+    clients may only name the book's own upload key, never an arbitrary one.
+    """
+    if asset_type == 'cover':
+        return book.get_cover_key()
+    if asset_type == 'model':
+        return book.get_model_key()
+    return book.get_pages_key(page_number=page_number)
+
+class AssetRequestError(Exception):
+    """A confirm-upload request that is refused with ``status_code``."""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+def parse_confirm_request(book, data):
+    """
+    Validate a confirm-upload body; return ``(asset_type, object_key, page_number)``.
+
+    Shared by the sync and async confirm_upload views. Raises
+    AssetRequestError before storage is touched.
+    """
+    if not hasattr(data, 'get'):
+        raise AssetRequestError('Request body must be an object')
+
+    asset_type = data.get('asset_type')
+    object_key = data.get('object_key')
+
+    if asset_type not in ['cover', 'model', 'pages']:
+        raise AssetRequestError('Invalid asset type')
+    if not object_key:
+        raise AssetRequestError('object_key is required')
+
+    page_number = 1
+    if asset_type == 'pages':
+        try:
+            page_number = int(data.get('page_number', 1))
+        except (TypeError, ValueError):
+            raise AssetRequestError('Invalid page number')
+        if page_number < 1:
+            raise AssetRequestError('Page number must be at least 1')
+
+    # Only the book's own upload key may be confirmed; anything else would
+    # let the caller move or delete objects belonging to other assets, or
+    # record them in the page manifest that delete_assets later empties
+    if object_key != expected_upload_key(book, asset_type, page_number):
+        raise AssetRequestError('object_key does not match the upload key for this asset')
+
+    return asset_type, object_key, page_number
+
+def confirm_asset(book, asset_type, object_key, metadata, page_number=1):
+    """
+    Record a validated upload on the book and queue its background jobs.
+
+    ``metadata`` is the stored object's metadata. Content types are checked
+    here, the upload is moved into the blob store in content-addressed mode,
+    and pages are added to the manifest. Raises AssetRequestError.
+    """
+    content_type = metadata.get('content_type', '')
+    updated_fields = []
+
+    if asset_type == 'cover':
+        if not content_type.startswith('image/'):
+            raise AssetRequestError('Invalid content type for cover image')
+        if content_addressed_enabled():
+            book.cover_blob_key = _store_confirmed_blob(book, 'cover', object_key, metadata)
+            updated_fields.append('cover_blob_key')
+        book.has_cover = True
+        # Thumbnails of the previous cover no longer match; they are
+        # rebuilt by a background job
+        book.cover_thumbnail_widths = []
+        updated_fields.extend(['has_cover', 'cover_thumbnail_widths'])
+    elif asset_type == 'model':
+        if content_type not in ['model/gltf-binary', 'application/octet-stream']:
+            raise AssetRequestError('Invalid content type for 3D model')
+        if content_addressed_enabled():
+            book.model_blob_key = _store_confirmed_blob(book, 'model', object_key, metadata)
+            updated_fields.append('model_blob_key')
+        book.has_model = True
+        # Filled in by a background inspection job
+        book.model_stats = {}
+        book.model_needs_optimization = False
+        updated_fields.extend(['has_model', 'model_stats', 'model_needs_optimization'])
+    else:
+        if not content_type.startswith('image/'):
+            raise AssetRequestError('Invalid content type for page image')
+        if content_addressed_enabled():
+            object_key = _store_confirmed_blob(book, 'page', object_key, metadata, page_number)
+
+        # Record the page in the manifest so later reads and deletes
+        # touch exactly the pages that exist
+        BookPage.objects.update_or_create(
+            book=book,
+            page_number=page_number,
+            defaults={
+                'key': object_key,
+                'size': metadata.get('size') or 0,
+                'etag': metadata.get('etag') or '',
+            }
+        )
+        book.page_count = book.pages.count()
+        book.has_pages = True
+        updated_fields.extend(['has_pages', 'page_count'])
+
+    updated_fields.append('updated_at')
+    book.save(update_fields=updated_fields)
+    if asset_type == 'cover':
+        enqueue('catalog.cover_thumbnails', book_id=book.pk)
+    elif asset_type == 'model':
+        enqueue('catalog.inspect_model', book_id=book.pk)
+
+def _store_confirmed_blob(book, kind, object_key, metadata, page_number=0):
+    blob_key = store_blob(book, kind, object_key, metadata, page_number=page_number)
+    if not blob_key:
+        logger.error(f"Error moving upload for book {book.pk} into the content-addressed store")
+        raise AssetRequestError('Failed to store asset', status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return blob_key
+
+def confirm_response_data(book, asset_type, metadata):
+    return {
+        'message': f'{asset_type.title()} upload confirmed successfully',
+        'asset_type': asset_type,
+        'book_id': book.id,
+        'metadata': {
+            'size': metadata.get('size'),
+            'content_type': metadata.get('content_type'),
+            'last_modified': metadata.get('last_modified')
+        }
+    }
+
+def plan_asset_deletion(book):
+    """
+    Unlink the book's blobs and collect the storage keys to delete.
+
+    Returns ``(keys, page_keys)``: a mapping of key to asset label for one
+    batched delete_many call, and the manifest's page keys. Pass the
+    delete_many result to finish_asset_deletion.
+    """
+    # Thumbnails of a shared blob go with the blob, not with this book
+    thumbnail_keys = [] if book.cover_blob_key else list(book.get_cover_thumbnail_keys().values())
+    # Shared blobs are released by reference count, never deleted directly
+    blob_keys = release_book_assets(book)
+
+    keys = {}
+    if book.has_cover:
+        keys[book.get_cover_key()] = 'cover'
+        for thumbnail_key in thumbnail_keys:
+            keys[thumbnail_key] = 'cover thumbnail'
+    if book.has_model:
+        keys[book.get_model_key()] = 'model'
+    page_keys = list(book.pages.values_list('key', flat=True)) if book.has_pages else []
+    for page_key in page_keys:
+        if page_key not in blob_keys:
+            keys[page_key] = 'pages'
+    return keys, page_keys
+
+def finish_asset_deletion(book, keys, page_keys, failed):
+    """
+    Clear the flags and manifest rows of every asset whose delete succeeded.
+
+    ``failed`` maps keys that could not be deleted to their errors. Returns
+    the response body for the delete_assets views.
+    """
+    deleted_assets = []
+    errors = [f'Failed to delete {keys[key]}: {key}' for key in failed]
+
+    if book.has_cover and book.get_cover_key() not in failed:
+        deleted_assets.append(f'cover: {book.get_cover_key()}')
+        book.has_cover = False
+        book.cover_thumbnail_widths = []
+
+    if book.has_model and book.get_model_key() not in failed:
+        deleted_assets.append(f'model: {book.get_model_key()}')
+        book.has_model = False
+        book.model_stats = {}
+        book.model_needs_optimization = False
+
+    if book.has_pages:
+        pages_deleted = [key for key in page_keys if key not in failed]
+        book.pages.filter(key__in=pages_deleted).delete()
+        book.page_count = len(page_keys) - len(pages_deleted)
+        if pages_deleted:
+            deleted_assets.append(f'pages: {len(pages_deleted)} files')
+        book.has_pages = book.page_count > 0
+
+    book.save(update_fields=['has_cover', 'has_model', 'has_pages', 'page_count', 'cover_blob_key',
+                             'model_blob_key', 'cover_thumbnail_widths', 'model_stats',
+                             'model_needs_optimization', 'updated_at'])
+
+    response_data = {
+        'message': 'Asset deletion completed',
+        'deleted_assets': deleted_assets,
+        'book_id': book.id
+    }
+    if errors:
+        response_data['errors'] = errors
+    return response_data
+
+# Entry points for the async views; database and blob work runs in the
+# thread-sensitive executor
+aconfirm_asset = sync_to_async(confirm_asset)
+aplan_asset_deletion = sync_to_async(plan_asset_deletion)
+afinish_asset_deletion = sync_to_async(finish_asset_deletion)
+
+def store_blob(book, kind, staging_key, metadata, page_number=0):
+    """
+    Move a confirmed upload into the content-addressed store and link it to the book.
+
+    The object at ``staging_key`` (the per-book upload key) is hashed; if no
+    blob with that SHA-256 exists yet it is copied to the blob key with
+    immutable caching headers, otherwise the existing blob is reused. The
+    book's link for ``kind``/``page_number`` is created or repointed and
+    reference counts are adjusted in the same transaction. Returns the blob
+    key, or None if the object could not be hashed or copied.
+    """
+    sha256 = storage_service.hash_object(staging_key)
+    if not sha256:
+        return None
+
+    content_type = metadata.get('content_type', '')
+    blob_key = storage_service.get_blob_key(sha256, os.path.splitext(staging_key)[1])
+
+    with transaction.atomic():
+        blob = AssetBlob.objects.select_for_update().filter(sha256=sha256).first()
+        if blob is None:
+            try:
+                with transaction.atomic():
+                    blob = AssetBlob.objects.create(
+                        sha256=sha256,
+                        key=blob_key,
+                        size=metadata.get('size') or 0,
+                        content_type=content_type
+                    )
+            except IntegrityError:
+                blob = AssetBlob.objects.select_for_update().get(sha256=sha256)
+
+        # Checked under the row lock so a concurrent release cannot delete
+        # the object after we decide to reuse it
+        if not storage_service.validate_object_exists(blob.key):
+            if not storage_service.copy_object(staging_key, blob.key, content_type, IMMUTABLE_CACHE_CONTROL):
+                transaction.set_rollback(True)
+                return None
+
+        link = BookAsset.objects.select_for_update().filter(
+            book=book, kind=kind, page_number=page_number
+        ).first()
+        if link is None:
+            BookAsset.objects.create(book=book, kind=kind, page_number=page_number, blob=blob)
+            _add_reference(blob.pk)
+        elif link.blob_id != blob.pk:
+            previous_blob_id = link.blob_id
+            link.blob = blob
+            link.save(update_fields=['blob', 'updated_at'])
+            _add_reference(blob.pk)
+            release_blob(previous_blob_id)
+
+    if staging_key != blob.key:
+        storage_service.delete_file(staging_key)
+    return blob.key
+
+def _add_reference(blob_id):
+    AssetBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + 1)
+
+def release_blob(blob_id):
+    """Drop one reference to a blob, deleting it from storage when none remain."""
+    with transaction.atomic():
+        blob = AssetBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+
+        if blob.ref_count > 1:
+            AssetBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+            return
+
+        # Deleted while the row is locked, before commit, so a concurrent
+        # store_blob of the same content re-uploads rather than reusing it
+        if not storage_service.delete_file(blob.key):
+            logger.error(f"Failed to delete unreferenced blob {blob.key}")
+        derived = storage_service.list_prefix(storage_service.get_derived_key(blob.key, ''))
+        if derived:
+            storage_service.delete_many([obj['key'] for obj in derived])
+        blob.delete()
+
+def release_book_assets(book):
+    """
+    Unlink all of a book's content-addressed assets.
+
+    Reference counts are dropped by the BookAsset post_delete signal. Returns
+    the blob keys the book referenced, so callers can skip deleting shared
+    objects directly.
+    """
+    links = BookAsset.objects.filter(book=book)
+    keys = set(links.values_list('blob__key', flat=True))
+    links.delete()
+    book.cover_blob_key = ''
+    book.model_blob_key = ''
+    return keys
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import async_views
+
+# Shadow the BookViewSet asset actions with async views (see ASYNC_ASSET_VIEWS)
+urlpatterns = [
+    path('books/<int:pk>/assets/cover/', async_views.asset_url, {'asset_type': 'cover'}),
+    path('books/<int:pk>/assets/model/', async_views.asset_url, {'asset_type': 'model'}),
+    path('books/<int:pk>/assets/pages/<int:page_number>/', async_views.asset_url, {'asset_type': 'pages'}),
+    path('books/<int:pk>/assets/confirm-upload/', async_views.confirm_upload),
+    path('books/<int:pk>/assets/', async_views.delete_assets),
+]
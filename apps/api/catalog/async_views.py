@@ -0,0 +1,161 @@
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from core.async_storage import get_async_storage_service
+from .assets import (
+    AssetRequestError, aconfirm_asset, afinish_asset_deletion, aplan_asset_deletion,
+    confirm_response_data, parse_confirm_request
+)
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+# Async counterparts of the BookViewSet asset actions. They are routed ahead
+# of the DRF router when ASYNC_ASSET_VIEWS is enabled (see core/urls.py), so
+# under ASGI a worker awaits storage round-trips instead of blocking on them.
+# Validation and persistence are shared with the synchronous actions through
+# catalog.assets, so response bodies match.
+
+def _error(message, status_code):
+    return JsonResponse({'error': message}, status=status_code)
+
+def _method_not_allowed(request):
+    return _error(f'Method "{request.method}" not allowed.', status.HTTP_405_METHOD_NOT_ALLOWED)
+
+async def _get_admin_user(request):
+    """Authenticate with the DRF authentication classes; return (user, error response)."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except APIException as e:
+        return None, _error(str(e.detail), e.status_code)
+
+    if not user or not user.is_authenticated:
+        return None, _error('Authentication credentials were not provided.', status.HTTP_401_UNAUTHORIZED)
+    if not user.is_staff:
+        return None, _error('You do not have permission to perform this action.', status.HTTP_403_FORBIDDEN)
+    return user, None
+
+def _request_data(request):
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return {}
+    return request.POST
+
+async def _get_book(pk):
+    try:
+        return await Book.objects.aget(pk=pk)
+    except Book.DoesNotExist:
+        return None
+
+async def asset_url(request, pk, asset_type, page_number=None):
+    """Get a signed URL for a book's cover, model or page texture."""
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    book = await _get_book(pk)
+    if book is None:
+        return _error('Not found.', status.HTTP_404_NOT_FOUND)
+
+    try:
+        if asset_type == 'cover':
+            if not book.has_cover:
+                return _error('No cover image available for this book', status.HTTP_404_NOT_FOUND)
+            payload = {'url': book.get_cover_url(signed=True), 'expires_in': 3600, 'asset_type': 'cover'}
+        elif asset_type == 'model':
+            if not book.has_model:
+                return _error('No 3D model available for this book', status.HTTP_404_NOT_FOUND)
+            payload = {
+                'url': book.get_model_url(signed=True),
+                'expires_in': 3600,
+                'asset_type': 'model',
+                # Empty until the background inspection has run
+                'stats': book.model_stats,
+                'needs_optimization': book.model_needs_optimization
+            }
+        else:
+            if not book.has_pages:
+                return _error('No page textures available for this book', status.HTTP_404_NOT_FOUND)
+            page = await book.pages.filter(page_number=page_number).afirst()
+            if page is None:
+                return _error(f'Page {page_number} is not available for this book', status.HTTP_404_NOT_FOUND)
+            payload = {
+                'url': book.get_page_url(page=page, signed=True),
+                'expires_in': 3600,
+                'asset_type': 'page',
+                'page_number': page_number
+            }
+        return JsonResponse(payload)
+    except Exception as e:
+        logger.error(f"Error generating {asset_type} URL for book {pk}: {str(e)}")
+        return _error('Failed to generate asset URL', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+async def confirm_upload(request, pk):
+    """Confirm successful asset upload and update book flags."""
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+
+    user, error = await _get_admin_user(request)
+    if error:
+        return error
+
+    book = await _get_book(pk)
+    if book is None:
+        return _error('Not found.', status.HTTP_404_NOT_FOUND)
+
+    storage = get_async_storage_service()
+    try:
+        asset_type, object_key, page_num = parse_confirm_request(book, _request_data(request))
+
+        # A single HEAD both proves existence and returns the metadata
+        metadata = await storage.get_object_metadata(object_key)
+        if not metadata:
+            return _error('Object not found in storage. Upload may have failed.', status.HTTP_404_NOT_FOUND)
+
+        await aconfirm_asset(book, asset_type, object_key, metadata, page_num)
+        return JsonResponse(confirm_response_data(book, asset_type, metadata))
+    except AssetRequestError as e:
+        return _error(e.message, e.status_code)
+    except Exception as e:
+        logger.error(f"Error confirming upload for book {pk}: {str(e)}")
+        return _error('Failed to confirm upload', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+async def delete_assets(request, pk):
+    """Delete all assets for a book."""
+    if request.method != 'DELETE':
+        return _method_not_allowed(request)
+
+    user, error = await _get_admin_user(request)
+    if error:
+        return error
+
+    book = await _get_book(pk)
+    if book is None:
+        return _error('Not found.', status.HTTP_404_NOT_FOUND)
+
+    storage = get_async_storage_service()
+    try:
+        keys, page_keys = await aplan_asset_deletion(book)
+        result = await storage.delete_many(list(keys)) if keys else {'deleted': [], 'errors': {}}
+        response_data = await afinish_asset_deletion(book, keys, page_keys, result['errors'])
+
+        if 'errors' in response_data:
+            return JsonResponse(response_data, status=status.HTTP_207_MULTI_STATUS)
+
+        return JsonResponse(response_data)
+    except Exception as e:
+        logger.error(f"Error deleting assets for book {pk}: {str(e)}")
+        return _error('Failed to delete assets', status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,67 @@
+import io
+import logging
+from django.conf import settings
+from PIL import Image, ImageOps
+from .models import cover_thumbnail_key, storage_service
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_CONTENT_TYPE = 'image/webp'
+
+def thumbnail_widths():
+    return sorted(getattr(settings, 'COVER_THUMBNAIL_WIDTHS', [160, 320, 640]))
+
+def render_thumbnails(data, widths):
+    """
+    Resize an image to each width (never upscaling) and encode as WebP.
+
+    Returns a dict of width -> WebP bytes. JPEG sources are decoded at a
+    reduced scale when the largest thumbnail allows it, which avoids
+    decoding every pixel of a multi-megapixel cover.
+    """
+    image = Image.open(io.BytesIO(data))
+    largest = max(widths)
+    if image.width > largest:
+        # Only affects JPEG: picks a DCT scale no smaller than the target
+        image.draft('RGB', (largest, largest * image.height // image.width))
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    quality = getattr(settings, 'COVER_THUMBNAIL_QUALITY', 80)
+    thumbnails = {}
+    # Largest first, each step downscaling the previous result
+    for width in sorted({min(width, image.width) for width in widths}, reverse=True):
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        buffer = io.BytesIO()
+        image.save(buffer, 'WEBP', quality=quality, method=4)
+        thumbnails[width] = buffer.getvalue()
+    return thumbnails
+
+def generate_cover_thumbnails(book, source_key=None):
+    """
+    Build WebP thumbnails of the book's cover and store them under derived keys.
+
+    Sets ``book.cover_thumbnail_widths`` (the caller saves it) and returns
+    the widths produced. Failures are logged and leave the book without
+    thumbnails, so clients fall back to the full-size cover.
+    """
+    source_key = source_key or book.cover_blob_key or book.get_cover_key()
+    widths = []
+
+    try:
+        data = storage_service.read_object(source_key)
+        if data is None:
+            raise ValueError(f"cover {source_key} could not be read")
+
+        for width, thumbnail in render_thumbnails(data, thumbnail_widths()).items():
+            if storage_service.upload_file(io.BytesIO(thumbnail), cover_thumbnail_key(source_key, width),
+                                           THUMBNAIL_CONTENT_TYPE):
+                widths.append(width)
+    except Exception as e:
+        logger.error(f"Error generating cover thumbnails for book {book.pk}: {str(e)}")
+
+    book.cover_thumbnail_widths = sorted(widths)
+    return book.cover_thumbnail_widths
@@ -0,0 +1,66 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from rest_framework.filters import BaseFilterBackend
+from .search import get_search_index
+
+class BookSearchFilter(BaseFilterBackend):
+    """
+    Ranked full-text search over the catalog using the ``search`` query param.
+
+    Matching ids come from the search index in relevance order and are exposed
+    as a ``search_rank`` annotation, which keyset pagination pages over. When
+    no index is available it falls back to ``icontains`` on the view's
+    ``search_fields``.
+    """
+    search_param = 'search'
+    rank_annotation = 'search_rank'
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+
+        index = get_search_index()
+        if not index.tokenize(query):
+            return queryset
+
+        ranked_ids = index.search(query) if index.is_supported() else None
+
+        if ranked_ids is None:
+            return self.fallback_filter(query, queryset, view)
+        if not ranked_ids:
+            return queryset.none()
+
+        rank = Case(
+            *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ranked_ids)],
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=ranked_ids).annotate(**{self.rank_annotation: rank})
+
+    def fallback_filter(self, query, queryset, view):
+        condition = Q()
+        for term in query.split():
+            term_condition = Q()
+            for field in getattr(view, 'search_fields', []):
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        return queryset.filter(condition).distinct()
+
+    def get_keyset_ordering(self, request, queryset, view):
+        """Page search results by relevance rather than recency."""
+        if self.rank_annotation in queryset.query.annotations:
+            return (self.rank_annotation, 'id')
+        return None
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Full-text search over title, author, genres and description.',
+                'schema': {'type': 'string'},
+            },
+        ]
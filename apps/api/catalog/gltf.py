@@ -0,0 +1,248 @@
+import json
+import mmap
+import struct
+from django.conf import settings
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# Primitive modes that draw triangles (TRIANGLES, TRIANGLE_STRIP, TRIANGLE_FAN)
+TRIANGLE_MODES = (4, 5, 6)
+
+GEOMETRY_COMPRESSION = {
+    'KHR_draco_mesh_compression': 'draco',
+    'EXT_meshopt_compression': 'meshopt',
+    'KHR_meshopt_compression': 'meshopt',
+}
+TEXTURE_COMPRESSION = {
+    'KHR_texture_basisu': 'ktx2',
+}
+
+KTX2_IDENTIFIER = b'\xabKTX 20\xbb\r\n\x1a\n'
+# JPEG start-of-frame markers (excluding DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+class GLBError(ValueError):
+    """The file is not a valid binary glTF 2.0 asset."""
+
+def image_size(data):
+    """
+    Read (width, height) from a PNG, JPEG, WebP or KTX2 header, or None.
+
+    Only the header bytes are touched, so on a memory map the pixel data
+    is never paged in.
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return struct.unpack('>II', data[16:24])
+    if data[:12] == KTX2_IDENTIFIER:
+        return struct.unpack('<II', data[20:28])
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        chunk = bytes(data[12:16])
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8X':
+            return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+        return None
+    if data[:2] == b'\xff\xd8':
+        offset = 2
+        while offset + 9 <= len(data):
+            if data[offset] != 0xFF:
+                return None
+            marker = data[offset + 1]
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                return width, height
+            offset += 2 + struct.unpack('>H', data[offset + 2:offset + 4])[0]
+    return None
+
+def read_glb(data):
+    """
+    Split a GLB into its parsed JSON document and the (offset, length) of its BIN chunk.
+
+    ``data`` may be bytes or a memory map; only the 12-byte header, chunk
+    headers and the JSON chunk are read.
+    """
+    if len(data) < 20:
+        raise GLBError('File is too small to be a GLB')
+    magic, version, length = struct.unpack('<4sII', data[:12])
+    if magic != GLB_MAGIC:
+        raise GLBError('Missing glTF magic')
+    if version != 2:
+        raise GLBError(f'Unsupported glTF version {version}')
+    if length > len(data):
+        raise GLBError('File is truncated')
+
+    json_length, chunk_type = struct.unpack('<II', data[12:20])
+    if chunk_type != CHUNK_JSON or 20 + json_length > length:
+        raise GLBError('First chunk is not JSON')
+    try:
+        document = json.loads(bytes(data[20:20 + json_length]))
+    except ValueError as e:
+        raise GLBError(f'Invalid JSON chunk: {e}')
+
+    bin_chunk = (0, 0)
+    offset = 20 + json_length
+    if offset + 8 <= length:
+        bin_length, chunk_type = struct.unpack('<II', data[offset:offset + 8])
+        if chunk_type == CHUNK_BIN and offset + 8 + bin_length <= length:
+            bin_chunk = (offset + 8, bin_length)
+    return document, json_length, bin_chunk
+
+def _triangles(mode, count):
+    if mode == 4:
+        return count // 3
+    if mode in (5, 6):
+        return max(0, count - 2)
+    return 0
+
+def inspect_glb(data):
+    """
+    Summarise a GLB's geometry, textures, extensions and byte usage.
+
+    Vertex and triangle counts are per unique mesh (instancing is not
+    multiplied out). Draco- and meshopt-compressed primitives are counted
+    from their accessor declarations, so nothing is decompressed.
+    """
+    document, json_length, bin_chunk = read_glb(data)
+    try:
+        return _summarise(data, document, json_length, bin_chunk)
+    except (AttributeError, IndexError, KeyError, TypeError, struct.error) as e:
+        raise GLBError(f'Malformed glTF document: {e!r}')
+
+def _summarise(data, document, json_length, bin_chunk):
+    bin_offset, bin_length = bin_chunk
+    accessors = document.get('accessors', [])
+    buffer_views = document.get('bufferViews', [])
+    extensions_used = sorted(document.get('extensionsUsed', []))
+
+    vertices = triangles = primitives = 0
+    for mesh in document.get('meshes', []):
+        for primitive in mesh.get('primitives', []):
+            primitives += 1
+            position = primitive.get('attributes', {}).get('POSITION')
+            vertex_count = accessors[position].get('count', 0) if position is not None else 0
+            vertices += vertex_count
+            mode = primitive.get('mode', 4)
+            if mode in TRIANGLE_MODES:
+                count = accessors[primitive['indices']].get('count', 0) if 'indices' in primitive else vertex_count
+                triangles += _triangles(mode, count)
+
+    textures = []
+    image_bytes = 0
+    for image in document.get('images', []):
+        entry = {'mime_type': image.get('mimeType', ''), 'width': None, 'height': None, 'bytes': 0}
+        view = buffer_views[image['bufferView']] if 'bufferView' in image else None
+        # Images embedded in the GLB's own buffer (buffer 0 without a uri)
+        if view is not None and view.get('buffer', 0) == 0 and bin_length:
+            start = bin_offset + view.get('byteOffset', 0)
+            entry['bytes'] = view.get('byteLength', 0)
+            image_bytes += entry['bytes']
+            size = image_size(data[start:start + min(entry['bytes'], 64 * 1024)])
+            if size:
+                entry['width'], entry['height'] = size
+        textures.append(entry)
+
+    lod_levels = 1
+    for node in document.get('nodes', []):
+        lod = node.get('extensions', {}).get('MSFT_lod')
+        if lod:
+            lod_levels = max(lod_levels, 1 + len(lod.get('ids', [])))
+
+    return {
+        'meshes': len(document.get('meshes', [])),
+        'primitives': primitives,
+        'vertices': vertices,
+        'triangles': triangles,
+        'materials': len(document.get('materials', [])),
+        'animations': len(document.get('animations', [])),
+        'lod_levels': lod_levels,
+        'textures': textures,
+        'extensions_used': extensions_used,
+        'extensions_required': sorted(document.get('extensionsRequired', [])),
+        'geometry_compression': sorted({GEOMETRY_COMPRESSION[name] for name in extensions_used
+                                        if name in GEOMETRY_COMPRESSION}),
+        'texture_compression': sorted({TEXTURE_COMPRESSION[name] for name in extensions_used
+                                       if name in TEXTURE_COMPRESSION}),
+        'bytes': {
+            'total': len(data),
+            'json': json_length,
+            'images': image_bytes,
+            'geometry': bin_length - image_bytes,
+        },
+    }
+
+def inspect_glb_file(path):
+    """Inspect a GLB on disk through a read-only memory map."""
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            raise GLBError('File is empty')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return inspect_glb(data)
+
+class RangedObject:
+    """
+    Read-only byte view of a stored object that fetches only the ranges sliced from it.
+
+    Each miss reads at least ``read_ahead`` bytes, so the GLB header, chunk
+    headers and a typical JSON chunk arrive in one ranged GET, and each
+    image header in one more.
+    """
+
+    read_ahead = 64 * 1024
+
+    def __init__(self, storage, key, size):
+        self.storage = storage
+        self.key = key
+        self.size = size
+        self._block = (0, b'')
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('RangedObject supports slicing only')
+        start, stop, _ = index.indices(self.size)
+        if stop <= start:
+            return b''
+
+        block_start, block = self._block
+        if not (block_start <= start and stop <= block_start + len(block)):
+            length = min(max(stop - start, self.read_ahead), self.size - start)
+            block = self.storage.read_range(self.key, start, length)
+            if block is None:
+                raise IOError(f'Could not read {self.key}')
+            block_start = start
+            self._block = (block_start, block)
+        return block[start - block_start:stop - block_start]
+
+def inspect_glb_object(storage, key):
+    """Inspect a stored GLB through ranged reads, without downloading the whole file."""
+    metadata = storage.get_object_metadata(key)
+    if metadata is None:
+        raise IOError(f'Could not read {key}')
+    if not metadata['size']:
+        raise GLBError('File is empty')
+    return inspect_glb(RangedObject(storage, key, metadata['size']))
+
+def optimization_warnings(stats):
+    """List the ways a model exceeds the MODEL_* budgets or skips compression."""
+    warnings = []
+    if stats['bytes']['total'] > getattr(settings, 'MODEL_WARN_SIZE_MB', 25) * 1024 * 1024:
+        warnings.append('oversized_file')
+    if stats['triangles'] > getattr(settings, 'MODEL_MAX_TRIANGLES', 500000):
+        warnings.append('too_many_triangles')
+    if stats['vertices'] and not stats['geometry_compression']:
+        warnings.append('uncompressed_geometry')
+
+    max_texture_size = getattr(settings, 'MODEL_MAX_TEXTURE_SIZE', 4096)
+    if any(max(texture['width'] or 0, texture['height'] or 0) > max_texture_size for texture in stats['textures']):
+        warnings.append('oversized_texture')
+    if any(texture['mime_type'] != 'image/ktx2' for texture in stats['textures']):
+        warnings.append('uncompressed_textures')
+    return warnings
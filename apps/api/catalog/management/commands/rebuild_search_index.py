@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from catalog.search import get_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the catalog full-text search index from the database.'
+
+    def handle(self, *args, **options):
+        index = get_search_index()
+        if not index.is_supported():
+            self.stdout.write(self.style.WARNING('Search index is not available for this database.'))
+            return
+
+        count = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} books.'))
@@ -0,0 +1,86 @@
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from catalog.models import Book, BookAsset, BookPage, storage_service
+from core.response_cache import invalidate
+
+
+class Command(BaseCommand):
+    help = ('Rebuild book page manifests from a single listing of the pages folder in storage, '
+            'keeping content-addressed pages linked to blobs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them.')
+
+    def handle(self, *args, **options):
+        prefix = storage_service.folders.get('pages', '')
+        pages_by_book = defaultdict(dict)
+
+        # A partial listing would drop the missing pages from every manifest
+        try:
+            listed = storage_service.list_prefix(prefix, strict=True)
+        except Exception as e:
+            raise CommandError(f'Listing {prefix!r} failed, page manifests left unchanged: {e}')
+
+        for obj in listed:
+            parsed = storage_service.parse_page_key(obj['key'])
+            if parsed:
+                book_id, page_number = parsed
+                pages_by_book[book_id][page_number] = obj
+
+        # Content-addressed pages live under blob keys the listing never
+        # returns; their BookAsset links are authoritative and are left alone,
+        # so blob reference counts are unaffected by the rebuild
+        linked = 0
+        etags = dict(
+            BookPage.objects.filter(key__startswith=storage_service.folders.get('blobs', 'assets/blobs/'))
+            .values_list('key', 'etag')
+        )
+        for link in BookAsset.objects.filter(kind='page').select_related('blob'):
+            pages_by_book[link.book_id][link.page_number] = {
+                'key': link.blob.key,
+                'size': link.blob.size,
+                'etag': etags.get(link.blob.key, ''),
+            }
+            linked += 1
+
+        book_ids = set(pages_by_book) | set(
+            Book.objects.filter(has_pages=True).values_list('pk', flat=True)
+        )
+        books = Book.objects.in_bulk(book_ids)
+        self.stdout.write(
+            f'Found pages for {len(pages_by_book)} books under {prefix!r} '
+            f'({linked} content-addressed).'
+        )
+
+        if options['dry_run']:
+            for book_id, book in sorted(books.items()):
+                self.stdout.write(f'Book {book_id}: {book.page_count} -> {len(pages_by_book.get(book_id, {}))} pages')
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            BookPage.objects.filter(book_id__in=books).delete()
+            BookPage.objects.bulk_create([
+                BookPage(
+                    book_id=book_id,
+                    page_number=page_number,
+                    key=obj['key'],
+                    size=obj['size'] or 0,
+                    etag=obj['etag'] or '',
+                )
+                for book_id, pages in pages_by_book.items() if book_id in books
+                for page_number, obj in pages.items()
+            ], batch_size=1000)
+
+            for book_id, book in books.items():
+                book.page_count = len(pages_by_book.get(book_id, {}))
+                book.has_pages = book.page_count > 0
+                book.updated_at = now
+            Book.objects.bulk_update(books.values(), ['page_count', 'has_pages', 'updated_at'], batch_size=500)
+
+        # bulk_update bypasses model signals
+        invalidate(Book, list(books))
+
+        self.stdout.write(self.style.SUCCESS(f'Synced page manifests for {len(books)} books.'))
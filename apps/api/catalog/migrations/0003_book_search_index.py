@@ -0,0 +1,76 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS catalog_book_fts USING fts5(
+    title, author, genres, description,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+SQLITE_POPULATE = """
+INSERT INTO catalog_book_fts (rowid, title, author, genres, description)
+SELECT b.id, b.title, a.name,
+       COALESCE((SELECT group_concat(g.name, ' ')
+                 FROM catalog_book_genres bg
+                 JOIN catalog_genre g ON g.id = bg.genre_id
+                 WHERE bg.book_id = b.id), ''),
+       b.description
+FROM catalog_book b
+JOIN catalog_author a ON a.id = b.author_id
+"""
+
+POSTGRES_CREATE = """
+CREATE TABLE IF NOT EXISTS catalog_book_search (
+    book_id bigint PRIMARY KEY REFERENCES catalog_book (id) ON DELETE CASCADE,
+    document tsvector NOT NULL
+);
+CREATE INDEX IF NOT EXISTS catalog_book_search_document_gin
+    ON catalog_book_search USING GIN (document);
+"""
+
+POSTGRES_POPULATE = """
+INSERT INTO catalog_book_search (book_id, document)
+SELECT b.id,
+       setweight(to_tsvector('english', b.title), 'A') ||
+       setweight(to_tsvector('english', a.name), 'B') ||
+       setweight(to_tsvector('english', COALESCE(
+           (SELECT string_agg(g.name, ' ')
+            FROM catalog_book_genres bg
+            JOIN catalog_genre g ON g.id = bg.genre_id
+            WHERE bg.book_id = b.id), '')), 'C') ||
+       setweight(to_tsvector('english', b.description), 'D')
+FROM catalog_book b
+JOIN catalog_author a ON a.id = b.author_id
+ON CONFLICT (book_id) DO NOTHING
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE)
+        schema_editor.execute(SQLITE_POPULATE)
+    elif vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_CREATE)
+        schema_editor.execute(POSTGRES_POPULATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS catalog_book_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS catalog_book_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_book_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
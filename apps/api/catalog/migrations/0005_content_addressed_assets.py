@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_book_page_manifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('key', models.CharField(max_length=500)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of BookAsset rows using this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_blob_key',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='model_blob_key',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.CreateModel(
+            name='BookAsset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cover', 'Cover'), ('model', 'Model'), ('page', 'Page')], max_length=10)),
+                ('page_number', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='links', to='catalog.assetblob')),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assets', to='catalog.book')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('book', 'kind', 'page_number'), name='unique_book_asset')],
+            },
+        ),
+    ]
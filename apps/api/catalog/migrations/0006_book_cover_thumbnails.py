@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_content_addressed_assets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_thumbnail_widths',
+            field=models.JSONField(blank=True, default=list, help_text='Widths of generated WebP cover thumbnails'),
+        ),
+    ]
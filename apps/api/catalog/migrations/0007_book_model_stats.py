@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_book_cover_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='model_needs_optimization',
+            field=models.BooleanField(default=False, help_text='Model exceeds the MODEL_* budgets or is uncompressed'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='model_stats',
+            field=models.JSONField(blank=True, default=dict, help_text='Geometry, texture and extension summary of the GLB model'),
+        ),
+    ]
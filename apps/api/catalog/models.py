@@ -7,6 +7,10 @@ if getattr(settings, 'USE_LOCAL_STORAGE', False):
 else:
     from core.storage import storage_service
 
+def cover_thumbnail_key(source_key, width):
+    """Key of the WebP thumbnail of a cover image at the given width."""
+    return storage_service.get_derived_key(source_key, f'w{width}.webp')
+
 class Author(models.Model):
     name = models.CharField(max_length=150)
     
@@ -29,6 +33,13 @@ class Book(models.Model):
     has_cover = models.BooleanField(default=False)
     has_model = models.BooleanField(default=False)
     has_pages = models.BooleanField(default=False)
+    page_count = models.PositiveIntegerField(default=0, help_text="Number of confirmed page textures")
+    # Denormalized from BookAsset so URLs need no extra query (content-addressed mode)
+    cover_blob_key = models.CharField(max_length=500, blank=True)
+    model_blob_key = models.CharField(max_length=500, blank=True)
+    cover_thumbnail_widths = models.JSONField(default=list, blank=True, help_text="Widths of generated WebP cover thumbnails")
+    model_stats = models.JSONField(default=dict, blank=True, help_text="Geometry, texture and extension summary of the GLB model")
+    model_needs_optimization = models.BooleanField(default=False, help_text="Model exceeds the MODEL_* budgets or is uncompressed")
     
     # Legacy URL fields (deprecated - use S3 storage)
     cover_image = models.URLField(blank=True, help_text="Deprecated: Use S3 storage")
@@ -56,66 +67,108 @@ class Book(models.Model):
         """Get S3 key for page texture."""
         return storage_service.get_asset_key('pages', self.id, str(page_number))
     
+    def _asset_url(self, key, signed):
+        # Content-addressed blobs may be served from unsigned, immutable URLs
+        if signed and not (storage_service.is_blob_key(key)
+                           and getattr(settings, 'CONTENT_ADDRESSED_PUBLIC_URLS', False)):
+            return storage_service.generate_signed_url(key)
+        return storage_service.get_public_url(key)
+    
     def get_cover_url(self, signed=True):
         """Get URL for book cover (signed or public)."""
         if not self.has_cover:
             return None
         
-        key = self.get_cover_key()
-        if signed:
-            return storage_service.generate_signed_url(key)
-        return storage_service.get_public_url(key)
+        return self._asset_url(self.cover_blob_key or self.get_cover_key(), signed)
+    
+    def get_cover_thumbnail_keys(self):
+        source_key = self.cover_blob_key or self.get_cover_key()
+        return {width: cover_thumbnail_key(source_key, width) for width in self.cover_thumbnail_widths}
+    
+    def get_cover_srcset(self, signed=True):
+        """Get a srcset of the cover thumbnails (``"<url> 160w, <url> 320w"``), or None."""
+        if not self.has_cover or not self.cover_thumbnail_widths:
+            return None
+        
+        return ', '.join(
+            f'{self._asset_url(key, signed)} {width}w'
+            for width, key in self.get_cover_thumbnail_keys().items()
+        )
     
     def get_model_url(self, signed=True):
         """Get URL for 3D model (signed or public)."""
         if not self.has_model:
             return None
-            
-        key = self.get_model_key()
-        if signed:
-            return storage_service.generate_signed_url(key)
-        return storage_service.get_public_url(key)
+        
+        return self._asset_url(self.model_blob_key or self.get_model_key(), signed)
     
-    def get_page_url(self, page_number=1, signed=True):
+    def get_page_url(self, page_number=1, signed=True, page=None):
         """Get URL for page texture (signed or public)."""
         if not self.has_pages:
             return None
-            
-        key = self.get_pages_key(page_number)
-        if signed:
-            return storage_service.generate_signed_url(key)
-        return storage_service.get_public_url(key)
-    
-    def delete_assets(self):
-        """Delete all S3 assets for this book."""
-        deleted = []
-        
-        if self.has_cover:
-            if storage_service.delete_file(self.get_cover_key()):
-                self.has_cover = False
-                deleted.append('cover')
-        
-        if self.has_model:
-            if storage_service.delete_file(self.get_model_key()):
-                self.has_model = False
-                deleted.append('model')
-        
-        if self.has_pages:
-            # Delete all page textures (assuming max 100 pages)
-            for i in range(1, 101):
-                key = self.get_pages_key(i)
-                storage_service.delete_file(key)
-            self.has_pages = False
-            deleted.append('pages')
-        
-        if deleted:
-            self.save(update_fields=['has_cover', 'has_model', 'has_pages'])
         
-        return deleted
+        key = page.key if page else self.get_pages_key(page_number)
+        return self._asset_url(key, signed)
     
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', 'id']
         indexes = [
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['available_copies']),
-        ]
\ No newline at end of file
+            # Serves keyset pagination of the catalog listing
+            models.Index(fields=['-created_at', 'id']),
+        ]
+
+class BookPage(models.Model):
+    """Manifest entry for one confirmed page texture of a book."""
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField()
+    key = models.CharField(max_length=500)
+    size = models.PositiveBigIntegerField(default=0)
+    etag = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.book_id} p{self.page_number}"
+    
+    class Meta:
+        ordering = ['book', 'page_number']
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'page_number'], name='unique_book_page'),
+        ]
+
+class AssetBlob(models.Model):
+    """A stored file identified by its SHA-256, shared by every book asset with that content."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    key = models.CharField(max_length=500)
+    size = models.PositiveBigIntegerField(default=0)
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0, help_text="Number of BookAsset rows using this blob")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.sha256
+
+class BookAsset(models.Model):
+    """Links a book's cover, model or page to the blob holding its content."""
+    KIND_CHOICES = [
+        ('cover', 'Cover'),
+        ('model', 'Model'),
+        ('page', 'Page'),
+    ]
+    
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='assets')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    page_number = models.PositiveIntegerField(default=0)
+    blob = models.ForeignKey(AssetBlob, on_delete=models.PROTECT, related_name='links')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.book_id} {self.kind} {self.blob_id}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'kind', 'page_number'], name='unique_book_asset'),
+        ]
@@ -0,0 +1,223 @@
+import logging
+import re
+from django.db import connection
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Words only; everything else in the user's query is treated as a separator
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+class BaseSearchIndex:
+    """Full-text index over book title, author name, genre names and description."""
+
+    # Upper bound on ranked ids returned for one query
+    max_results = 1000
+
+    def __init__(self):
+        # Only a positive probe is remembered; the table may appear after migrate
+        self._supported = False
+
+    def is_supported(self) -> bool:
+        return False
+
+    def search(self, query: str, limit: int = None) -> Optional[List[int]]:
+        """Return book ids ranked by relevance, or None if the index is unavailable."""
+        return None
+
+    def index_books(self, book_ids: Iterable[int]) -> None:
+        """(Re)index the given books."""
+
+    def remove_books(self, book_ids: Iterable[int]) -> None:
+        """Drop the given books from the index."""
+
+    def rebuild(self) -> int:
+        """Reindex the whole catalog, returning the number of indexed books."""
+        from .models import Book
+
+        if not self.is_supported():
+            return 0
+
+        book_ids = list(Book.objects.values_list('pk', flat=True))
+        for start in range(0, len(book_ids), 500):
+            self.index_books(book_ids[start:start + 500])
+        return len(book_ids)
+
+    def tokenize(self, query: str) -> List[str]:
+        return TOKEN_RE.findall(query.lower())[:16]
+
+    def documents(self, book_ids: Iterable[int]):
+        """Yield (id, title, author, genres, description) rows for the given books."""
+        from .models import Book
+
+        books = (
+            Book.objects.filter(pk__in=list(book_ids))
+            .select_related('author')
+            .prefetch_related('genres')
+        )
+        for book in books:
+            yield (
+                book.pk,
+                book.title,
+                book.author.name,
+                ' '.join(genre.name for genre in book.genres.all()),
+                book.description,
+            )
+
+    def _placeholders(self, values) -> str:
+        return ', '.join(['%s'] * len(values))
+
+class SQLiteSearchIndex(BaseSearchIndex):
+    """FTS5 virtual table keyed by book id, ranked with BM25."""
+
+    table = 'catalog_book_fts'
+    # BM25 column weights: title, author, genres, description
+    weights = (10.0, 5.0, 3.0, 1.0)
+
+    def is_supported(self) -> bool:
+        if not self._supported:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [self.table]
+                )
+                self._supported = cursor.fetchone() is not None
+        return self._supported
+
+    def build_match(self, query: str) -> Optional[str]:
+        """Quote each token and prefix-match the last one (search as you type)."""
+        tokens = self.tokenize(query)
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def search(self, query: str, limit: int = None) -> Optional[List[int]]:
+        match = self.build_match(query)
+        if match is None:
+            return []
+
+        weights = ', '.join(str(w) for w in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, {weights}) LIMIT %s",
+                [match, limit or self.max_results]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_books(self, book_ids: Iterable[int]) -> None:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+
+        rows = list(self.documents(book_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({self._placeholders(book_ids)})",
+                book_ids
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, author, genres, description) "
+                f"VALUES (%s, %s, %s, %s, %s)",
+                rows
+            )
+
+    def remove_books(self, book_ids: Iterable[int]) -> None:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({self._placeholders(book_ids)})",
+                book_ids
+            )
+
+class PostgresSearchIndex(BaseSearchIndex):
+    """Weighted tsvector table with a GIN index, ranked with ts_rank."""
+
+    table = 'catalog_book_search'
+    config = 'english'
+
+    def is_supported(self) -> bool:
+        if not self._supported:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass(%s)", [self.table])
+                self._supported = cursor.fetchone()[0] is not None
+        return self._supported
+
+    def build_tsquery(self, query: str) -> Optional[str]:
+        """AND all tokens together and prefix-match the last one."""
+        tokens = self.tokenize(query)
+        if not tokens:
+            return None
+        tokens[-1] += ':*'
+        return ' & '.join(tokens)
+
+    def search(self, query: str, limit: int = None) -> Optional[List[int]]:
+        tsquery = self.build_tsquery(query)
+        if tsquery is None:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT book_id FROM {self.table}, to_tsquery(%s, %s) query "
+                f"WHERE document @@ query ORDER BY ts_rank(document, query) DESC, book_id "
+                f"LIMIT %s",
+                [self.config, tsquery, limit or self.max_results]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_books(self, book_ids: Iterable[int]) -> None:
+        rows = list(self.documents(book_ids))
+        if not rows:
+            return
+
+        params = []
+        for book_id, title, author, genres, description in rows:
+            params.append([
+                book_id,
+                self.config, title,
+                self.config, author,
+                self.config, genres,
+                self.config, description,
+            ])
+
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (book_id, document) VALUES (%s, "
+                f"setweight(to_tsvector(%s, %s), 'A') || "
+                f"setweight(to_tsvector(%s, %s), 'B') || "
+                f"setweight(to_tsvector(%s, %s), 'C') || "
+                f"setweight(to_tsvector(%s, %s), 'D')) "
+                f"ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document",
+                params
+            )
+
+    def remove_books(self, book_ids: Iterable[int]) -> None:
+        book_ids = list(book_ids)
+        if not book_ids:
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE book_id IN ({self._placeholders(book_ids)})",
+                book_ids
+            )
+
+_indexes = {}
+
+def get_search_index() -> BaseSearchIndex:
+    """Return the search index implementation for the active database."""
+    vendor = connection.vendor
+    if vendor not in _indexes:
+        if vendor == 'sqlite':
+            _indexes[vendor] = SQLiteSearchIndex()
+        elif vendor == 'postgresql':
+            _indexes[vendor] = PostgresSearchIndex()
+        else:
+            logger.warning(f"No full-text search index for database vendor {vendor}")
+            _indexes[vendor] = BaseSearchIndex()
+    return _indexes[vendor]
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import Book, Author, Genre
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -11,7 +12,44 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
         fields = '__all__'
 
-class BookSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Trim serializer output using the request's ``?fields=`` and ``?expand=``
+    query params.
+    
+    ``fields`` is a comma-separated allowlist of top-level fields. ``expand``
+    swaps entries of ``expandable_fields`` (e.g. ``author``) from primary keys
+    to nested objects. Fields are dropped before serialization, so unused
+    method fields are never computed. Only safe (read) requests are
+    trimmed; writes always validate and return the full representation.
+    """
+    expandable_fields = {}
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        
+        for name in self._query_list(request, 'expand'):
+            if name in self.expandable_fields and name in fields:
+                serializer_class, kwargs = self.expandable_fields[name]
+                fields[name] = serializer_class(**kwargs)
+        
+        requested = self._query_list(request, 'fields')
+        if requested:
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+        
+        return fields
+    
+    @staticmethod
+    def _query_list(request, param):
+        value = request.query_params.get(param, '')
+        return {item.strip() for item in value.split(',') if item.strip()}
+
+class BookSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = AuthorSerializer(read_only=True)
     genres = GenreSerializer(many=True, read_only=True)
     
@@ -19,9 +57,13 @@ class BookSerializer(serializers.ModelSerializer):
     has_cover = serializers.BooleanField(read_only=True)
     has_model = serializers.BooleanField(read_only=True)
     has_pages = serializers.BooleanField(read_only=True)
+    page_count = serializers.IntegerField(read_only=True)
+    model_stats = serializers.JSONField(read_only=True)
+    model_needs_optimization = serializers.BooleanField(read_only=True)
     
     # Asset URLs (computed fields)
     cover_url = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
     model_url = serializers.SerializerMethodField()
     
     # Asset endpoints
@@ -31,8 +73,9 @@ class BookSerializer(serializers.ModelSerializer):
         model = Book
         fields = [
             'id', 'title', 'description', 'author', 'genres',
-            'has_cover', 'has_model', 'has_pages',
-            'cover_url', 'model_url', 'asset_endpoints',
+            'has_cover', 'has_model', 'has_pages', 'page_count',
+            'model_stats', 'model_needs_optimization',
+            'cover_url', 'cover_srcset', 'model_url', 'asset_endpoints',
             'total_copies', 'available_copies',
             'created_at', 'updated_at',
             # Legacy fields (deprecated)
@@ -46,6 +89,10 @@ class BookSerializer(serializers.ModelSerializer):
             return obj.get_cover_url(signed=False)
         return None
     
+    def get_cover_srcset(self, obj):
+        """Get public WebP thumbnail srcset if thumbnails exist."""
+        return obj.get_cover_srcset(signed=False)
+    
     def get_model_url(self, obj):
         """Get public model URL if available."""
         if obj.has_model:
@@ -67,6 +114,7 @@ class BookSerializer(serializers.ModelSerializer):
             },
             'pages': {
                 'get': f'{base_url}/pages/{{page_number}}/' if obj.has_pages else None,
+                'list': f'{base_url}/pages/' if obj.has_pages else None,
                 'upload': f'{base_url}/upload/pages/',
             },
             'confirm_upload': f'{base_url}/confirm-upload/',
@@ -75,6 +123,35 @@ class BookSerializer(serializers.ModelSerializer):
         
         return endpoints
 
+class BookListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Compact book representation for catalog listings."""
+    cover_url = serializers.SerializerMethodField()
+    cover_srcset = serializers.SerializerMethodField()
+    
+    expandable_fields = {
+        'author': (AuthorSerializer, {'read_only': True}),
+        'genres': (GenreSerializer, {'many': True, 'read_only': True}),
+    }
+    
+    class Meta:
+        model = Book
+        fields = [
+            'id', 'title', 'author', 'genres',
+            'has_cover', 'has_model', 'has_pages', 'page_count', 'cover_url', 'cover_srcset',
+            'total_copies', 'available_copies', 'created_at'
+        ]
+        read_only_fields = fields
+    
+    def get_cover_url(self, obj):
+        """Get public cover URL if available."""
+        if obj.has_cover:
+            return obj.get_cover_url(signed=False)
+        return None
+    
+    def get_cover_srcset(self, obj):
+        """Get public WebP thumbnail srcset if thumbnails exist."""
+        return obj.get_cover_srcset(signed=False)
+
 class BookCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating books without nested objects."""
     
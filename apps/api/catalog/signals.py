@@ -0,0 +1,108 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from core.response_cache import invalidate
+from .assets import release_blob
+from .models import Author, Book, BookAsset, Genre
+from .search import get_search_index
+from .suggest import suggest_index
+
+# Book fields copied into the full-text index (genres follow via m2m_changed)
+INDEXED_BOOK_FIELDS = {'title', 'description', 'author', 'author_id'}
+
+def reindex_books(book_ids):
+    index = get_search_index()
+    if index.is_supported():
+        index.index_books(book_ids)
+
+def related_books_changed(book_ids):
+    """Bump ``updated_at`` and reindex books whose author or genres changed.
+
+    Nested author/genre data is part of a book's representation, so its
+    ``updated_at`` (and therefore its ETag) must move with them.
+    """
+    book_ids = list(book_ids)
+    if not book_ids:
+        return
+    Book.objects.filter(pk__in=book_ids).update(updated_at=timezone.now())
+    invalidate(Book, book_ids)
+    reindex_books(book_ids)
+
+@receiver(post_save, sender=Book)
+def index_saved_book(sender, instance, update_fields=None, **kwargs):
+    # Inventory, asset flags and job results leave the indexed text alone
+    if update_fields is not None and not INDEXED_BOOK_FIELDS.intersection(update_fields):
+        return
+    reindex_books([instance.pk])
+
+@receiver(post_delete, sender=Book)
+def unindex_deleted_book(sender, instance, **kwargs):
+    index = get_search_index()
+    if index.is_supported():
+        index.remove_books([instance.pk])
+
+@receiver(m2m_changed, sender=Book.genres.through)
+def index_book_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+
+    if not reverse:
+        if action != 'pre_clear':
+            related_books_changed([instance.pk])
+    elif action == 'pre_clear':
+        # pk_set is not provided on clear; remember the affected books first
+        instance._search_book_ids = list(instance.book_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        related_books_changed(getattr(instance, '_search_book_ids', []))
+    else:
+        related_books_changed(pk_set or [])
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created, **kwargs):
+    if not created:
+        related_books_changed(instance.book_set.values_list('pk', flat=True))
+
+@receiver(post_save, sender=Genre)
+def index_genre_books(sender, instance, created, **kwargs):
+    if not created:
+        related_books_changed(instance.book_set.values_list('pk', flat=True))
+
+@receiver(pre_delete, sender=Genre)
+def remember_genre_books(sender, instance, **kwargs):
+    instance._search_book_ids = list(instance.book_set.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Genre)
+def index_deleted_genre_books(sender, instance, **kwargs):
+    related_books_changed(getattr(instance, '_search_book_ids', []))
+
+@receiver(post_save, sender=Book)
+def suggest_saved_book(sender, instance, **kwargs):
+    suggest_index.add('book', instance.pk, instance.title)
+
+@receiver(post_save, sender=Author)
+def suggest_saved_author(sender, instance, **kwargs):
+    suggest_index.add('author', instance.pk, instance.name)
+
+@receiver(post_save, sender=Genre)
+def suggest_saved_genre(sender, instance, **kwargs):
+    suggest_index.add('genre', instance.pk, instance.name)
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+def unsuggest_deleted(sender, instance, **kwargs):
+    suggest_index.remove(sender._meta.model_name, instance.pk)
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Genre)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    invalidate(sender, [instance.pk])
+
+@receiver(post_delete, sender=BookAsset)
+def release_unlinked_blob(sender, instance, **kwargs):
+    # Covers direct unlinking and cascades from a deleted book
+    release_blob(instance.blob_id)
@@ -0,0 +1,231 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from django.conf import settings
+from typing import Callable, Dict, List, Optional, Tuple
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+# Sorts after every character, closing the key range of a prefix
+PREFIX_END = '\U0010ffff'
+
+def normalize(text: str) -> str:
+    """Lowercase, strip diacritics and collapse punctuation into single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(WORD_RE.findall(stripped.lower()))
+
+class PrefixIndex:
+    """
+    In-process prefix index over book titles, author names and genre names.
+
+    Every word position of a label is stored as a key in one sorted array, so
+    ``"hob"`` matches both "Hobbit" and "The Hobbit". Lookups bisect the
+    prefix range and rank it in memory, never touching the database. The index
+    is loaded lazily, updated in place from model signals and fully reloaded
+    every ``SUGGEST_INDEX_TTL`` seconds so workers converge on other processes'
+    edits. Only one thread reloads at a time; the others keep answering from
+    the previous index, and signal updates made during a reload are replayed
+    onto the new one.
+
+    Ranked results for prefixes of up to ``SUGGEST_PRECOMPUTED_PREFIX_LENGTH``
+    characters are computed on load, and any other prefix matching more than
+    ``SUGGEST_SCAN_LIMIT`` keys is ranked once and memoized, so no keystroke
+    ranks more than ``SUGGEST_SCAN_LIMIT`` keys. Memoized rankings are kept
+    up to date by ``add()``/``remove()``.
+    """
+
+    # Most suggestions a caller can ask for; memoized rankings keep this many
+    max_results = 50
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SUGGEST_INDEX_TTL', 300)
+        self.precomputed_length = getattr(settings, 'SUGGEST_PRECOMPUTED_PREFIX_LENGTH', 2)
+        self.scan_limit = getattr(settings, 'SUGGEST_SCAN_LIMIT', 1000)
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, int, str, int]] = []
+        self._labels: Dict[Tuple[str, int], str] = {}
+        # prefix -> best (rank, entry) per label, at most max_results, best first
+        self._top: Dict[str, List[Tuple[tuple, tuple]]] = {}
+        self._loaded_at = None
+        self._lock = threading.RLock()
+        # Held for the duration of a reload
+        self._load_lock = threading.Lock()
+        # add()/remove() calls made while a reload reads the database
+        self._pending: Optional[List[Tuple[Callable, tuple]]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or (self.ttl and time.monotonic() - self._loaded_at > self.ttl)
+
+    def load(self) -> None:
+        """Rebuild the whole index from the database."""
+        with self._load_lock:
+            self._load()
+
+    def _refresh(self) -> None:
+        """Reload a stale index unless another thread already is."""
+        if not self._is_stale():
+            return
+        # Before the first load there is nothing to serve, so wait for it
+        if not self._load_lock.acquire(blocking=not self.is_loaded):
+            return
+        try:
+            if self._is_stale():
+                self._load()
+        finally:
+            self._load_lock.release()
+
+    def _load(self) -> None:
+        from .models import Author, Book, Genre
+
+        with self._lock:
+            self._pending = []
+
+        try:
+            labels = {}
+            for pk, title in Book.objects.values_list('pk', 'title').iterator():
+                labels[('book', pk)] = title
+            for pk, name in Author.objects.values_list('pk', 'name').iterator():
+                labels[('author', pk)] = name
+            for pk, name in Genre.objects.values_list('pk', 'name').iterator():
+                labels[('genre', pk)] = name
+
+            rows = []
+            for (kind, pk), label in labels.items():
+                rows.extend(self._rows(kind, pk, label))
+            rows.sort()
+            keys = [row[0] for row in rows]
+            entries = [row[1] for row in rows]
+
+            # Short prefixes match the most keys; rank each once per load
+            top = {}
+            for key in keys:
+                for length in range(1, min(len(key), self.precomputed_length) + 1):
+                    top.setdefault(key[:length], None)
+            for prefix in top:
+                start = bisect.bisect_left(keys, prefix)
+                end = bisect.bisect_left(keys, prefix + PREFIX_END, start)
+                top[prefix] = self._rank(entries[start:end])
+
+            with self._lock:
+                self._keys = keys
+                self._entries = entries
+                self._top = top
+                self._labels = labels
+                self._loaded_at = time.monotonic()
+                # The tables may have been read before these changes were
+                for apply, args in self._pending:
+                    apply(*args)
+        finally:
+            with self._lock:
+                self._pending = None
+
+    def _rows(self, kind: str, pk: int, label: str):
+        words = normalize(label).split()
+        for position in range(len(words)):
+            key = ' '.join(words[position:])
+            yield key, (kind, pk, label, position)
+
+    @staticmethod
+    def _entry_rank(entry) -> tuple:
+        # Label starts beat mid-label word matches, then shorter labels
+        return entry[3] > 0, len(entry[2]), entry[2]
+
+    def _rank(self, entries) -> List[Tuple[tuple, tuple]]:
+        """Rank entries, keeping each label's best match, and return the top max_results."""
+        best = {}
+        for entry in entries:
+            rank = self._entry_rank(entry)
+            if entry[:2] not in best or rank < best[entry[:2]][0]:
+                best[entry[:2]] = (rank, entry)
+        return heapq.nsmallest(self.max_results, best.values())
+
+    def _memoized_prefixes(self, key: str):
+        return [key[:length] for length in range(1, len(key) + 1) if key[:length] in self._top]
+
+    def add(self, kind: str, pk: int, label: str) -> None:
+        """Insert or replace one label; a no-op until the index is first loaded."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._add, (kind, pk, label)))
+            if self.is_loaded:
+                self._add(kind, pk, label)
+
+    def _add(self, kind: str, pk: int, label: str) -> None:
+        # Saves that leave the label alone are the common case
+        if self._labels.get((kind, pk)) == label:
+            return
+        self._remove(kind, pk)
+        best = {}
+        for key, entry in self._rows(kind, pk, label):
+            position = bisect.bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._entries.insert(position, entry)
+            for prefix in self._memoized_prefixes(key):
+                ranked = (self._entry_rank(entry), entry)
+                best[prefix] = min(best.get(prefix, ranked), ranked)
+        self._labels[(kind, pk)] = label
+
+        for prefix, ranked in best.items():
+            top = self._top[prefix]
+            bisect.insort(top, ranked)
+            del top[self.max_results:]
+
+    def remove(self, kind: str, pk: int) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._remove, (kind, pk)))
+            if self.is_loaded:
+                self._remove(kind, pk)
+
+    def _remove(self, kind: str, pk: int) -> None:
+        label = self._labels.pop((kind, pk), None)
+        if label is None:
+            return
+        for key, entry in self._rows(kind, pk, label):
+            position = bisect.bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._entries[position] == entry:
+                    del self._keys[position]
+                    del self._entries[position]
+                    break
+                position += 1
+
+            for prefix in self._memoized_prefixes(key):
+                top = self._top[prefix]
+                remaining = [ranked for ranked in top if ranked[1][:2] != (kind, pk)]
+                if len(remaining) == len(top):
+                    continue
+                if len(top) < self.max_results:
+                    # The ranking already held every match
+                    self._top[prefix] = remaining
+                else:
+                    # The next-best label is unknown; rank again when asked
+                    del self._top[prefix]
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to ``limit`` suggestions whose words start with ``query``."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        self._refresh()
+
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                start = bisect.bisect_left(self._keys, prefix)
+                end = bisect.bisect_left(self._keys, prefix + PREFIX_END, start)
+                top = self._rank(self._entries[start:end])
+                if end - start > self.scan_limit:
+                    self._top[prefix] = top
+            return [{'type': kind, 'id': pk, 'text': label} for _, (kind, pk, label, _) in top[:limit]]
+
+# Global instance
+suggest_index = PrefixIndex()
@@ -0,0 +1,39 @@
+from django.conf import settings
+from jobs.queue import task
+from .derivatives import generate_cover_thumbnails
+from .gltf import GLBError, inspect_glb_file, inspect_glb_object, optimization_warnings
+from .models import Book, storage_service
+
+@task('catalog.cover_thumbnails')
+def cover_thumbnails(book_id):
+    """Render a book's cover thumbnails after its cover upload is confirmed."""
+    book = Book.objects.filter(pk=book_id, has_cover=True).first()
+    if book is None:
+        return
+    if not generate_cover_thumbnails(book):
+        # Raising schedules a retry with backoff
+        raise RuntimeError(f"No cover thumbnails generated for book {book_id}")
+    book.save(update_fields=['cover_thumbnail_widths', 'updated_at'])
+
+@task('catalog.inspect_model')
+def inspect_model(book_id):
+    """Record a book's GLB statistics and flag models that need optimizing."""
+    book = Book.objects.filter(pk=book_id, has_model=True).first()
+    if book is None:
+        return
+    key = book.model_blob_key or book.get_model_key()
+    try:
+        if getattr(settings, 'USE_LOCAL_STORAGE', False):
+            # Memory-mapped in place
+            with storage_service.local_file(key) as path:
+                stats = inspect_glb_file(path)
+        else:
+            # Only the header, JSON chunk and image headers are fetched
+            stats = inspect_glb_object(storage_service, key)
+        stats['warnings'] = optimization_warnings(stats)
+    except GLBError as e:
+        # A broken file will not parse on retry either
+        stats = {'error': str(e), 'warnings': ['invalid_glb']}
+    book.model_stats = stats
+    book.model_needs_optimization = bool(stats['warnings'])
+    book.save(update_fields=['model_stats', 'model_needs_optimization', 'updated_at'])
@@ -1,3 +1,844 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import struct
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.local_storage import storage_service
+from users.models import User
+from . import async_views
+from .derivatives import render_thumbnails
+from .gltf import KTX2_IDENTIFIER, GLBError, RangedObject, inspect_glb, inspect_glb_object, optimization_warnings
+from .tasks import inspect_model
+from .filters import BookSearchFilter
+from .models import AssetBlob, Author, Book, BookAsset, BookPage, Genre
+from .suggest import PrefixIndex
 
-# Create your tests here.
+
+class MediaRootMixin:
+    """Point the local storage service at a throwaway MEDIA_ROOT."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        patcher = mock.patch.object(storage_service, 'media_root', self.media_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def put_object(self, key, data=b'data'):
+        storage_service.upload_file(data, key)
+        return key
+
+
+class BatchAssetUrlTests(APITestCase):
+    url = '/api/books/assets/batch/'
+
+    def setUp(self):
+        author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Book', author=author, has_cover=True, has_pages=True)
+        BookPage.objects.create(book=self.book, page_number=1, key=self.book.get_pages_key(page_number=1))
+        BookPage.objects.create(book=self.book, page_number=2, key=self.book.get_pages_key(page_number=2))
+
+    def test_signs_requested_assets(self):
+        response = self.client.post(self.url, {'items': [
+            {'book_id': self.book.pk, 'asset_type': 'cover'},
+            {'book_id': self.book.pk, 'asset_type': 'pages', 'page_range': [2, 5]},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        cover, pages = response.data['results']
+        self.assertIn('url', cover)
+        self.assertEqual([page['page_number'] for page in pages['pages']], [2])
+
+    def test_rejects_non_object_body(self):
+        response = self.client.post(self.url, [1, 2], format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_empty_and_oversized_batches(self):
+        self.assertEqual(self.client.post(self.url, {'items': []}, format='json').status_code, 400)
+        items = [{'book_id': self.book.pk, 'asset_type': 'cover'}] * 201
+        self.assertEqual(self.client.post(self.url, {'items': items}, format='json').status_code, 400)
+
+    def test_rejects_non_integer_book_ids(self):
+        response = self.client.post(self.url, {'items': [
+            {'book_id': self.book.pk + 0.9, 'asset_type': 'cover'},
+            {'book_id': str(self.book.pk), 'asset_type': 'cover'},
+            {'book_id': True, 'asset_type': 'cover'},
+            'not an object',
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        errors = [result['error'] for result in response.data['results']]
+        self.assertEqual(errors, ['Invalid book_id'] * 3 + ['Each item must be an object'])
+
+    def test_rejects_non_integer_page_range(self):
+        response = self.client.post(self.url, {'items': [
+            {'book_id': self.book.pk, 'asset_type': 'pages', 'page_range': [1.5, 2]},
+        ]}, format='json')
+
+        self.assertEqual(response.data['results'][0]['error'], 'page_range must be [first, last]')
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(name='Author')
+        self.books = [Book.objects.create(title=f'Book {number}', author=author) for number in range(5)]
+        # Ties on created_at must be broken by id, never skipped or repeated
+        Book.objects.update(created_at=timezone.now())
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(book['id'] for book in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_cover_every_book_once(self):
+        ids = self.walk('/api/books/?page_size=2')
+
+        self.assertEqual(ids, sorted(book.pk for book in self.books))
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/books/?page_size=2')
+        second = self.client.get(first.data['next'])
+
+        previous = self.client.get(second.data['previous'])
+
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/books/?cursor=not-a-cursor')
+
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchIndexTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tolkien = Author.objects.create(name='Tolkien')
+        self.fantasy = Genre.objects.create(name='Fantasy')
+        self.hobbit = Book.objects.create(title='The Hobbit', author=self.tolkien)
+        self.dune = Book.objects.create(title='Dune', author=Author.objects.create(name='Herbert'),
+                                        description='A hobbit never appears here')
+
+    def search(self, query):
+        response = self.client.get('/api/books/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [book['id'] for book in response.data['results']]
+
+    def test_ranks_title_matches_first(self):
+        self.assertEqual(self.search('hobbit'), [self.hobbit.pk, self.dune.pk])
+
+    def test_prefix_matches_the_last_token(self):
+        self.assertEqual(self.search('the hob'), [self.hobbit.pk])
+
+    def test_index_follows_related_changes(self):
+        self.hobbit.genres.add(self.fantasy)
+        self.assertEqual(self.search('fantasy'), [self.hobbit.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tolkien.name = 'J.R.R. Tolkien'
+            self.tolkien.save()
+            self.fantasy.delete()
+
+        self.assertEqual(self.search('tolkien'), [self.hobbit.pk])
+        self.assertEqual(self.search('fantasy'), [])
+
+    def test_saves_of_unindexed_fields_skip_the_index(self):
+        with mock.patch('catalog.search.SQLiteSearchIndex.index_books') as index_books:
+            self.hobbit.page_count = 3
+            self.hobbit.save(update_fields=['page_count', 'updated_at'])
+            index_books.assert_not_called()
+
+            self.hobbit.title = 'There and Back Again'
+            self.hobbit.save(update_fields=['title', 'updated_at'])
+            index_books.assert_called_once_with([self.hobbit.pk])
+
+    def test_deleted_books_leave_the_index(self):
+        self.hobbit.delete()
+
+        self.assertEqual(self.search('tolkien'), [])
+
+    def test_genre_joins_do_not_duplicate_results(self):
+        self.hobbit.genres.add(self.fantasy, Genre.objects.create(name='Fantasy Classics'))
+
+        self.assertEqual(self.search('fantasy'), [self.hobbit.pk])
+
+    def test_falls_back_to_icontains_without_an_index(self):
+        self.hobbit.genres.add(self.fantasy, Genre.objects.create(name='Fantasy Classics'))
+
+        with mock.patch('catalog.filters.get_search_index') as get_index:
+            get_index.return_value.tokenize.return_value = ['fantasy']
+            get_index.return_value.is_supported.return_value = False
+            self.assertEqual(self.search('fantasy'), [self.hobbit.pk])
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(title='Dune', author=Author.objects.create(name='Herbert'))
+
+    def test_fields_and_expand_trim_reads(self):
+        response = self.client.get('/api/books/?fields=id,title,author&expand=author')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0], {
+            'id': self.book.pk, 'title': 'Dune', 'author': {'id': self.book.author_id, 'name': 'Herbert'}
+        })
+
+    def test_fields_are_ignored_on_writes(self):
+        self.client.force_authenticate(User.objects.create_user('editor', password='pw'))
+
+        response = self.client.patch(f'/api/books/{self.book.pk}/?fields=id',
+                                     {'title': 'Dune Messiah', 'description': 'Sequel'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['title'], response.data['description']), ('Dune Messiah', 'Sequel'))
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.title, self.book.description), ('Dune Messiah', 'Sequel'))
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'))
+        self.url = f'/api/books/{self.book.pk}/'
+
+    def test_write_invalidates_cached_detail_after_commit(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.book.title = 'Renamed'
+            self.book.save()
+            # Still inside the transaction: the version has not moved yet
+            self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+
+        self.assertTrue(callbacks)
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed')
+
+    def test_non_canonical_pk_is_invalidated_too(self):
+        self.client.force_authenticate(User.objects.create_user('reader', password='pw'))
+        url = f'/api/authors/0{self.book.author.pk}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.author.name = 'Renamed'
+            self.book.author.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertEqual(self.client.get('/api/authors/abc/').status_code, 404)
+
+    def test_cache_varies_on_query_string(self):
+        self.client.get('/api/books/')
+
+        self.assertEqual(self.client.get('/api/books/?fields=id')['X-Cache'], 'MISS')
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(title='Dune', author=Author.objects.create(name='Herbert'))
+
+    def test_retrieve_answers_matching_etag_with_304(self):
+        url = f'/api/books/{self.book.pk}/'
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_malformed_pk_is_not_found(self):
+        self.assertEqual(self.client.get('/api/books/abc/').status_code, 404)
+
+    def test_list_etag_changes_when_a_book_changes(self):
+        etag = self.client.get('/api/books/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/books/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title='Emma', author=self.book.author)
+
+        self.assertEqual(self.client.get('/api/books/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_filters_once_per_request(self):
+        with mock.patch.object(BookSearchFilter, 'filter_queryset', autospec=True,
+                               side_effect=lambda backend, request, queryset, view: queryset) as search:
+            response = self.client.get('/api/books/?search=dune')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(search.call_count, 1)
+
+
+class SuggestIndexTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Zed')
+        self.index = PrefixIndex(ttl=60)
+
+    def test_ranks_whole_prefix_range(self):
+        # Keys of the long titles sort before the short one
+        Book.objects.bulk_create([
+            Book(title=f'aa{number:03d} a rather long title', author=self.author) for number in range(250)
+        ])
+        Book.objects.create(title='Ab', author=self.author)
+
+        suggestions = self.index.suggest('a', limit=3)
+
+        self.assertEqual(suggestions[0]['text'], 'Ab')
+
+    def test_label_starts_rank_before_word_matches(self):
+        Book.objects.create(title='The Hobbit', author=self.author)
+        Book.objects.create(title='Hobbit Companion Guide', author=self.author)
+
+        texts = [suggestion['text'] for suggestion in self.index.suggest('hob')]
+
+        self.assertEqual(texts, ['Hobbit Companion Guide', 'The Hobbit'])
+
+    def test_short_prefixes_are_ranked_on_load(self):
+        Book.objects.create(title='Dune', author=self.author)
+        self.index.load()
+
+        with mock.patch.object(self.index, '_rank') as rank:
+            suggestions = self.index.suggest('du')
+
+        rank.assert_not_called()
+        self.assertEqual(suggestions[0]['text'], 'Dune')
+
+    @override_settings(SUGGEST_SCAN_LIMIT=5)
+    def test_large_ranges_are_ranked_once(self):
+        index = PrefixIndex(ttl=60)
+        Book.objects.bulk_create([Book(title=f'Saga {number}', author=self.author) for number in range(10)])
+        index.load()
+        first = index.suggest('saga')
+
+        with mock.patch.object(index, '_rank') as rank:
+            self.assertEqual(index.suggest('saga'), first)
+        rank.assert_not_called()
+
+    def test_memoized_rankings_follow_edits(self):
+        index = PrefixIndex(ttl=60)
+        index.max_results = 2
+        Book.objects.bulk_create([Book(title=title, author=self.author) for title in ('Dune', 'Dunes', 'Dunesong')])
+        index.load()
+        self.assertEqual([s['text'] for s in index.suggest('d')], ['Dune', 'Dunes'])
+
+        index.add('book', 999999, 'Dx')
+        self.assertEqual([s['text'] for s in index.suggest('d')], ['Dx', 'Dune'])
+
+        index.remove('book', 999999)
+        dune = Book.objects.get(title='Dune')
+        index.remove('book', dune.pk)
+        self.assertEqual([s['text'] for s in index.suggest('d')], ['Dunes', 'Dunesong'])
+
+    def test_updates_during_reload_are_kept(self):
+        values_list = Genre.objects.values_list
+
+        def add_while_loading(*args, **kwargs):
+            self.index.add('book', 999999, 'Zebra Tales')
+            return values_list(*args, **kwargs)
+
+        with mock.patch.object(Genre.objects, 'values_list', side_effect=add_while_loading):
+            self.index.load()
+
+        self.assertEqual(self.index.suggest('zebra'), [{'type': 'book', 'id': 999999, 'text': 'Zebra Tales'}])
+
+    def test_stale_index_is_served_while_another_thread_reloads(self):
+        Book.objects.create(title='Dune', author=self.author)
+        self.index.load()
+        self.index._loaded_at -= 3600
+
+        with self.index._load_lock, mock.patch.object(self.index, '_load') as load:
+            suggestions = self.index.suggest('dune')
+
+        load.assert_not_called()
+        self.assertEqual(suggestions[0]['text'], 'Dune')
+
+
+class MultipartModelUploadTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'))
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+        self.url = f'/api/books/{self.book.pk}/assets/upload/model/multipart/'
+        patcher = mock.patch.object(storage_service, 'MULTIPART_MIN_PART_SIZE', 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start(self):
+        response = self.client.post(self.url, {'content_type': 'model/gltf-binary'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['upload_id']
+
+    def put_part(self, part, data):
+        # The signed part URLs are plain views outside DRF authentication
+        response = self.client.generic('PUT', part['url'], data, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+        return {'part_number': part['part_number'], 'etag': response['ETag']}
+
+    def test_parts_resume_and_assemble_in_order(self):
+        upload_id = self.start()
+        parts = self.client.post(f'{self.url}parts/', {'upload_id': upload_id, 'part_count': 2},
+                                 format='json').data['parts']
+        second = self.put_part(parts[1], b'Tail')
+        self.put_part(parts[0], b'lost')
+
+        # Resume: the listing shows both parts, then part 1 is re-sent
+        listed = self.client.get(f'{self.url}parts/', {'upload_id': upload_id}).data['parts']
+        self.assertEqual([part['part_number'] for part in listed], [1, 2])
+        first = self.put_part(parts[0], b'glTF')
+
+        response = self.client.post(f'{self.url}complete/', {'upload_id': upload_id, 'parts': [second, first]},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(storage_service.read_object(self.book.get_model_key()), b'glTFTail')
+        self.assertEqual(self.client.get(f'{self.url}parts/', {'upload_id': upload_id}).status_code, 404)
+
+    def test_stale_or_undersized_parts_are_refused(self):
+        upload_id = self.start()
+        parts = self.client.post(f'{self.url}parts/', {'upload_id': upload_id, 'part_numbers': [1, 2]},
+                                 format='json').data['parts']
+        first = self.put_part(parts[0], b'gl')
+        second = self.put_part(parts[1], b'Tail')
+
+        stale = self.client.post(f'{self.url}complete/', {
+            'upload_id': upload_id, 'parts': [{**first, 'etag': 'stale'}, second]}, format='json')
+        small = self.client.post(f'{self.url}complete/', {'upload_id': upload_id, 'parts': [first, second]},
+                                 format='json')
+
+        self.assertEqual((stale.status_code, small.status_code), (400, 400))
+        self.assertFalse(storage_service.validate_object_exists(self.book.get_model_key()))
+
+    def test_oversized_upload_keeps_the_existing_model(self):
+        self.put_object(self.book.get_model_key(), b'current')
+        Book.objects.filter(pk=self.book.pk).update(has_model=True)
+        upload_id = self.start()
+        parts = self.client.post(f'{self.url}parts/', {'upload_id': upload_id, 'part_count': 2},
+                                 format='json').data['parts']
+        uploaded = [self.put_part(part, b'x' * 8) for part in parts]
+
+        with mock.patch.object(storage_service, 'get_max_size_for_asset_type', return_value=0.00001), \
+                mock.patch.object(storage_service, 'complete_multipart_upload') as complete:
+            response = self.client.post(f'{self.url}complete/', {'upload_id': upload_id, 'parts': uploaded},
+                                        format='json')
+
+        self.assertEqual(response.status_code, 413)
+        complete.assert_not_called()
+        self.assertEqual(storage_service.read_object(self.book.get_model_key()), b'current')
+        self.assertEqual(self.client.get(f'{self.url}parts/', {'upload_id': upload_id}).status_code, 404)
+
+    def test_abort_discards_the_upload(self):
+        upload_id = self.start()
+
+        response = self.client.post(f'{self.url}abort/', {'upload_id': upload_id}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.post(f'{self.url}parts/', {'upload_id': upload_id},
+                                          format='json').status_code, 404)
+
+    def test_part_numbers_are_bounded(self):
+        upload_id = self.start()
+
+        response = self.client.post(f'{self.url}parts/', {'upload_id': upload_id, 'part_numbers': [0, 10001]},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+def image_bytes(size, image_format='JPEG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'navy').save(buffer, image_format)
+    return buffer.getvalue()
+
+
+class CoverThumbnailTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'))
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+
+    def test_renders_webp_at_each_width_without_upscaling(self):
+        thumbnails = render_thumbnails(image_bytes((400, 600)), [160, 320, 640])
+
+        sizes = {width: Image.open(io.BytesIO(data)).size for width, data in thumbnails.items()}
+        self.assertEqual(sizes, {400: (400, 600), 320: (320, 480), 160: (160, 240)})
+        self.assertTrue(all(Image.open(io.BytesIO(data)).format == 'WEBP' for data in thumbnails.values()))
+
+    @override_settings(JOBS_EAGER=True, COVER_THUMBNAIL_WIDTHS=[160, 320])
+    def test_confirmed_cover_gets_a_srcset(self):
+        self.put_object(self.book.get_cover_key(), image_bytes((800, 1200)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/books/{self.book.pk}/assets/confirm-upload/', {
+                'asset_type': 'cover', 'object_key': self.book.get_cover_key()}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.cover_thumbnail_widths, [160, 320])
+        for key in self.book.get_cover_thumbnail_keys().values():
+            self.assertTrue(storage_service.validate_object_exists(key))
+        srcset = self.client.get(f'/api/books/{self.book.pk}/').data['cover_srcset']
+        self.assertRegex(srcset, r'^\S+w160\.webp 160w, \S+w320\.webp 320w$')
+
+
+def glb_bytes(document, binary=b''):
+    """Pack a glTF document and BIN chunk into a GLB, padding chunks to 4 bytes."""
+    json_chunk = json.dumps(document).encode()
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    chunks = struct.pack('<II', len(json_chunk), 0x4E4F534A) + json_chunk
+    if binary:
+        chunks += struct.pack('<II', len(binary), 0x004E4942) + binary
+    return struct.pack('<4sII', b'glTF', 2, 12 + len(chunks)) + chunks
+
+
+def textured_quad(image, mime_type, extensions=(), geometry=b''):
+    return glb_bytes({
+        'asset': {'version': '2.0'},
+        'extensionsUsed': list(extensions),
+        'accessors': [{'count': 4}, {'count': 6}],
+        'bufferViews': [{'buffer': 0, 'byteOffset': 0, 'byteLength': len(image)}],
+        'images': [{'bufferView': 0, 'mimeType': mime_type}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 0}, 'indices': 1}]}],
+    }, image + geometry)
+
+
+class GLBInspectionTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'))
+        self.client.force_authenticate(User.objects.create_user('admin', password='pw', is_staff=True))
+
+    def test_reports_geometry_textures_and_bytes(self):
+        data = textured_quad(image_bytes((8, 4), 'PNG'), 'image/png')
+
+        stats = inspect_glb(data)
+
+        self.assertEqual((stats['vertices'], stats['triangles'], stats['primitives']), (4, 2, 1))
+        self.assertEqual((stats['textures'][0]['width'], stats['textures'][0]['height']), (8, 4))
+        self.assertEqual(stats['bytes']['total'], len(data))
+        self.assertEqual(optimization_warnings(stats), ['uncompressed_geometry', 'uncompressed_textures'])
+
+    def test_compressed_models_have_no_warnings(self):
+        ktx2 = KTX2_IDENTIFIER + struct.pack('<IIII', 0, 1, 256, 128)
+        data = textured_quad(ktx2, 'image/ktx2', ['KHR_draco_mesh_compression', 'KHR_texture_basisu'])
+
+        stats = inspect_glb(data)
+
+        self.assertEqual((stats['geometry_compression'], stats['texture_compression']), (['draco'], ['ktx2']))
+        self.assertEqual((stats['textures'][0]['width'], stats['textures'][0]['height']), (256, 128))
+        self.assertEqual(optimization_warnings(stats), [])
+
+    @override_settings(MODEL_MAX_TRIANGLES=1, MODEL_MAX_TEXTURE_SIZE=4)
+    def test_budgets_are_enforced(self):
+        stats = inspect_glb(textured_quad(image_bytes((8, 4), 'PNG'), 'image/png'))
+
+        self.assertIn('too_many_triangles', optimization_warnings(stats))
+        self.assertIn('oversized_texture', optimization_warnings(stats))
+
+    def test_invalid_files_are_rejected(self):
+        data = textured_quad(image_bytes((8, 4), 'PNG'), 'image/png')
+
+        for broken in (b'x' * 40, data[:len(data) // 2], glb_bytes({'meshes': [{'primitives': [
+                {'attributes': {'POSITION': 7}}]}]})):
+            with self.assertRaises(GLBError):
+                inspect_glb(broken)
+
+    def test_stored_models_are_read_by_range(self):
+        # Geometry after the texture, well past the read-ahead window
+        data = textured_quad(image_bytes((8, 4), 'PNG'), 'image/png', geometry=b'\0' * 1024 * 1024)
+        key = self.put_object(self.book.get_model_key(), data)
+
+        with mock.patch.object(storage_service, 'read_range', wraps=storage_service.read_range) as read_range:
+            stats = inspect_glb_object(storage_service, key)
+
+        self.assertEqual(stats, inspect_glb(data))
+        # Header, JSON chunk and the texture header in a single small read
+        self.assertEqual(read_range.call_count, 1)
+        self.assertLessEqual(read_range.call_args.args[2], RangedObject.read_ahead)
+
+    @override_settings(USE_LOCAL_STORAGE=False)
+    def test_remote_models_are_not_downloaded(self):
+        key = self.put_object(self.book.get_model_key(), textured_quad(image_bytes((8, 4), 'PNG'), 'image/png'))
+        Book.objects.filter(pk=self.book.pk).update(has_model=True)
+
+        with mock.patch.object(storage_service, 'local_file') as local_file:
+            inspect_model(self.book.pk)
+
+        local_file.assert_not_called()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.model_stats['triangles'], 2)
+        self.assertEqual(self.book.get_model_key(), key)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_confirmed_model_is_inspected(self):
+        key = self.put_object(self.book.get_model_key(), textured_quad(image_bytes((8, 4), 'PNG'), 'image/png'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/books/{self.book.pk}/assets/confirm-upload/', {
+                'asset_type': 'model', 'object_key': key}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        data = self.client.get(f'/api/books/{self.book.pk}/').data
+        self.assertEqual(data['model_stats']['triangles'], 2)
+        self.assertTrue(data['model_needs_optimization'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_unparseable_model_is_flagged(self):
+        key = self.put_object(self.book.get_model_key(), b'not a model')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/books/{self.book.pk}/assets/confirm-upload/', {
+                'asset_type': 'model', 'object_key': key}, format='json')
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.model_stats['warnings'], ['invalid_glb'])
+        self.assertTrue(self.book.model_needs_optimization)
+
+
+class ConfirmUploadKeyTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Book', author=author)
+        self.other = Book.objects.create(title='Other', author=author)
+        self.admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/books/{self.book.pk}/assets/confirm-upload/'
+
+    def confirm(self, **data):
+        return self.client.post(self.url, data, format='json')
+
+    def test_confirms_own_cover_key(self):
+        self.put_object(self.book.get_cover_key())
+
+        response = self.confirm(asset_type='cover', object_key=self.book.get_cover_key())
+
+        self.assertEqual(response.status_code, 200)
+        self.book.refresh_from_db()
+        self.assertTrue(self.book.has_cover)
+
+    def test_rejects_other_books_key(self):
+        other_key = self.put_object(self.other.get_model_key())
+
+        response = self.confirm(asset_type='model', object_key=other_key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(storage_service.validate_object_exists(other_key))
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.has_model)
+
+    def test_rejects_path_traversal_key(self):
+        response = self.confirm(asset_type='cover', object_key='../../etc/passwd')
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(CONTENT_ADDRESSED_ASSETS=True)
+    def test_content_addressed_confirm_never_deletes_foreign_objects(self):
+        other_key = self.put_object(self.other.get_cover_key())
+
+        response = self.confirm(asset_type='cover', object_key=other_key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(storage_service.validate_object_exists(other_key))
+        self.assertFalse(AssetBlob.objects.exists())
+
+    @override_settings(CONTENT_ADDRESSED_ASSETS=True)
+    def test_content_addressed_confirm_moves_own_upload_into_blob(self):
+        key = self.put_object(self.book.get_cover_key())
+
+        response = self.confirm(asset_type='cover', object_key=key)
+
+        self.assertEqual(response.status_code, 200)
+        blob = AssetBlob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertTrue(storage_service.validate_object_exists(blob.key))
+        self.assertFalse(storage_service.validate_object_exists(key))
+
+
+class ConfirmPageUploadTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Book', author=author)
+        self.other = Book.objects.create(title='Other', author=author)
+        self.admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/books/{self.book.pk}/assets/confirm-upload/'
+
+    def confirm_page(self, page_number, object_key):
+        return self.client.post(self.url, {
+            'asset_type': 'pages', 'page_number': page_number, 'object_key': object_key
+        }, format='json')
+
+    def test_records_page_in_manifest(self):
+        key = self.put_object(self.book.get_pages_key(page_number=2))
+
+        response = self.confirm_page(2, key)
+
+        self.assertEqual(response.status_code, 200)
+        page = BookPage.objects.get(book=self.book)
+        self.assertEqual((page.page_number, page.key), (2, key))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.page_count, 1)
+
+    def test_rejects_key_of_another_page(self):
+        self.put_object(self.book.get_pages_key(page_number=3))
+
+        response = self.confirm_page(2, self.book.get_pages_key(page_number=3))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BookPage.objects.exists())
+
+    def test_forged_page_key_cannot_be_deleted_through_manifest(self):
+        other_key = self.put_object(self.other.get_pages_key(page_number=1))
+
+        response = self.confirm_page(1, other_key)
+        self.assertEqual(response.status_code, 400)
+        self.client.delete(f'/api/books/{self.book.pk}/assets/')
+
+        self.assertTrue(storage_service.validate_object_exists(other_key))
+
+    def test_rejects_page_number_below_one(self):
+        key = self.put_object(self.book.get_pages_key(page_number=0))
+
+        response = self.confirm_page(0, key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BookPage.objects.exists())
+
+
+class SyncPageManifestTests(MediaRootMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Book', author=author)
+        self.admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    def sync(self):
+        call_command('sync_page_manifest', stdout=StringIO())
+
+    def test_rebuilds_manifest_from_listing(self):
+        self.put_object(self.book.get_pages_key(page_number=1))
+        self.put_object(self.book.get_pages_key(page_number=4))
+
+        self.sync()
+
+        self.assertEqual(list(self.book.pages.values_list('page_number', flat=True)), [1, 4])
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.page_count, self.book.has_pages), (2, True))
+
+    @override_settings(CONTENT_ADDRESSED_ASSETS=True)
+    def test_keeps_blob_backed_pages_and_ref_counts(self):
+        key = self.put_object(self.book.get_pages_key(page_number=1))
+        response = self.client.post(f'/api/books/{self.book.pk}/assets/confirm-upload/', {
+            'asset_type': 'pages', 'page_number': 1, 'object_key': key
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        blob = AssetBlob.objects.get()
+
+        self.sync()
+
+        page = self.book.pages.get()
+        self.assertEqual(page.key, blob.key)
+        self.book.refresh_from_db()
+        self.assertTrue(self.book.has_pages)
+        self.assertEqual(AssetBlob.objects.get().ref_count, 1)
+        self.assertEqual(BookAsset.objects.count(), 1)
+
+    def test_failed_listing_leaves_manifests_alone(self):
+        self.put_object(self.book.get_pages_key(page_number=1))
+        self.sync()
+
+        with mock.patch('core.local_storage.os.scandir', side_effect=PermissionError('denied')):
+            with self.assertRaises(CommandError):
+                self.sync()
+
+        self.assertEqual(self.book.pages.count(), 1)
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.page_count, self.book.has_pages), (1, True))
+
+
+class AsyncAssetViewTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        author = Author.objects.create(name='Author')
+        self.book = Book.objects.create(title='Book', author=author)
+        self.other = Book.objects.create(title='Other', author=author)
+        admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        self.token = str(RefreshToken.for_user(admin).access_token)
+
+    async def confirm(self, **data):
+        request = AsyncRequestFactory().post(
+            f'/api/books/{self.book.pk}/assets/confirm-upload/', data,
+            content_type='application/json', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        return await async_views.confirm_upload(request, pk=self.book.pk)
+
+    async def test_rejects_other_books_key(self):
+        other_key = self.put_object(self.other.get_cover_key())
+
+        response = await self.confirm(asset_type='cover', object_key=other_key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(storage_service.validate_object_exists(other_key))
+
+    async def test_confirms_own_cover_key(self):
+        self.put_object(self.book.get_cover_key())
+
+        response = await self.confirm(asset_type='cover', object_key=self.book.get_cover_key())
+
+        self.assertEqual(response.status_code, 200)
+
+    async def test_rejects_forged_page_key(self):
+        other_key = self.put_object(self.other.get_pages_key(page_number=1))
+
+        response = await self.confirm(asset_type='pages', page_number=1, object_key=other_key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(await BookPage.objects.aexists())
+
+    async def test_rejects_page_number_below_one(self):
+        key = self.put_object(self.book.get_pages_key(page_number=0))
+
+        response = await self.confirm(asset_type='pages', page_number=0, object_key=key)
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_delete_assets_matches_sync_response(self):
+        key = self.put_object(self.book.get_pages_key(page_number=1))
+        response = await self.confirm(asset_type='pages', page_number=1, object_key=key)
+        self.assertEqual(response.status_code, 200)
+
+        request = AsyncRequestFactory().delete(
+            f'/api/books/{self.book.pk}/assets/', headers={'Authorization': f'Bearer {self.token}'}
+        )
+        response = await async_views.delete_assets(request, pk=self.book.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {
+            'message': 'Asset deletion completed',
+            'deleted_assets': ['pages: 1 files'],
+            'book_id': self.book.pk,
+        })
+        self.assertFalse(storage_service.validate_object_exists(key))
+        self.assertFalse(await BookPage.objects.aexists())
@@ -1,12 +1,21 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated, IsAdminUser, AllowAny, SAFE_METHODS
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.conf import settings
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetCursorPagination
+from core.response_cache import CachedResponseMixin
 from .models import Book, Author, Genre
-from .serializers import BookSerializer, AuthorSerializer, GenreSerializer
+from .assets import (
+    AssetRequestError, confirm_asset, confirm_response_data, finish_asset_deletion,
+    parse_confirm_request, plan_asset_deletion
+)
+from .filters import BookSearchFilter
+from .suggest import suggest_index
+from .serializers import BookSerializer, BookListSerializer, AuthorSerializer, GenreSerializer
 import logging
 
 # Import appropriate storage service based on configuration
@@ -17,14 +26,51 @@ else:
 
 logger = logging.getLogger(__name__)
 
-class BookViewSet(viewsets.ModelViewSet):
-    queryset = Book.objects.all().select_related('author').prefetch_related('genres').order_by('-created_at')
+class BookViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = Book.objects.all().select_related('author').prefetch_related('genres').order_by('-created_at', 'id')
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend, BookSearchFilter]
     filterset_fields = ['author', 'genres__id']
     search_fields = ['title', 'author__name', 'genres__name']
     
+    # Upper bound on entries accepted by the batch asset URL endpoint
+    BATCH_MAX_ITEMS = 200
+    
+    def get_serializer_class(self):
+        """Use the compact serializer for catalog listings."""
+        if self.action == 'list':
+            return BookListSerializer
+        return super().get_serializer_class()
+    
+    def get_queryset(self):
+        """Skip the genres prefetch when sparse fieldsets leave genres out."""
+        queryset = super().get_queryset()
+        # Sparse fieldsets only apply to reads (see SparseFieldsMixin)
+        fields = self.request.query_params.get('fields') if self.request and self.request.method in SAFE_METHODS else None
+        if fields and 'genres' not in {f.strip() for f in fields.split(',')}:
+            queryset = queryset.prefetch_related(None)
+        return queryset
+    
+    @action(detail=False, methods=['get'], url_path='suggest')
+    def suggest(self, request):
+        """Autocomplete titles, authors and genres from the in-memory prefix index."""
+        query = request.query_params.get('q', '').strip()
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'query': query,
+            'suggestions': suggest_index.suggest(query, limit=limit)
+        })
+    
     @action(detail=True, methods=['get'], url_path='assets/cover')
     def get_cover_url(self, request, pk=None):
         """Get signed URL for book cover."""
@@ -66,7 +112,10 @@ class BookViewSet(viewsets.ModelViewSet):
             return Response({
                 'url': signed_url,
                 'expires_in': 3600,  # 1 hour
-                'asset_type': 'model'
+                'asset_type': 'model',
+                # Empty until the background inspection has run
+                'stats': book.model_stats,
+                'needs_optimization': book.model_needs_optimization
             })
         except Exception as e:
             logger.error(f"Error generating model URL for book {pk}: {str(e)}")
@@ -88,13 +137,14 @@ class BookViewSet(viewsets.ModelViewSet):
         
         try:
             page_num = int(page_number)
-            if page_num < 1 or page_num > 100:  # Reasonable limit
+            page = book.pages.filter(page_number=page_num).first()
+            if page is None:
                 return Response(
-                    {'error': 'Page number must be between 1 and 100'}, 
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': f'Page {page_num} is not available for this book'}, 
+                    status=status.HTTP_404_NOT_FOUND
                 )
             
-            signed_url = book.get_page_url(page_number=page_num, signed=True)
+            signed_url = book.get_page_url(page=page, signed=True)
             return Response({
                 'url': signed_url,
                 'expires_in': 3600,  # 1 hour
@@ -113,6 +163,144 @@ class BookViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'], url_path='assets/pages')
+    def list_pages(self, request, pk=None):
+        """List the book's confirmed pages with signed URLs."""
+        book = get_object_or_404(Book, pk=pk)
+        
+        try:
+            pages = [
+                {
+                    'page_number': page.page_number,
+                    'url': book.get_page_url(page=page, signed=True),
+                    'size': page.size,
+                    'etag': page.etag,
+                }
+                for page in book.pages.all()
+            ]
+            return Response({
+                'book_id': book.id,
+                'page_count': len(pages),
+                'pages': pages,
+                'expires_in': 3600  # 1 hour
+            })
+        except Exception as e:
+            logger.error(f"Error listing pages for book {pk}: {str(e)}")
+            return Response(
+                {'error': 'Failed to generate asset URL'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    @action(detail=False, methods=['post'], url_path='assets/batch', permission_classes=[AllowAny])
+    def batch_asset_urls(self, request):
+        """Get signed URLs for many books and assets in a single request."""
+        if not isinstance(request.data, dict):
+            return Response(
+                {'error': 'Request body must be an object with an items list'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        items = request.data.get('items')
+        
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'items must be a non-empty list'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(items) > self.BATCH_MAX_ITEMS:
+            return Response(
+                {'error': f'A batch may contain at most {self.BATCH_MAX_ITEMS} items'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        book_ids = {
+            item['book_id'] for item in items
+            if isinstance(item, dict) and self._is_integer(item.get('book_id'))
+        }
+        
+        # One query for every book referenced by the batch (plus one for page manifests)
+        queryset = Book.objects.all()
+        if any(isinstance(item, dict) and item.get('asset_type') == 'pages' for item in items):
+            queryset = queryset.prefetch_related('pages')
+        books = queryset.in_bulk(book_ids)
+        
+        results = []
+        for item in items:
+            try:
+                results.append(self._resolve_batch_item(item, books))
+            except Exception as e:
+                logger.error(f"Error generating batch asset URL for {item}: {str(e)}")
+                results.append({
+                    'book_id': item.get('book_id') if isinstance(item, dict) else None,
+                    'error': 'Failed to generate asset URL'
+                })
+        
+        return Response({
+            'results': results,
+            'expires_in': 3600  # 1 hour
+        })
+    
+    def _resolve_batch_item(self, item, books):
+        """Resolve one (book_id, asset_type, page_range) batch entry to signed URLs."""
+        if not isinstance(item, dict):
+            return {'error': 'Each item must be an object'}
+        
+        book_id = item.get('book_id')
+        asset_type = item.get('asset_type')
+        result = {'book_id': book_id, 'asset_type': asset_type}
+        
+        if not self._is_integer(book_id):
+            result['error'] = 'Invalid book_id'
+            return result
+        
+        book = books.get(book_id)
+        if book is None:
+            result['error'] = 'Book not found'
+            return result
+        
+        if asset_type == 'cover':
+            if not book.has_cover:
+                result['error'] = 'No cover image available for this book'
+                return result
+            result['url'] = book.get_cover_url(signed=True)
+        elif asset_type == 'model':
+            if not book.has_model:
+                result['error'] = 'No 3D model available for this book'
+                return result
+            result['url'] = book.get_model_url(signed=True)
+        elif asset_type == 'pages':
+            if not book.has_pages:
+                result['error'] = 'No page textures available for this book'
+                return result
+            
+            page_range = item.get('page_range') or [1, 1]
+            if not (isinstance(page_range, list) and len(page_range) == 2
+                    and all(self._is_integer(number) for number in page_range)):
+                result['error'] = 'page_range must be [first, last]'
+                return result
+            first, last = page_range
+            
+            if first < 1 or first > last:
+                result['error'] = 'page_range must satisfy 1 <= first <= last'
+                return result
+            
+            # Only pages present in the manifest are signed
+            result['pages'] = [
+                {'page_number': page.page_number, 'url': book.get_page_url(page=page, signed=True)}
+                for page in book.pages.all()
+                if first <= page.page_number <= last
+            ]
+        else:
+            result['error'] = 'Invalid asset type'
+        
+        return result
+    
+    @staticmethod
+    def _is_integer(value):
+        # int() would silently truncate floats such as 1.9; bool is an int subclass
+        return isinstance(value, int) and not isinstance(value, bool)
+    
     @action(detail=True, methods=['post'], url_path='assets/upload/cover', permission_classes=[IsAdminUser])
     def upload_cover(self, request, pk=None):
         """Generate pre-signed POST URL for cover upload with enhanced validation."""
@@ -134,10 +322,10 @@ class BookViewSet(viewsets.ModelViewSet):
             max_size_mb = storage_service.get_max_size_for_asset_type('cover')
             
             presigned_post = storage_service.generate_presigned_post(
-                key=key,
-                content_type=content_type,
+                object_key=key,
+                file_type=content_type,
                 asset_type='cover',
-                max_size_mb=max_size_mb
+                max_file_size=max_size_mb * 1024 * 1024
             )
             
             return Response({
@@ -178,10 +366,10 @@ class BookViewSet(viewsets.ModelViewSet):
             max_size_mb = storage_service.get_max_size_for_asset_type('model')
             
             presigned_post = storage_service.generate_presigned_post(
-                key=key,
-                content_type=content_type,
+                object_key=key,
+                file_type=content_type,
                 asset_type='model',
-                max_size_mb=max_size_mb
+                max_file_size=max_size_mb * 1024 * 1024
             )
             
             return Response({
@@ -230,10 +418,10 @@ class BookViewSet(viewsets.ModelViewSet):
             max_size_mb = storage_service.get_max_size_for_asset_type('page')
             
             presigned_post = storage_service.generate_presigned_post(
-                key=key,
-                content_type=content_type,
+                object_key=key,
+                file_type=content_type,
                 asset_type='page',
-                max_size_mb=max_size_mb
+                max_file_size=max_size_mb * 1024 * 1024
             )
             
             return Response({
@@ -259,82 +447,180 @@ class BookViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=True, methods=['post'], url_path='assets/confirm-upload', permission_classes=[IsAdminUser])
-    def confirm_upload(self, request, pk=None):
-        """Confirm successful asset upload and update book flags."""
+    @action(detail=True, methods=['post'], url_path='assets/upload/model/multipart', permission_classes=[IsAdminUser])
+    def initiate_model_upload(self, request, pk=None):
+        """Start a resumable multipart upload for the book's 3D model."""
+        book = get_object_or_404(Book, pk=pk)
+        content_type = request.data.get('content_type', 'model/gltf-binary')
+        
+        if not storage_service.validate_content_type('model', content_type):
+            return Response(
+                {
+                    'error': 'Invalid content type for 3D model',
+                    'allowed_types': storage_service.CONTENT_TYPE_CONFIG['model']['allowed_types']
+                }, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        key = book.get_model_key()
+        upload_id = storage_service.create_multipart_upload(key, content_type)
+        if not upload_id:
+            return Response(
+                {'error': 'Failed to start multipart upload'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return Response({
+            'upload_id': upload_id,
+            'key': key,
+            'asset_type': 'model',
+            'content_type': content_type,
+            'part_size': storage_service.MULTIPART_PART_SIZE,
+            'min_part_size': storage_service.MULTIPART_MIN_PART_SIZE,
+            'max_parts': storage_service.MULTIPART_MAX_PARTS,
+            'max_size_mb': storage_service.get_max_size_for_asset_type('model')
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get', 'post'], url_path='assets/upload/model/multipart/parts', permission_classes=[IsAdminUser])
+    def model_upload_parts(self, request, pk=None):
+        """
+        POST presigns PUT URLs for many parts at once (``part_numbers`` or
+        ``part_count``); GET lists parts already uploaded so a client can resume.
+        """
         book = get_object_or_404(Book, pk=pk)
-        asset_type = request.data.get('asset_type')
-        object_key = request.data.get('object_key')
+        key = book.get_model_key()
+        params = request.data if request.method == 'POST' else request.query_params
+        upload_id = params.get('upload_id')
+        
+        if not upload_id:
+            return Response(
+                {'error': 'upload_id is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if request.method == 'GET':
+            parts = storage_service.list_parts(key, upload_id)
+            if parts is None:
+                return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response({'upload_id': upload_id, 'key': key, 'parts': parts})
+        
+        try:
+            if 'part_numbers' in params:
+                part_numbers = sorted({int(number) for number in params.get('part_numbers')})
+            else:
+                part_numbers = list(range(1, int(params.get('part_count', 1)) + 1))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'part_numbers must be a list of integers'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if asset_type not in ['cover', 'model', 'pages']:
+        max_parts = storage_service.MULTIPART_MAX_PARTS
+        if not part_numbers or part_numbers[0] < 1 or part_numbers[-1] > max_parts:
             return Response(
-                {'error': 'Invalid asset type'}, 
+                {'error': f'Part numbers must be between 1 and {max_parts}'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if not object_key:
+        urls = storage_service.generate_part_urls(key, upload_id, part_numbers)
+        if not urls:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'upload_id': upload_id,
+            'key': key,
+            'parts': [{'part_number': number, 'url': url} for number, url in urls.items()],
+            'expires_in': settings.SIGNED_URL_EXPIRATION
+        })
+    
+    @action(detail=True, methods=['post'], url_path='assets/upload/model/multipart/complete', permission_classes=[IsAdminUser])
+    def complete_model_upload(self, request, pk=None):
+        """Assemble uploaded parts into the model; confirm it with assets/confirm-upload afterwards."""
+        book = get_object_or_404(Book, pk=pk)
+        key = book.get_model_key()
+        upload_id = request.data.get('upload_id')
+        parts = request.data.get('parts')
+        
+        if not upload_id or not isinstance(parts, list) or not parts:
             return Response(
-                {'error': 'object_key is required'}, 
+                {'error': 'upload_id and a non-empty parts list are required'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         try:
-            # Validate object exists in S3 before updating database
-            if not storage_service.validate_object_exists(object_key):
-                return Response(
-                    {'error': 'Object not found in storage. Upload may have failed.'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            parts = [{'part_number': int(part['part_number']), 'etag': str(part['etag'])} for part in parts]
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {'error': 'Each part needs a part_number and etag'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        uploaded = storage_service.list_parts(key, upload_id)
+        if uploaded is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Checked before assembly: completing writes straight over the live
+        # model key, so an oversized result must never be produced
+        sizes = {part['part_number']: part['size'] for part in uploaded}
+        size = sum(sizes.get(part['part_number'], 0) for part in parts)
+        max_size = storage_service.get_max_size_for_asset_type('model') * 1024 * 1024
+        if size > max_size:
+            storage_service.abort_multipart_upload(key, upload_id)
+            return Response(
+                {'error': f'Model exceeds maximum size of {max_size // (1024 * 1024)} MB'}, 
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        
+        if not storage_service.complete_multipart_upload(key, upload_id, parts):
+            return Response(
+                {'error': 'Failed to complete multipart upload'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'message': 'Multipart upload completed',
+            'key': key,
+            'asset_type': 'model',
+            'size': size
+        })
+    
+    @action(detail=True, methods=['post'], url_path='assets/upload/model/multipart/abort', permission_classes=[IsAdminUser])
+    def abort_model_upload(self, request, pk=None):
+        """Abort a multipart model upload and discard its parts."""
+        book = get_object_or_404(Book, pk=pk)
+        upload_id = request.data.get('upload_id')
+        
+        if not upload_id:
+            return Response(
+                {'error': 'upload_id is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not storage_service.abort_multipart_upload(book.get_model_key(), upload_id):
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'message': 'Multipart upload aborted', 'upload_id': upload_id})
+    
+    @action(detail=True, methods=['post'], url_path='assets/confirm-upload', permission_classes=[IsAdminUser])
+    def confirm_upload(self, request, pk=None):
+        """Confirm successful asset upload and update book flags."""
+        book = get_object_or_404(Book, pk=pk)
+        
+        try:
+            asset_type, object_key, page_num = parse_confirm_request(book, request.data)
             
-            # Get object metadata for additional validation
+            # A single HEAD both proves existence and returns the metadata
             metadata = storage_service.get_object_metadata(object_key)
             if not metadata:
                 return Response(
-                    {'error': 'Unable to retrieve object metadata'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    {'error': 'Object not found in storage. Upload may have failed.'}, 
+                    status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Validate content type based on asset type
-            content_type = metadata.get('content_type', '')
-            updated_fields = []
-            
-            if asset_type == 'cover':
-                if not content_type.startswith('image/'):
-                    return Response(
-                        {'error': 'Invalid content type for cover image'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                book.has_cover = True
-                updated_fields.append('has_cover')
-            elif asset_type == 'model':
-                if content_type not in ['model/gltf-binary', 'application/octet-stream']:
-                    return Response(
-                        {'error': 'Invalid content type for 3D model'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                book.has_model = True
-                updated_fields.append('has_model')
-            elif asset_type == 'pages':
-                if not content_type.startswith('image/'):
-                    return Response(
-                        {'error': 'Invalid content type for page image'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                book.has_pages = True
-                updated_fields.append('has_pages')
-            
-            book.save(update_fields=updated_fields)
-            
-            return Response({
-                'message': f'{asset_type.title()} upload confirmed successfully',
-                'asset_type': asset_type,
-                'book_id': book.id,
-                'metadata': {
-                    'size': metadata.get('size'),
-                    'content_type': metadata.get('content_type'),
-                    'last_modified': metadata.get('last_modified')
-                }
-            })
+            confirm_asset(book, asset_type, object_key, metadata, page_num)
+            return Response(confirm_response_data(book, asset_type, metadata))
+        except AssetRequestError as e:
+            return Response({'error': e.message}, status=e.status_code)
         except Exception as e:
             logger.error(f"Error confirming upload for book {pk}: {str(e)}")
             return Response(
@@ -346,53 +632,14 @@ class BookViewSet(viewsets.ModelViewSet):
     def delete_assets(self, request, pk=None):
         """Delete all assets for a book."""
         book = get_object_or_404(Book, pk=pk)
-        deleted_assets = []
-        errors = []
         
         try:
-            # Delete assets from S3
-            if book.has_cover:
-                cover_key = book.get_cover_key()
-                if storage_service.delete_file(cover_key):
-                    deleted_assets.append(f'cover: {cover_key}')
-                    book.has_cover = False
-                else:
-                    errors.append(f'Failed to delete cover: {cover_key}')
-            
-            if book.has_model:
-                model_key = book.get_model_key()
-                if storage_service.delete_file(model_key):
-                    deleted_assets.append(f'model: {model_key}')
-                    book.has_model = False
-                else:
-                    errors.append(f'Failed to delete model: {model_key}')
-            
-            if book.has_pages:
-                # Delete all page assets (this is a simplified approach)
-                # In practice, you might want to track individual page numbers
-                pages_deleted = 0
-                for i in range(1, 101):  # Assuming max 100 pages
-                    page_key = book.get_pages_key(page_number=i)
-                    if storage_service.validate_object_exists(page_key):
-                        if storage_service.delete_file(page_key):
-                            pages_deleted += 1
-                        else:
-                            errors.append(f'Failed to delete page: {page_key}')
-                
-                if pages_deleted > 0:
-                    deleted_assets.append(f'pages: {pages_deleted} files')
-                    book.has_pages = False
-            
-            book.save()
-            
-            response_data = {
-                'message': 'Asset deletion completed',
-                'deleted_assets': deleted_assets,
-                'book_id': book.id
-            }
+            keys, page_keys = plan_asset_deletion(book)
+            # One batched storage call for every key the book actually has
+            result = storage_service.delete_many(list(keys)) if keys else {'deleted': [], 'errors': {}}
+            response_data = finish_asset_deletion(book, keys, page_keys, result['errors'])
             
-            if errors:
-                response_data['errors'] = errors
+            if 'errors' in response_data:
                 return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
             
             return Response(response_data)
@@ -404,12 +651,12 @@ class BookViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class AuthorViewSet(viewsets.ModelViewSet):
+class AuthorViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAuthenticated]
 
-class GenreViewSet(viewsets.ModelViewSet):
+class GenreViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = [IsAuthenticated]
\ No newline at end of file
@@ -0,0 +1,92 @@
+import asyncio
+import math
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .models import Hold
+
+def _error(message, status_code):
+    return JsonResponse({'error': message}, status=status_code)
+
+async def _get_user(request):
+    """Authenticate with the DRF authentication classes; return (user, error response)."""
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except APIException as e:
+        return None, _error(str(e.detail), e.status_code)
+
+    if not user or not user.is_authenticated:
+        return None, _error('Authentication credentials were not provided.', status.HTTP_401_UNAUTHORIZED)
+    return user, None
+
+async def _hold_state(pk, user):
+    # One query: the queue position is annotated rather than counted separately
+    hold = await Hold.with_positions(Hold.objects.filter(pk=pk, user=user)).afirst()
+    if hold is None:
+        return None
+    return {
+        'id': hold.pk,
+        'book': hold.book_id,
+        'status': hold.status,
+        'position': hold.position(),
+        'ready_at': hold.ready_at.isoformat() if hold.ready_at else None,
+        'expires_at': hold.expires_at.isoformat() if hold.expires_at else None,
+    }
+
+async def hold_wait(request, pk):
+    """
+    Long-poll one of the current user's holds.
+
+    Responds as soon as the hold's status or queue position differs from the
+    ``status``/``position`` query params the client last saw, or with the
+    unchanged state after ``timeout`` seconds (capped at
+    HOLD_LONG_POLL_TIMEOUT). The wait is a cheap primary-key lookup every
+    HOLD_LONG_POLL_INTERVAL seconds; under ASGI it holds no worker thread.
+
+    Long waits need an ASGI server (e.g. ``uvicorn core.asgi:application``).
+    Under WSGI (runserver, gunicorn sync workers) Django runs this view in a
+    worker thread for the whole wait, so the timeout is capped at
+    HOLD_LONG_POLL_WSGI_TIMEOUT instead.
+    """
+    if request.method != 'GET':
+        return _error(f'Method "{request.method}" not allowed.', status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user, error = await _get_user(request)
+    if error:
+        return error
+
+    max_timeout = getattr(settings, 'HOLD_LONG_POLL_TIMEOUT', 25)
+    if not isinstance(request, ASGIRequest):
+        max_timeout = min(max_timeout, getattr(settings, 'HOLD_LONG_POLL_WSGI_TIMEOUT', 0))
+    try:
+        timeout = float(request.GET.get('timeout', max_timeout))
+    except ValueError:
+        timeout = math.nan
+    # nan and inf would leave the loop without a reachable deadline
+    if not math.isfinite(timeout):
+        return _error('timeout must be a number', status.HTTP_400_BAD_REQUEST)
+    timeout = min(max(timeout, 0), max_timeout)
+    interval = getattr(settings, 'HOLD_LONG_POLL_INTERVAL', 1.0)
+    seen_status = request.GET.get('status')
+    seen_position = request.GET.get('position', '')
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        state = await _hold_state(pk, user)
+        if state is None:
+            return _error('Not found.', status.HTTP_404_NOT_FOUND)
+
+        changed = state['status'] != seen_status or str(state['position'] or '') != seen_position
+        if changed or loop.time() >= deadline:
+            return JsonResponse({**state, 'changed': changed})
+        await asyncio.sleep(min(interval, max(0, deadline - loop.time())))
@@ -0,0 +1,64 @@
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+class LoanFilter(BaseFilterBackend):
+    """
+    Scope loans to the requesting user and filter them by ``status``.
+
+    ``active`` and ``overdue`` list open loans by due date and are served by
+    the partial ``returned_at IS NULL`` indexes; ``history`` and the default
+    list newest first from the ``(user, -borrowed_at)`` index. Staff see
+    every user's loans, optionally narrowed with ``user``.
+    """
+    status_param = 'status'
+    user_param = 'user'
+    statuses = ('active', 'overdue', 'history')
+
+    def get_status(self, request):
+        value = request.query_params.get(self.status_param, '')
+        if value and value not in self.statuses:
+            raise ValidationError({self.status_param: f"Must be one of: {', '.join(self.statuses)}"})
+        return value
+
+    def filter_queryset(self, request, queryset, view):
+        if not request.user.is_staff:
+            queryset = queryset.filter(user=request.user)
+        elif request.query_params.get(self.user_param):
+            try:
+                queryset = queryset.filter(user_id=int(request.query_params[self.user_param]))
+            except ValueError:
+                raise ValidationError({self.user_param: 'Must be a user id'})
+
+        status = self.get_status(request)
+        if status == 'active':
+            return queryset.filter(returned_at__isnull=True)
+        if status == 'overdue':
+            return queryset.filter(returned_at__isnull=True, due_at__lt=timezone.now())
+        if status == 'history':
+            return queryset.filter(returned_at__isnull=False)
+        return queryset
+
+    def get_keyset_ordering(self, request, queryset, view):
+        """Open loans page by due date; everything else newest first."""
+        if self.get_status(request) in ('active', 'overdue'):
+            return ('due_at', 'id')
+        return ('-borrowed_at', '-id')
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.status_param,
+                'required': False,
+                'in': 'query',
+                'description': 'active (open loans), overdue (open and past due) or history (returned).',
+                'schema': {'type': 'string', 'enum': list(self.statuses)},
+            },
+            {
+                'name': self.user_param,
+                'required': False,
+                'in': 'query',
+                'description': "Staff only: list this user's loans.",
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_book_model_stats'),
+        ('circulation', '0003_holds'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['user', 'due_at', 'id'], name='borrow_open_user_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['due_at', 'id'], name='borrow_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrow',
+            index=models.Index(fields=['user', '-borrowed_at', '-id'], name='borrow_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circulation', '0004_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='borrow',
+            name='fine',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='borrow',
+            name='overdue_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
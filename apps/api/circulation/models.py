@@ -1,6 +1,12 @@
-from django.db import models, transaction
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.utils import timezone
 from catalog.models import Book
+from core.response_cache import invalidate
+from jobs.queue import enqueue
 
 class Borrow(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -8,25 +14,287 @@ class Borrow(models.Model):
     borrowed_at = models.DateTimeField(auto_now_add=True)
     due_at = models.DateTimeField()
     returned_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by the process_overdue command
+    overdue_since = models.DateTimeField(null=True, blank=True)
+    fine = models.DecimalField(max_digits=8, decimal_places=2, default=0)
 
     class Meta:
-        indexes = [models.Index(fields=['user', 'book', 'returned_at'])]
+        indexes = [
+            models.Index(fields=['user', 'book', 'returned_at']),
+            # Open loans only, so they stay small as the loan history grows
+            models.Index(fields=['user', 'due_at', 'id'], condition=models.Q(returned_at__isnull=True),
+                         name='borrow_open_user_due_idx'),
+            models.Index(fields=['due_at', 'id'], condition=models.Q(returned_at__isnull=True),
+                         name='borrow_open_due_idx'),
+            models.Index(fields=['user', '-borrowed_at', '-id'], name='borrow_user_recent_idx'),
+        ]
 
     @classmethod
     def borrow_book(cls, user, book, due_at):
         with transaction.atomic():
-            b = Book.objects.select_for_update().get(pk=book.pk)
-            if b.available_copies < 1:
+            # A copy held for this user was already taken out of inventory
+            if Hold.fulfil(user, [book.pk]):
+                return cls.objects.create(user=user, book=book, due_at=due_at)
+            # Decrement in a single conditional UPDATE instead of locking and
+            # rewriting the whole row; 0 rows means no copy was left
+            updated = Book.objects.filter(pk=book.pk, available_copies__gt=0).update(
+                available_copies=models.F('available_copies') - 1,
+                updated_at=timezone.now()
+            )
+            if not updated:
                 raise ValueError('Not available')
-            b.available_copies -= 1
-            b.save()
-            return cls.objects.create(user=user, book=b, due_at=due_at)
+            return cls.objects.create(user=user, book=book, due_at=due_at)
+
+    @classmethod
+    def borrow_books(cls, user, book_ids, due_at):
+        """
+        Borrow one copy of each book in a single short transaction.
+
+        Ready holds of the user are fulfilled first. The remaining books are
+        decremented with one conditional UPDATE (see take_copies) and loans
+        are inserted with one bulk_create, only for the books that actually
+        gave up a copy. Returns the created loans; books with no copy left
+        are skipped.
+        """
+        book_ids = list(dict.fromkeys(book_ids))
+        now = timezone.now()
+        with transaction.atomic():
+            held = Hold.fulfil(user, book_ids)
+            taken = take_copies([book_id for book_id in book_ids if book_id not in held], now)
+            borrows = cls.objects.bulk_create([
+                cls(user=user, book_id=book_id, due_at=due_at) for book_id in [*held, *taken]
+            ])
+            # bulk_create and update() bypass the post_save signal
+            invalidate(Book, taken)
+        return borrows
+
+    @classmethod
+    def return_books(cls, borrows):
+        """
+        Return many loans at once. Loans already returned are left untouched.
+
+        Returns the loans that were open; their copies are released with
+        release_copies.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            open_loans = list(cls.objects.select_for_update().filter(
+                pk__in=[borrow.pk for borrow in borrows], returned_at__isnull=True
+            ))
+            cls.objects.filter(pk__in=[loan.pk for loan in open_loans]).update(returned_at=now)
+            release_copies(Counter(loan.book_id for loan in open_loans), now)
+        for loan in open_loans:
+            loan.returned_at = now
+        return open_loans
 
     def return_book(self):
         if self.returned_at:
             return self
-        from django.utils import timezone
-        self.returned_at = timezone.now()
-        self.save(update_fields=['returned_at'])
-        Book.objects.filter(pk=self.book_id).update(available_copies=models.F('available_copies') + 1)
-        return self
\ No newline at end of file
+        now = timezone.now()
+        with transaction.atomic():
+            # Conditional so concurrent returns cannot release the copy twice
+            if not Borrow.objects.filter(pk=self.pk, returned_at__isnull=True).update(returned_at=now):
+                self.refresh_from_db(fields=['returned_at'])
+                return self
+            release_copies({self.book_id: 1}, now)
+        self.returned_at = now
+        return self
+
+class Hold(models.Model):
+    """A patron's place in the FIFO queue for a book with no copy available."""
+    WAITING = 'waiting'
+    READY = 'ready'
+    FULFILLED = 'fulfilled'
+    CANCELLED = 'cancelled'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (WAITING, 'Waiting'),
+        (READY, 'Ready for pickup'),
+        (FULFILLED, 'Fulfilled'),
+        (CANCELLED, 'Cancelled'),
+        (EXPIRED, 'Expired'),
+    ]
+    ACTIVE_STATUSES = [WAITING, READY]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='holds')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=WAITING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a copy is set aside; the hold must be borrowed before expires_at
+    ready_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id} {self.book_id} ({self.status})"
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [models.Index(fields=['book', 'status', 'created_at'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'book'],
+                condition=models.Q(status__in=['waiting', 'ready']),
+                name='unique_active_hold'
+            ),
+        ]
+
+    @classmethod
+    def place(cls, user, book):
+        """
+        Join the queue for a book. If a copy is on the shelf and nobody is
+        ahead, it is set aside immediately and the hold is returned ready.
+        Raises ValueError if the user already has an active hold on the book.
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                hold = cls.objects.create(user=user, book=book)
+                serve_waiting_holds(book.pk, now)
+        except IntegrityError:
+            raise ValueError('Already on hold')
+        hold.refresh_from_db()
+        return hold
+
+    @classmethod
+    def fulfil(cls, user, book_ids):
+        """Mark the user's unexpired ready holds on these books fulfilled; return their book ids."""
+        now = timezone.now()
+        holds = cls.objects.filter(user=user, book_id__in=book_ids, status=cls.READY, expires_at__gt=now)
+        book_ids = list(holds.select_for_update().values_list('book_id', flat=True))
+        if book_ids:
+            holds.filter(book_id__in=book_ids).update(status=cls.FULFILLED, closed_at=now)
+        return book_ids
+
+    def position(self):
+        """1-based place in the queue while waiting, otherwise None."""
+        if self.status != self.WAITING:
+            return None
+        if hasattr(self, 'queue_position'):
+            return self.queue_position
+        return Hold.objects.filter(book_id=self.book_id, status=self.WAITING).filter(
+            models.Q(created_at__lt=self.created_at) | models.Q(created_at=self.created_at, id__lt=self.id)
+        ).count() + 1
+
+    @classmethod
+    def with_positions(cls, queryset):
+        """
+        Annotate ``queue_position`` so listing many holds does not run one
+        COUNT per hold; position() uses the annotation when present.
+        """
+        ahead = cls.objects.filter(book=models.OuterRef('book'), status=cls.WAITING).filter(
+            models.Q(created_at__lt=models.OuterRef('created_at'))
+            | models.Q(created_at=models.OuterRef('created_at'), id__lt=models.OuterRef('id'))
+        ).order_by().values('book').annotate(count=models.Count('pk')).values('count')
+        return queryset.annotate(queue_position=models.Case(
+            models.When(status=cls.WAITING, then=Coalesce(models.Subquery(ahead), 0) + 1),
+            default=None,
+            output_field=models.IntegerField()
+        ))
+
+    def close(self, status):
+        """
+        Cancel or expire an active hold. A copy set aside for it passes to
+        the next hold in the queue, or back to the shelf. Returns False if
+        the hold was no longer active (or, when expiring, not yet due).
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            hold = Hold.objects.select_for_update().get(pk=self.pk)
+            if hold.status not in self.ACTIVE_STATUSES:
+                return False
+            if status == self.EXPIRED and (hold.status != self.READY or hold.expires_at > now):
+                return False
+
+            was_ready = hold.status == self.READY
+            Hold.objects.filter(pk=self.pk).update(status=status, closed_at=now)
+            if was_ready:
+                release_copies({hold.book_id: 1}, now)
+        self.refresh_from_db()
+        return True
+
+def _set_aside(holds, now):
+    expires_at = now + timedelta(hours=getattr(settings, 'HOLD_PICKUP_HOURS', 48))
+    Hold.objects.filter(pk__in=[hold.pk for hold in holds]).update(
+        status=Hold.READY, ready_at=now, expires_at=expires_at
+    )
+    for hold in holds:
+        # Passes the copy on if it is not borrowed in time
+        enqueue('circulation.expire_hold', delay=(expires_at - now).total_seconds(), hold_id=hold.pk)
+
+def take_copies(book_ids, now):
+    """
+    Take one copy off the shelf for each book that still has one.
+
+    The decrement is conditional on ``available_copies > 0`` in the UPDATE
+    itself, which stays correct on SQLite where SELECT ... FOR UPDATE is a
+    no-op. Returns the ids of the books that were decremented, read back with
+    RETURNING where the backend supports it, otherwise with one conditional
+    UPDATE per book. Runs inside the caller's transaction.
+    """
+    if not book_ids:
+        return []
+
+    if connection.vendor == 'postgresql' or (
+        connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+    ):
+        quote = connection.ops.quote_name
+        opts = Book._meta
+        copies = quote(opts.get_field('available_copies').column)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {quote(opts.db_table)} SET {copies} = {copies} - 1, "
+                f"{quote(opts.get_field('updated_at').column)} = %s "
+                f"WHERE {quote(opts.pk.column)} IN ({', '.join(['%s'] * len(book_ids))}) AND {copies} > 0 "
+                f"RETURNING {quote(opts.pk.column)}",
+                [connection.ops.adapt_datetimefield_value(now), *book_ids]
+            )
+            taken = {row[0] for row in cursor.fetchall()}
+        return [book_id for book_id in book_ids if book_id in taken]
+
+    return [
+        book_id for book_id in book_ids
+        if Book.objects.filter(pk=book_id, available_copies__gt=0).update(
+            available_copies=models.F('available_copies') - 1,
+            updated_at=now
+        )
+    ]
+
+def release_copies(counts, now):
+    """
+    Give copies back to their books, serving the hold queue first.
+
+    ``counts`` maps book id to the number of copies released. Each copy goes
+    to the oldest waiting hold on its book, which becomes ready for pickup;
+    the rest return to available_copies with one UPDATE per distinct count.
+    Runs inside the caller's transaction.
+    """
+    remaining = {book_id: count for book_id, count in counts.items() if count}
+    queued = Hold.objects.filter(book_id__in=remaining, status=Hold.WAITING)
+    # Usually no book has a queue, so this is the only hold query
+    for book_id in set(queued.values_list('book_id', flat=True)):
+        holds = list(queued.select_for_update().filter(book_id=book_id)[:remaining[book_id]])
+        _set_aside(holds, now)
+        remaining[book_id] -= len(holds)
+
+    books_by_count = {}
+    for book_id, count in remaining.items():
+        books_by_count.setdefault(count, []).append(book_id)
+    for count, book_ids in books_by_count.items():
+        Book.objects.filter(pk__in=book_ids).update(
+            available_copies=models.F('available_copies') + count,
+            updated_at=now
+        )
+    invalidate(Book, list(counts))
+
+def serve_waiting_holds(book_id, now):
+    """Set aside shelf copies of a book for its oldest waiting holds."""
+    available = Book.objects.filter(pk=book_id).values_list('available_copies', flat=True).first() or 0
+    holds = list(Hold.objects.select_for_update().filter(book_id=book_id, status=Hold.WAITING)[:available])
+    # Conditional, so copies borrowed in the meantime are never double-assigned
+    if holds and Book.objects.filter(pk=book_id, available_copies__gte=len(holds)).update(
+        available_copies=models.F('available_copies') - len(holds),
+        updated_at=now
+    ):
+        _set_aside(holds, now)
+        invalidate(Book, [book_id])
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from catalog.models import Book
+from core.response_cache import invalidate
+from .models import Borrow
+
+@receiver(post_save, sender=Borrow)
+def invalidate_borrowed_book(sender, instance, **kwargs):
+    # Borrowing and returning change the book's available_copies
+    invalidate(Book, [instance.book_id])
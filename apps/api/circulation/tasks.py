@@ -0,0 +1,9 @@
+from jobs.queue import task
+from .models import Hold
+
+@task('circulation.expire_hold')
+def expire_hold(hold_id):
+    """Expire a ready hold that was not borrowed in time, passing its copy on."""
+    hold = Hold.objects.filter(pk=hold_id, status=Hold.READY).first()
+    if hold is not None:
+        hold.close(Hold.EXPIRED)
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import time
+from unittest import mock, skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from catalog.models import Author, Book
+from users.models import User
+from .async_views import hold_wait
+from .models import Borrow, Hold, take_copies
 
-# Create your tests here.
+
+class BulkBorrowTests(APITestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author')
+        self.user = User.objects.create_user('patron', password='pw')
+        self.client.force_authenticate(self.user)
+
+    def make_book(self, copies):
+        return Book.objects.create(title='Book', author=self.author, total_copies=copies, available_copies=copies)
+
+    def test_borrows_available_books_and_skips_the_rest(self):
+        available = self.make_book(2)
+        empty = self.make_book(0)
+
+        response = self.client.post('/api/borrows/borrow/bulk/', {
+            'book_ids': [available.pk, empty.pk, 999999]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['borrowed', 'unavailable', 'not_found'])
+        available.refresh_from_db()
+        empty.refresh_from_db()
+        self.assertEqual((available.available_copies, empty.available_copies), (1, 0))
+        self.assertEqual(Borrow.objects.get().book_id, available.pk)
+
+    def test_last_copy_is_lent_once(self):
+        book = self.make_book(1)
+        other = User.objects.create_user('other', password='pw')
+        due = timezone.now() + timedelta(days=14)
+
+        first = Borrow.borrow_books(self.user, [book.pk], due)
+        second = Borrow.borrow_books(other, [book.pk], due)
+
+        self.assertEqual((len(first), len(second)), (1, 0))
+        book.refresh_from_db()
+        self.assertEqual(book.available_copies, 0)
+        self.assertEqual(Borrow.objects.count(), 1)
+
+    def test_only_decremented_books_get_loans(self):
+        book = self.make_book(1)
+        empty = self.make_book(0)
+
+        self.assertEqual(take_copies([book.pk, empty.pk], timezone.now()), [book.pk])
+        self.assertEqual(take_copies([book.pk], timezone.now()), [])
+        book.refresh_from_db()
+        self.assertEqual(book.available_copies, 0)
+
+    def test_take_copies_without_returning_support(self):
+        book = self.make_book(1)
+        empty = self.make_book(0)
+
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            self.assertEqual(take_copies([book.pk, empty.pk], timezone.now()), [book.pk])
+            self.assertEqual(take_copies([book.pk], timezone.now()), [])
+
+    def test_invalidates_books_after_commit(self):
+        book = self.make_book(1)
+
+        with mock.patch('core.response_cache._bump_versions') as bump:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                Borrow.borrow_books(self.user, [book.pk], timezone.now())
+            bump.assert_not_called()
+            for callback in callbacks:
+                callback()
+        bump.assert_called_once_with(Book, [book.pk])
+
+
+class SingleBorrowTests(APITestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='A'),
+                                        total_copies=1, available_copies=1)
+        self.user = User.objects.create_user('reader', password='pw')
+
+    def test_decrements_without_rewriting_the_row(self):
+        stale = Book.objects.get(pk=self.book.pk)
+        Book.objects.filter(pk=self.book.pk).update(title='Renamed')
+
+        Borrow.borrow_book(self.user, stale, timezone.now())
+
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.title, self.book.available_copies), ('Renamed', 0))
+
+    def test_last_copy_is_lent_once_through_the_api(self):
+        other = User.objects.create_user('other', password='pw')
+
+        self.client.force_authenticate(self.user)
+        first = self.client.post('/api/borrows/borrow/', {'book_id': self.book.pk}, format='json')
+        self.client.force_authenticate(other)
+        second = self.client.post('/api/borrows/borrow/', {'book_id': self.book.pk}, format='json')
+
+        self.assertEqual((first.status_code, second.status_code), (201, 409))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+        self.assertEqual(Borrow.objects.count(), 1)
+
+    def test_unavailable_book_is_refused(self):
+        book = Book.objects.create(title='Book', author=Author.objects.create(name='A'), available_copies=0)
+        user = User.objects.create_user('patron', password='pw')
+
+        with self.assertRaises(ValueError):
+            Borrow.borrow_book(user, book, timezone.now())
+        book.refresh_from_db()
+        self.assertEqual(book.available_copies, 0)
+
+
+class ProcessOverdueTests(APITestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name='Author')
+        self.user = User.objects.create_user('patron', password='pw')
+        self.now = timezone.now()
+
+    def loan(self, days_late, **kwargs):
+        book = Book.objects.create(title='Book', author=self.author)
+        return Borrow.objects.create(user=self.user, book=book, due_at=self.now - timedelta(days=days_late), **kwargs)
+
+    def run_command(self):
+        out = StringIO()
+        call_command('process_overdue', batch_size=2, stdout=out)
+        return out.getvalue()
+
+    @override_settings(OVERDUE_FINE_PER_DAY='0.25', OVERDUE_FINE_MAX='1.00')
+    def test_charges_per_started_day_up_to_the_cap(self):
+        loans = [self.loan(0.5), self.loan(1.5), self.loan(3.9), self.loan(30)]
+        on_time = Borrow.objects.create(user=self.user, book=loans[0].book, due_at=self.now + timedelta(days=1))
+
+        self.run_command()
+
+        fines = [Borrow.objects.get(pk=loan.pk).fine for loan in loans]
+        self.assertEqual(fines, [Decimal('0.25'), Decimal('0.50'), Decimal('1.00'), Decimal('1.00')])
+        self.assertTrue(all(Borrow.objects.get(pk=loan.pk).overdue_since for loan in loans))
+        on_time.refresh_from_db()
+        self.assertIsNone(on_time.overdue_since)
+
+    @override_settings(OVERDUE_FINE_PER_DAY='0.25', OVERDUE_FINE_MAX='1.00')
+    def test_capped_loans_are_not_rescanned(self):
+        capped = self.loan(30)
+        self.loan(1.5)
+        self.run_command()
+        overdue_since = Borrow.objects.get(pk=capped.pk).overdue_since
+
+        output = self.run_command()
+
+        self.assertIn('Updated 0 loans', output)
+        self.assertIn('scanned 1 uncapped', output)
+        self.assertEqual(Borrow.objects.get(pk=capped.pk).overdue_since, overdue_since)
+
+    def test_patrons_cannot_clear_their_fine(self):
+        loan = self.loan(5, fine=Decimal('1.25'), overdue_since=self.now)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.patch(f'/api/borrows/{loan.pk}/', {'fine': '0.00', 'overdue_since': None},
+                                     format='json')
+
+        self.assertEqual(response.status_code, 200)
+        loan.refresh_from_db()
+        self.assertEqual((loan.fine, loan.overdue_since), (Decimal('1.25'), self.now))
+
+    def test_returned_loans_are_ignored(self):
+        loan = self.loan(5, returned_at=self.now)
+
+        self.run_command()
+
+        loan.refresh_from_db()
+        self.assertEqual(loan.fine, 0)
+
+
+class HoldQueueTests(APITestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'),
+                                        total_copies=1, available_copies=0)
+        self.users = [User.objects.create_user(f'patron{number}', password='pw') for number in range(3)]
+
+    def test_returned_copy_goes_to_the_oldest_waiting_hold(self):
+        lender = User.objects.create_user('lender', password='pw')
+        loan = Borrow.objects.create(user=lender, book=self.book, due_at=timezone.now())
+        holds = [Hold.place(user, self.book) for user in self.users]
+        self.assertEqual([hold.position() for hold in holds], [1, 2, 3])
+
+        loan.return_book()
+
+        for hold in holds:
+            hold.refresh_from_db()
+        self.assertEqual([hold.status for hold in holds], [Hold.READY, Hold.WAITING, Hold.WAITING])
+        self.assertEqual([hold.position() for hold in holds], [None, 1, 2])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+
+    def test_ready_hold_is_fulfilled_by_borrowing(self):
+        self.book.available_copies = 1
+        self.book.save()
+        hold = Hold.place(self.users[0], self.book)
+        self.assertEqual(hold.status, Hold.READY)
+
+        Borrow.borrow_book(self.users[0], self.book, timezone.now())
+        with self.assertRaises(ValueError):
+            Borrow.borrow_book(self.users[1], self.book, timezone.now())
+
+        hold.refresh_from_db()
+        self.assertEqual(hold.status, Hold.FULFILLED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 0)
+
+    def test_listing_positions_does_not_query_per_hold(self):
+        user = self.users[0]
+        for number in range(5):
+            book = Book.objects.create(title=f'Book {number}', author=self.book.author, available_copies=0)
+            Hold.place(self.users[1], book)
+            Hold.place(user, book)
+        self.client.force_authenticate(user)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/holds/')
+
+        self.assertEqual([hold['position'] for hold in response.data], [2] * 5)
+
+
+class LoanListTests(APITestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Author')
+        self.user = User.objects.create_user('patron', password='pw')
+        self.other = User.objects.create_user('other', password='pw')
+        now = timezone.now()
+
+        def loan(user, due_in_days, **kwargs):
+            book = Book.objects.create(title='Book', author=author)
+            return Borrow.objects.create(user=user, book=book, due_at=now + timedelta(days=due_in_days), **kwargs)
+
+        self.due_later = loan(self.user, 7)
+        self.overdue = loan(self.user, -2)
+        self.due_soon = loan(self.user, 1)
+        self.returned = loan(self.user, -10, returned_at=now)
+        self.others = loan(self.other, -3)
+        self.client.force_authenticate(self.user)
+
+    def ids(self, **params):
+        response = self.client.get('/api/borrows/', params)
+        self.assertEqual(response.status_code, 200)
+        return [loan['id'] for loan in response.data['results']]
+
+    def test_patrons_see_only_their_own_loans(self):
+        self.assertEqual(self.ids(), [self.returned.pk, self.due_soon.pk, self.overdue.pk, self.due_later.pk])
+        self.assertEqual(self.ids(user=self.other.pk), self.ids())
+        self.assertEqual(self.client.get(f'/api/borrows/{self.others.pk}/').status_code, 404)
+
+    def test_status_filters(self):
+        self.assertEqual(self.ids(status='active'), [self.overdue.pk, self.due_soon.pk, self.due_later.pk])
+        self.assertEqual(self.ids(status='overdue'), [self.overdue.pk])
+        self.assertEqual(self.ids(status='history'), [self.returned.pk])
+        self.assertEqual(self.client.get('/api/borrows/', {'status': 'lost'}).status_code, 400)
+
+    def test_active_loans_page_by_due_date(self):
+        ids, url = [], '/api/borrows/?status=active&page_size=2'
+        while url:
+            response = self.client.get(url)
+            ids.extend(loan['id'] for loan in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(ids, [self.overdue.pk, self.due_soon.pk, self.due_later.pk])
+
+    def test_staff_can_list_any_users_loans(self):
+        self.client.force_authenticate(User.objects.create_user('staff', password='pw', is_staff=True))
+
+        self.assertEqual(len(self.ids()), 5)
+        self.assertEqual(self.ids(user=self.other.pk, status='overdue'), [self.others.pk])
+        self.assertEqual(self.client.get('/api/borrows/', {'user': 'me'}).status_code, 400)
+
+    @skipUnless(connection.vendor == 'sqlite', 'small tables are seq-scanned elsewhere')
+    def test_open_loans_use_the_partial_index(self):
+        queryset = Borrow.objects.filter(user=self.user, returned_at__isnull=True).order_by('due_at', 'id')
+
+        self.assertIn('borrow_open_user_due_idx', queryset.explain())
+
+
+@override_settings(HOLD_LONG_POLL_INTERVAL=0.05)
+class HoldWaitTests(TestCase):
+    def setUp(self):
+        book = Book.objects.create(title='Book', author=Author.objects.create(name='Author'), available_copies=0)
+        user = User.objects.create_user('patron', password='pw')
+        self.hold = Hold.place(user, book)
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.path = f'/api/holds/{self.hold.pk}/wait/'
+        self.query = {'status': Hold.WAITING, 'position': '1', 'timeout': '10'}
+
+    async def test_reports_change_immediately(self):
+        request = AsyncRequestFactory().get(self.path, {'status': Hold.READY},
+                                            headers={'Authorization': f'Bearer {self.token}'})
+
+        response = await hold_wait(request, pk=self.hold.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'"changed": true', response.content)
+
+    @override_settings(HOLD_LONG_POLL_TIMEOUT=0.2)
+    async def test_waits_under_asgi(self):
+        request = AsyncRequestFactory().get(self.path, self.query, headers={'Authorization': f'Bearer {self.token}'})
+
+        started = time.monotonic()
+        response = await hold_wait(request, pk=self.hold.pk)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertIn(b'"changed": false', response.content)
+
+    @override_settings(HOLD_LONG_POLL_TIMEOUT=0.2)
+    async def test_rejects_timeouts_that_are_not_finite(self):
+        for timeout in ('nan', 'inf', '-inf', 'soon'):
+            request = AsyncRequestFactory().get(self.path, {**self.query, 'timeout': timeout},
+                                                headers={'Authorization': f'Bearer {self.token}'})
+
+            response = await asyncio.wait_for(hold_wait(request, pk=self.hold.pk), 1)
+
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(HOLD_LONG_POLL_TIMEOUT=0.2)
+    async def test_negative_timeout_answers_immediately(self):
+        request = AsyncRequestFactory().get(self.path, {**self.query, 'timeout': '-5'},
+                                            headers={'Authorization': f'Bearer {self.token}'})
+
+        response = await asyncio.wait_for(hold_wait(request, pk=self.hold.pk), 1)
+
+        self.assertIn(b'"changed": false', response.content)
+
+    @override_settings(HOLD_LONG_POLL_WSGI_TIMEOUT=0)
+    async def test_does_not_hold_a_wsgi_worker(self):
+        request = RequestFactory().get(self.path, self.query, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+        started = time.monotonic()
+        response = await hold_wait(request, pk=self.hold.pk)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIn(b'"changed": false', response.content)
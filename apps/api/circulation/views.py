@@ -1,34 +1,165 @@
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import timedelta
-from .models import Borrow
+from core.pagination import KeysetCursorPagination
+from .filters import LoanFilter
+from .models import Borrow, Hold
 from catalog.models import Book
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import ModelSerializer, SerializerMethodField
 
 class BorrowSerializer(ModelSerializer):
     class Meta:
         model = Borrow
         fields = '__all__'
+        # Maintained by the process_overdue command only
+        read_only_fields = ['overdue_since', 'fine']
+
+class HoldSerializer(ModelSerializer):
+    position = SerializerMethodField()
+
+    class Meta:
+        model = Hold
+        fields = ['id', 'user', 'book', 'status', 'position', 'created_at', 'ready_at', 'expires_at', 'closed_at']
+        read_only_fields = fields
+
+    def get_position(self, obj):
+        return obj.position()
+
+def _id_list(value):
+    """Parse a list of integer ids, or return None if it is not one."""
+    if not isinstance(value, list) or not value:
+        return None
+    try:
+        return [int(item) for item in value]
+    except (TypeError, ValueError):
+        return None
 
 class BorrowViewSet(viewsets.ModelViewSet):
     queryset = Borrow.objects.select_related('book', 'user').all()
     serializer_class = BorrowSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    filter_backends = [LoanFilter]
+
+    # Upper bound on books or loans per bulk request
+    BULK_MAX_ITEMS = 100
 
     @action(detail=False, methods=['post'])
     def borrow(self, request):
-        book_id = request.data.get('book_id')
+        book = get_object_or_404(Book.objects.only('pk'), pk=request.data.get('book_id'))
         days = int(request.data.get('days', 14))
-        b = Book.objects.get(pk=book_id)
         due = timezone.now() + timedelta(days=days)
-        rec = Borrow.borrow_book(request.user, b, due)
+        try:
+            rec = Borrow.borrow_book(request.user, book, due)
+        except ValueError:
+            return Response({'error': 'Not available'}, status=status.HTTP_409_CONFLICT)
         return Response(self.get_serializer(rec).data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=['post'])
     def return_book(self, request, pk=None):
         rec = self.get_object()
         rec.return_book()
-        return Response(self.get_serializer(rec).data)
\ No newline at end of file
+        return Response(self.get_serializer(rec).data)
+
+    @action(detail=False, methods=['post'], url_path='borrow/bulk')
+    def bulk_borrow(self, request):
+        """Borrow one copy of each of up to BULK_MAX_ITEMS books, reporting each book's outcome."""
+        book_ids = _id_list(request.data.get('book_ids'))
+        if book_ids is None:
+            return Response(
+                {'error': 'book_ids must be a non-empty list of ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(book_ids) > self.BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'A bulk request may contain at most {self.BULK_MAX_ITEMS} books'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        days = int(request.data.get('days', 14))
+        due = timezone.now() + timedelta(days=days)
+        existing = set(Book.objects.filter(pk__in=book_ids).values_list('pk', flat=True))
+        borrows = {rec.book_id: rec for rec in Borrow.borrow_books(request.user, existing, due)}
+
+        results = []
+        for book_id in dict.fromkeys(book_ids):
+            if book_id in borrows:
+                results.append({'book_id': book_id, 'status': 'borrowed',
+                                'borrow': self.get_serializer(borrows[book_id]).data})
+            elif book_id in existing:
+                results.append({'book_id': book_id, 'status': 'unavailable', 'error': 'Not available'})
+            else:
+                results.append({'book_id': book_id, 'status': 'not_found', 'error': 'Book not found'})
+
+        return Response({
+            'results': results,
+            'borrowed': len(borrows),
+        }, status=status.HTTP_201_CREATED if borrows else status.HTTP_409_CONFLICT)
+
+    @action(detail=False, methods=['post'], url_path='return/bulk')
+    def bulk_return(self, request):
+        """Return up to BULK_MAX_ITEMS loans, reporting each loan's outcome."""
+        borrow_ids = _id_list(request.data.get('borrow_ids'))
+        if borrow_ids is None:
+            return Response(
+                {'error': 'borrow_ids must be a non-empty list of ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(borrow_ids) > self.BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'A bulk request may contain at most {self.BULK_MAX_ITEMS} loans'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        loans = Borrow.objects.filter(pk__in=borrow_ids)
+        if not request.user.is_staff:
+            # Patrons may only return their own loans
+            loans = loans.filter(user=request.user)
+        loans = loans.in_bulk()
+        returned = {rec.pk: rec for rec in Borrow.return_books(loans.values())}
+
+        results = []
+        for borrow_id in dict.fromkeys(borrow_ids):
+            if borrow_id in returned:
+                results.append({'borrow_id': borrow_id, 'status': 'returned',
+                                'borrow': self.get_serializer(returned[borrow_id]).data})
+            elif borrow_id in loans:
+                results.append({'borrow_id': borrow_id, 'status': 'already_returned',
+                                'error': 'Loan was already returned'})
+            else:
+                results.append({'borrow_id': borrow_id, 'status': 'not_found', 'error': 'Loan not found'})
+
+        return Response({
+            'results': results,
+            'returned': len(returned),
+        })
+
+class HoldViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    The current user's holds. A ready hold is fulfilled by borrowing the book
+    before ``expires_at``; ``/api/holds/{id}/wait/`` long-polls for changes.
+    """
+    serializer_class = HoldSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Hold.with_positions(Hold.objects.filter(user=self.request.user))
+
+    def create(self, request):
+        book = get_object_or_404(Book.objects.only('pk'), pk=request.data.get('book_id'))
+        try:
+            hold = Hold.place(request.user, book)
+        except ValueError:
+            return Response({'error': 'You already have an active hold on this book'}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(hold).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        hold = self.get_object()
+        if not hold.close(Hold.CANCELLED):
+            return Response({'error': 'Hold is no longer active'}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(hold).data)
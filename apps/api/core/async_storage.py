@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from django.conf import settings
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+class AsyncStorageService:
+    """
+    Asyncio facade over the configured storage service.
+
+    Blocking work is offloaded with ``asyncio.to_thread`` so the event loop
+    keeps serving other requests while waiting on disk or S3. Multi-key calls
+    fan out across threads, bounded by ASYNC_STORAGE_MAX_CONCURRENCY; the S3
+    service's pooled boto3 client is thread-safe.
+    """
+
+    def __init__(self, storage, max_concurrency: int = None):
+        self.storage = storage
+        self.max_concurrency = max_concurrency or getattr(settings, 'ASYNC_STORAGE_MAX_CONCURRENCY', 64)
+        self._semaphore = None
+
+    def __getattr__(self, name):
+        # Cheap, non-blocking helpers (key generation, validation, signing
+        # from the URL cache) are used directly from the wrapped service
+        if name == 'storage':
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
+    def _limit(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def get_object_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get object metadata without blocking the event loop."""
+        async with self._limit():
+            return await asyncio.to_thread(self.storage.get_object_metadata, key)
+
+    async def validate_object_exists(self, key: str) -> bool:
+        return await self.get_object_metadata(key) is not None
+
+    async def head_many(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get metadata for many objects concurrently; missing objects map to None."""
+        keys = list(dict.fromkeys(keys))
+        results = await asyncio.gather(*(self.get_object_metadata(key) for key in keys))
+        return dict(zip(keys, results))
+
+    async def exists_many(self, keys: List[str], prefix: str = None) -> Dict[str, bool]:
+        return await asyncio.to_thread(self.storage.exists_many, keys, prefix)
+
+    async def list_prefix(self, prefix: str, strict: bool = False) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.storage.list_prefix, prefix, strict)
+
+    async def delete_many(self, object_keys: List[str]) -> Dict[str, Any]:
+        """Delete many objects; the storage service batches (and on S3 parallelizes) the requests."""
+        return await asyncio.to_thread(self.storage.delete_many, object_keys)
+
+_services = {}
+
+def get_async_storage_service() -> AsyncStorageService:
+    """Return the async facade for the configured storage backend."""
+    if getattr(settings, 'USE_LOCAL_STORAGE', False):
+        from .local_storage import storage_service
+    else:
+        from .storage import storage_service
+
+    key = id(storage_service)
+    if key not in _services:
+        _services[key] = AsyncStorageService(storage_service)
+    return _services[key]
@@ -0,0 +1,77 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .response_cache import get_versions
+
+class ConditionalGetMixin:
+    """
+    Conditional GET support for model viewsets.
+
+    ``retrieve`` stamps responses with an ETag and Last-Modified derived from
+    ``version_field``, read with one narrow query. ``list`` is stamped with
+    the model's collection version from ``core.response_cache``, which
+    ``invalidate()`` bumps on every write, so it costs a cache read rather
+    than a scan of the collection. Either way a matching If-None-Match /
+    If-Modified-Since is answered with 304 without building the response body.
+    """
+    version_field = 'updated_at'
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self._version_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup values, as in DRF's get_object_or_404
+            raise Http404
+        last_modified = queryset.values_list(self.version_field, flat=True).first()
+        if last_modified is None:
+            # Let the regular lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+
+        return self._conditional(
+            request, [self.kwargs[lookup_url_kwarg]], last_modified,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def list(self, request, *args, **kwargs):
+        collection_version, _ = get_versions(self.get_queryset().model)
+
+        return self._conditional(
+            request, ['list', collection_version], None,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def _version_queryset(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).order_by()
+
+    def _conditional(self, request, version_parts, last_modified, build_response):
+        etag = self._make_etag(request, version_parts, last_modified)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            # Clients may store the response but must revalidate before reuse
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def _make_etag(self, request, version_parts, last_modified):
+        parts = [
+            self.basename or '',
+            *[str(part) for part in version_parts],
+            last_modified.isoformat() if last_modified else '',
+            # The body also depends on query params and the negotiated format
+            request.META.get('QUERY_STRING', ''),
+            request.META.get('HTTP_ACCEPT', ''),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'W/"{digest}"'
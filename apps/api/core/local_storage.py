@@ -1,16 +1,69 @@
 import os
 import logging
+import re
+import hashlib
+import json
 import shutil
+import tempfile
+from contextlib import contextmanager
 from django.conf import settings
 from django.core.files.storage import default_storage
 from django.urls import reverse
-from typing import Optional, Dict, Any
+from django.utils._os import safe_join
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
 from urllib.parse import urljoin
 import uuid
+from datetime import datetime, timezone
 from pathlib import Path
+from .url_signing import url_signer
 
 logger = logging.getLogger(__name__)
 
+class UploadTooLarge(Exception):
+    """Raised when an upload stream exceeds its size limit."""
+
+class AtomicFileWriter:
+    """
+    Write a file through a temporary file, hashing the data as it is written.
+    
+    Nothing is visible at the destination until commit(), which renames the
+    temporary file into place; abort() discards it. Only the current chunk is
+    ever held in memory.
+    """
+    
+    def __init__(self, file_path: str, temp_dir: str, max_size: int = None):
+        self.file_path = file_path
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=temp_dir, prefix='upload-')
+        self.file = os.fdopen(fd, 'wb')
+    
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise UploadTooLarge(f"Upload exceeds maximum size of {self.max_size} bytes")
+        self.sha256.update(chunk)
+        self.file.write(chunk)
+    
+    def commit(self) -> Dict[str, Any]:
+        try:
+            self.file.close()
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            os.replace(self.temp_path, self.file_path)
+        except BaseException:
+            self.abort()
+            raise
+        return {'size': self.size, 'sha256': self.sha256.hexdigest()}
+    
+    def abort(self) -> None:
+        self.file.close()
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
 class LocalStorageService:
     """Service for handling local file storage operations for 3D Library assets."""
     
@@ -34,13 +87,25 @@ class LocalStorageService:
         }
     }
     
+    # Bytes read from an upload stream per write
+    UPLOAD_CHUNK_SIZE = 64 * 1024
+    
+    # Multipart uploads follow the S3 limits so clients behave the same on both
+    # backends; parts are stored under .uploads/multipart/<upload_id>/
+    MULTIPART_PART_SIZE = 8 * 1024 * 1024
+    MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+    MULTIPART_MAX_PART_SIZE = 100 * 1024 * 1024
+    MULTIPART_MAX_PARTS = 10000
+    
     def __init__(self):
         self.media_root = settings.MEDIA_ROOT
         self.media_url = settings.MEDIA_URL
         self.folders = getattr(settings, 'ASSET_FOLDERS', {
             'covers': 'assets/covers/',
             'models': 'assets/models/',
-            'pages': 'assets/pages/'
+            'pages': 'assets/pages/',
+            'blobs': 'assets/blobs/',
+            'derived': 'assets/derived/'
         })
         
         # Ensure media directories exist
@@ -59,9 +124,10 @@ class LocalStorageService:
             return False
     
     def generate_signed_url(self, object_key: str, expiration: int = None) -> Optional[str]:
-        """Generate a public URL for the asset (no signing needed for local files)."""
+        """Generate an expiring HMAC-signed URL, verified by core.media.serve_media."""
         try:
-            return self.get_public_url(object_key)
+            expiration = expiration or settings.SIGNED_URL_EXPIRATION
+            return url_signer.sign(self.get_public_url(object_key), expiration)
         except Exception as e:
             logger.error(f"Error generating URL for {object_key}: {str(e)}")
             return None
@@ -81,26 +147,33 @@ class LocalStorageService:
         return is_valid
     
     def get_max_size_for_asset_type(self, asset_type: str) -> int:
-        """Get the maximum file size in bytes for the given asset type."""
+        """Get the maximum file size in MB for the given asset type (same unit as S3StorageService)."""
         if asset_type not in self.CONTENT_TYPE_CONFIG:
             logger.warning(f"Unknown asset type: {asset_type}, using default 10MB")
-            return 10 * 1024 * 1024  # 10MB default
+            return 10  # 10MB default
         
-        max_size_mb = self.CONTENT_TYPE_CONFIG[asset_type]['max_size_mb']
-        return max_size_mb * 1024 * 1024  # Convert to bytes
+        return self.CONTENT_TYPE_CONFIG[asset_type]['max_size_mb']
     
     def generate_presigned_post(self, object_key: str, file_type: str = None, 
                                asset_type: str = None, max_file_size: int = 100 * 1024 * 1024) -> Optional[Dict[str, Any]]:
-        """Generate presigned POST data for direct upload (simplified for local storage)."""
+        """Generate presigned POST data for direct upload to core.uploads.upload_asset.
+        
+        The key, content type and size limit are signed into the upload URL, so
+        the endpoint knows them before it reads any of the request body.
+        """
         try:
-            # For local storage, we return a simple upload endpoint
-            upload_url = reverse('upload_asset')  # You'll need to create this endpoint
+            content_type = file_type or 'application/octet-stream'
+            upload_url = url_signer.sign(reverse('upload_asset'), 3600, params={
+                'key': object_key,
+                'content_type': content_type,
+                'max_size': str(max_file_size),
+            })
             
             return {
                 'url': upload_url,
                 'fields': {
                     'key': object_key,
-                    'Content-Type': file_type or 'application/octet-stream',
+                    'Content-Type': content_type,
                     'asset_type': asset_type or 'unknown'
                 }
             }
@@ -108,6 +181,147 @@ class LocalStorageService:
             logger.error(f"Error generating presigned post for {object_key}: {str(e)}")
             return None
     
+    def _multipart_dir(self, upload_id: str) -> Optional[str]:
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id or ''):
+            return None
+        return os.path.join(self.media_root, '.uploads', 'multipart', upload_id)
+    
+    def _multipart_session(self, object_key: str, upload_id: str) -> Optional[str]:
+        """Return the directory of an open upload for object_key, or None."""
+        directory = self._multipart_dir(upload_id)
+        if directory is None:
+            return None
+        try:
+            with open(os.path.join(directory, 'upload.json')) as f:
+                session = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return directory if object_key is None or session.get('key') == object_key else None
+    
+    def _part_path(self, directory: str, part_number: int) -> str:
+        return os.path.join(directory, f'{part_number:05d}.part')
+    
+    def create_multipart_upload(self, object_key: str, content_type: str = None) -> Optional[str]:
+        """Start a multipart upload whose parts are assembled into object_key on completion."""
+        try:
+            upload_id = uuid.uuid4().hex
+            directory = self._multipart_dir(upload_id)
+            os.makedirs(directory)
+            with open(os.path.join(directory, 'upload.json'), 'w') as f:
+                json.dump({'key': object_key, 'content_type': content_type}, f)
+            return upload_id
+        except Exception as e:
+            logger.error(f"Error creating multipart upload for {object_key}: {str(e)}")
+            return None
+    
+    def generate_part_urls(self, object_key: str, upload_id: str, part_numbers: List[int],
+                           expiration: int = None) -> Dict[int, str]:
+        """Sign PUT URLs for parts, served by core.uploads.upload_part."""
+        if self._multipart_session(object_key, upload_id) is None:
+            return {}
+        
+        expiration = expiration or settings.SIGNED_URL_EXPIRATION
+        upload_url = reverse('upload_part')
+        return {
+            part_number: url_signer.sign(upload_url, expiration, params={
+                'upload_id': upload_id,
+                'part_number': str(part_number),
+                'max_size': str(self.MULTIPART_MAX_PART_SIZE),
+            })
+            for part_number in part_numbers
+        }
+    
+    def save_part(self, upload_id: str, part_number: int, chunks: Iterable[bytes],
+                  max_size: int = None) -> Optional[Dict[str, Any]]:
+        """Stream one part to disk, replacing any earlier attempt at the same part.
+        
+        Returns the part's number, etag and size, or None if the upload does not
+        exist. Raises UploadTooLarge when max_size is exceeded.
+        """
+        directory = self._multipart_session(None, upload_id)
+        if directory is None:
+            return None
+        
+        path = self._part_path(directory, part_number)
+        writer = AtomicFileWriter(path, directory, max_size)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+        
+        metadata = self._metadata_from_stat(path, os.stat(path))
+        return {'part_number': part_number, 'etag': metadata['etag'], 'size': metadata['size']}
+    
+    def list_parts(self, object_key: str, upload_id: str) -> Optional[List[Dict[str, Any]]]:
+        """List the parts already uploaded, so an interrupted upload can resume."""
+        directory = self._multipart_session(object_key, upload_id)
+        if directory is None:
+            return None
+        
+        parts = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                match = re.fullmatch(r'(\d{5})\.part', entry.name)
+                if match:
+                    metadata = self._metadata_from_stat(entry.path, entry.stat())
+                    parts.append({
+                        'part_number': int(match.group(1)),
+                        'etag': metadata['etag'],
+                        'size': metadata['size'],
+                    })
+        parts.sort(key=lambda part: part['part_number'])
+        return parts
+    
+    def complete_multipart_upload(self, object_key: str, upload_id: str, parts: List[Dict[str, Any]]) -> bool:
+        """Concatenate the listed parts into object_key and discard the upload.
+        
+        Parts are validated like S3 does: each must exist with a matching etag,
+        and all but the last must be at least MULTIPART_MIN_PART_SIZE.
+        """
+        directory = self._multipart_session(object_key, upload_id)
+        if directory is None or not parts:
+            logger.error(f"Multipart upload {upload_id} for {object_key} not found")
+            return False
+        
+        uploaded = {part['part_number']: part for part in self.list_parts(object_key, upload_id)}
+        ordered = sorted(parts, key=lambda part: part['part_number'])
+        for index, part in enumerate(ordered):
+            stored = uploaded.get(part['part_number'])
+            if stored is None or stored['etag'] != str(part.get('etag', '')).strip('"'):
+                logger.error(f"Invalid part {part['part_number']} for multipart upload {upload_id}")
+                return False
+            if index < len(ordered) - 1 and stored['size'] < self.MULTIPART_MIN_PART_SIZE:
+                logger.error(f"Part {part['part_number']} of multipart upload {upload_id} is too small")
+                return False
+        
+        try:
+            writer = self.open_upload(object_key)
+            try:
+                for part in ordered:
+                    with open(self._part_path(directory, part['part_number']), 'rb') as f:
+                        for chunk in iter(lambda: f.read(self.UPLOAD_CHUNK_SIZE), b''):
+                            writer.write(chunk)
+            except BaseException:
+                writer.abort()
+                raise
+            writer.commit()
+            shutil.rmtree(directory, ignore_errors=True)
+            return True
+        except Exception as e:
+            logger.error(f"Error completing multipart upload for {object_key}: {str(e)}")
+            return False
+    
+    def abort_multipart_upload(self, object_key: str, upload_id: str) -> bool:
+        """Abort a multipart upload and discard its parts."""
+        directory = self._multipart_session(object_key, upload_id)
+        if directory is None:
+            return False
+        shutil.rmtree(directory, ignore_errors=True)
+        return True
+    
     def validate_object_exists(self, key: str) -> bool:
         """Check if an object exists in local storage."""
         try:
@@ -129,41 +343,83 @@ class LocalStorageService:
             if not os.path.exists(file_path):
                 return None
             
-            stat = os.stat(file_path)
-            return {
-                'ContentLength': stat.st_size,
-                'LastModified': stat.st_mtime,
-                'ContentType': self._guess_content_type(file_path),
-                'ETag': f'"{hash(key)}"'  # Simple hash-based ETag
-            }
+            return self._metadata_from_stat(file_path, os.stat(file_path))
         except Exception as e:
             logger.error(f"Error getting metadata for {key}: {str(e)}")
             return None
     
+    def _metadata_from_stat(self, file_path: str, stat: os.stat_result) -> Dict[str, Any]:
+        """Build metadata with the same keys as S3StorageService.get_object_metadata."""
+        return {
+            'size': stat.st_size,
+            'content_type': self._guess_content_type(file_path),
+            'last_modified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            'etag': f'{stat.st_mtime_ns:x}-{stat.st_size:x}',
+        }
+    
     def _guess_content_type(self, file_path: str) -> str:
         """Guess content type based on file extension."""
         import mimetypes
         content_type, _ = mimetypes.guess_type(file_path)
         return content_type or 'application/octet-stream'
     
-    def upload_file(self, file_obj, object_key: str, content_type: str = None) -> bool:
+    def open_upload(self, object_key: str, max_size: int = None) -> 'AtomicFileWriter':
+        """Start writing an object through a temp file that is renamed into place on commit."""
+        file_path = safe_join(self.media_root, object_key)
+        # Temp files live on the same filesystem so the final rename is atomic
+        return AtomicFileWriter(file_path, os.path.join(self.media_root, '.uploads'), max_size)
+    
+    def save_stream(self, chunks: Iterable[bytes], object_key: str, max_size: int = None) -> Dict[str, Any]:
+        """Write an iterable of byte chunks to an object, enforcing max_size as data arrives.
+        
+        Returns the size and SHA-256 of the stored object; raises UploadTooLarge
+        (leaving any existing object untouched) when the limit is exceeded.
+        """
+        writer = self.open_upload(object_key, max_size)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+    
+    def read_object(self, key: str) -> Optional[bytes]:
+        """Read a (small) file into memory."""
+        try:
+            with open(os.path.join(self.media_root, key), 'rb') as f:
+                return f.read()
+        except Exception as e:
+            logger.error(f"Error reading {key}: {str(e)}")
+            return None
+    
+    def read_range(self, key: str, start: int, length: int) -> Optional[bytes]:
+        """Read ``length`` bytes of a file from ``start``."""
+        try:
+            with open(os.path.join(self.media_root, key), 'rb') as f:
+                f.seek(start)
+                return f.read(length)
+        except Exception as e:
+            logger.error(f"Error reading {key}: {str(e)}")
+            return None
+    
+    @contextmanager
+    def local_file(self, key: str) -> Iterator[str]:
+        """Yield the filesystem path of a stored file (matches the S3 backend's temp copy)."""
+        yield os.path.join(self.media_root, key)
+    
+    def upload_file(self, file_obj, object_key: str, content_type: str = None, max_size: int = None) -> bool:
         """Upload a file to local storage."""
         try:
-            file_path = os.path.join(self.media_root, object_key)
-            
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            # Write file
-            with open(file_path, 'wb') as f:
-                if hasattr(file_obj, 'read'):
-                    # File-like object
-                    shutil.copyfileobj(file_obj, f)
-                else:
-                    # Bytes
-                    f.write(file_obj)
+            if hasattr(file_obj, 'read'):
+                # File-like object, copied in fixed-size chunks
+                chunks = iter(lambda: file_obj.read(self.UPLOAD_CHUNK_SIZE), b'')
+            else:
+                # Bytes
+                chunks = [file_obj]
             
-            logger.info(f"Successfully uploaded file to {file_path}")
+            self.save_stream(chunks, object_key, max_size)
+            logger.info(f"Successfully uploaded file to {object_key}")
             return True
             
         except Exception as e:
@@ -187,23 +443,155 @@ class LocalStorageService:
             logger.error(f"Error deleting file {object_key}: {str(e)}")
             return False
     
+    def delete_many(self, object_keys: List[str]) -> Dict[str, Any]:
+        """Delete many files; missing files count as deleted, matching S3 semantics."""
+        result = {'deleted': [], 'errors': {}}
+        
+        for key in dict.fromkeys(object_keys):
+            try:
+                os.remove(os.path.join(self.media_root, key))
+                result['deleted'].append(key)
+            except FileNotFoundError:
+                result['deleted'].append(key)
+            except Exception as e:
+                logger.error(f"Error deleting file {key}: {str(e)}")
+                result['errors'][key] = str(e)
+        
+        logger.info(f"Deleted {len(result['deleted'])} files, {len(result['errors'])} failures")
+        return result
+    
+    def exists_many(self, keys: List[str], prefix: str = None) -> Dict[str, bool]:
+        """Check existence of many files with one directory scan per parent folder."""
+        names_by_dir = {}
+        result = {}
+        
+        for key in keys:
+            directory, name = os.path.split(key)
+            if directory not in names_by_dir:
+                names_by_dir[directory] = self._scan_file_names(directory)
+            result[key] = name in names_by_dir[directory]
+        
+        return result
+    
+    def head_many(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get metadata for many files; missing files map to None."""
+        return {key: self.get_object_metadata(key) for key in dict.fromkeys(keys)}
+    
+    def list_prefix(self, prefix: str, strict: bool = False) -> List[Dict[str, Any]]:
+        """List every file whose key starts with prefix, walking directories with os.scandir.
+        
+        Unreadable directories are logged and skipped, unless ``strict`` is
+        set, in which case the error is raised rather than returning a
+        partial listing.
+        """
+        objects = []
+        # Only the directory part of the prefix needs to be walked
+        start = os.path.join(self.media_root, prefix.rsplit('/', 1)[0]) if '/' in prefix else self.media_root
+        pending = [start]
+        
+        while pending:
+            directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error(f"Error listing {directory}: {str(e)}")
+                if strict:
+                    raise
+                continue
+            
+            for entry in entries:
+                key = os.path.relpath(entry.path, self.media_root).replace(os.sep, '/')
+                if entry.is_dir(follow_symlinks=False):
+                    if key.startswith(prefix) or prefix.startswith(f'{key}/'):
+                        pending.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and key.startswith(prefix):
+                    metadata = self._metadata_from_stat(entry.path, entry.stat())
+                    objects.append({
+                        'key': key,
+                        'size': metadata['size'],
+                        'last_modified': metadata['last_modified'],
+                        'etag': metadata['etag'],
+                    })
+        
+        objects.sort(key=lambda obj: obj['key'])
+        return objects
+    
+    def _scan_file_names(self, directory: str) -> set:
+        try:
+            with os.scandir(os.path.join(self.media_root, directory)) as entries:
+                return {entry.name for entry in entries if entry.is_file()}
+        except FileNotFoundError:
+            return set()
+    
+    def parse_page_key(self, key: str) -> Optional[Tuple[int, int]]:
+        """Return (book_id, page_number) for a page texture key, or None."""
+        match = re.match(rf"^{re.escape(self.folders.get('pages', ''))}book_(\d+)/page_(\d+)\.\w+$", key)
+        if not match:
+            return None
+        return int(match.group(1)), int(match.group(2))
+    
     def get_asset_key(self, asset_type: str, book_id: int, filename: str = None) -> str:
         """Generate a standardized asset key for local storage."""
         folder_map = {
             'cover': 'covers',
+            'covers': 'covers',
             'model': 'models',
             'models': 'models', 
-            'page': 'pages'
+            'page': 'pages',
+            'pages': 'pages'
         }
         
         folder = folder_map.get(asset_type, 'misc')
         folder_path = self.folders.get(folder, f'assets/{folder}/')
         
+        # Match the documented layout: book_{id}/cover.jpg, book_{id}/page_{n}.jpg
+        if folder == 'covers' and not filename:
+            filename = 'cover.jpg'
+        elif folder == 'pages' and filename and '.' not in filename:
+            filename = f'page_{filename}.jpg'
+        
         if filename:
             return f"{folder_path}book_{book_id}/{filename}"
         else:
             return f"{folder_path}book_{book_id}/"
     
+    def get_blob_key(self, sha256: str, extension: str = '') -> str:
+        """Generate the content-addressed key for a blob, fanned out by hash prefix."""
+        return f"{self.folders.get('blobs', 'assets/blobs/')}{sha256[:2]}/{sha256}{extension}"
+    
+    def get_derived_key(self, source_key: str, variant: str) -> str:
+        """Generate the key of a derivative (e.g. a thumbnail) of another file."""
+        base = os.path.splitext(source_key)[0].removeprefix('assets/')
+        return f"{self.folders.get('derived', 'assets/derived/')}{base}/{variant}"
+    
+    def is_blob_key(self, key: str) -> bool:
+        return key.startswith(self.folders.get('blobs', 'assets/blobs/'))
+    
+    def hash_object(self, key: str) -> Optional[str]:
+        """Compute the SHA-256 of a stored file, reading it in chunks."""
+        try:
+            digest = hashlib.sha256()
+            with open(os.path.join(self.media_root, key), 'rb') as f:
+                for chunk in iter(lambda: f.read(self.UPLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except Exception as e:
+            logger.error(f"Error hashing {key}: {str(e)}")
+            return None
+    
+    def copy_object(self, source_key: str, dest_key: str, content_type: str = None,
+                    cache_control: str = None) -> bool:
+        """Copy a file to a new key; content type and caching come from serve_media locally."""
+        try:
+            with open(os.path.join(self.media_root, source_key), 'rb') as f:
+                self.save_stream(iter(lambda: f.read(self.UPLOAD_CHUNK_SIZE), b''), dest_key)
+            return True
+        except Exception as e:
+            logger.error(f"Error copying {source_key} to {dest_key}: {str(e)}")
+            return False
+    
     def get_public_url(self, object_key: str) -> str:
         """Get the public URL for accessing the asset."""
         # Remove leading slash if present
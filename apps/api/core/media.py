@@ -0,0 +1,191 @@
+import mimetypes
+import os
+import re
+import stat
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+from urllib.parse import quote
+from .url_signing import url_signer
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class FileRange:
+    """
+    File-like view of ``length`` bytes of an open file starting at ``start``.
+
+    FileResponse streams it with bounded reads, while WSGI servers whose
+    ``wsgi.file_wrapper`` uses sendfile (gunicorn, uWSGI) send it zero-copy
+    from the current offset for Content-Length bytes.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+def parse_range(header: str, size: int):
+    """
+    Parse a single-range ``Range`` header into (start, end) inclusive.
+
+    Returns None when the header should be ignored (missing, malformed or
+    multi-range, which is answered with the full body) and raises ValueError
+    when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+def _etag(st: os.stat_result) -> str:
+    return quote_etag(f'{st.st_size:x}-{st.st_mtime_ns:x}')
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates
+
+def _is_fresh(request, etag: str, mtime: int) -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and mtime <= if_modified_since
+
+def _range_allowed(request, etag: str, mtime: int) -> bool:
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+def _accel_response(path: str, full_path: str, content_type: str) -> HttpResponse:
+    """Hand the transfer off to the front-end web server."""
+    header = settings.LOCAL_MEDIA_SENDFILE_HEADER
+    response = HttpResponse(content_type=content_type)
+    if header.lower() == 'x-accel-redirect':
+        prefix = getattr(settings, 'LOCAL_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response[header] = quote(f"{prefix.rstrip('/')}/{path}")
+    else:
+        response[header] = full_path
+    return response
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT for the local storage backend.
+
+    Links produced by LocalStorageService.generate_signed_url carry an expiry
+    and HMAC signature, which are checked here so they stop working once
+    expired. Unsigned requests are allowed unless LOCAL_MEDIA_REQUIRE_SIGNED_URLS
+    is set.
+
+    Files are streamed without buffering, honour single byte-range requests
+    (206) and answer conditional requests with 304. When
+    LOCAL_MEDIA_SENDFILE_HEADER is set, the transfer is delegated to the web
+    server via X-Accel-Redirect or X-Sendfile.
+    """
+    expires = request.GET.get(url_signer.expires_param)
+    signature = request.GET.get(url_signer.signature_param)
+
+    if expires or signature:
+        if not url_signer.verify(request.path, expires, signature):
+            return HttpResponseForbidden('Invalid or expired signature')
+    elif getattr(settings, 'LOCAL_MEDIA_REQUIRE_SIGNED_URLS', False):
+        return HttpResponseForbidden('Signed URL required')
+
+    # Dot-prefixed entries (such as in-progress uploads) are never served
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404('File not found')
+
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404('File not found')
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404('File not found')
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if getattr(settings, 'LOCAL_MEDIA_SENDFILE_HEADER', None):
+        return _accel_response(path, full_path, content_type)
+
+    size = st.st_size
+    mtime = int(st.st_mtime)
+    etag = _etag(st)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(mtime),
+        'Accept-Ranges': 'bytes',
+    }
+    # Content-addressed blobs never change, so caches need not revalidate
+    if path.startswith(settings.ASSET_FOLDERS.get('blobs', 'assets/blobs/')):
+        headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+
+    if _is_fresh(request, etag, mtime):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    start, end = 0, size - 1
+    status_code = 200
+    if _range_allowed(request, etag, mtime):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    length = end - start + 1 if size else 0
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, status=status_code)
+    else:
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length),
+                                content_type=content_type, status=status_code)
+        response.block_size = getattr(settings, 'LOCAL_MEDIA_BLOCK_SIZE', 64 * 1024)
+
+    for name, value in headers.items():
+        response[name] = value
+    response['Content-Length'] = str(length)
+    return response
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'rc'
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+def _label(model):
+    return model._meta.label_lower
+
+def _version_key(model, pk=None):
+    return f"{KEY_PREFIX}:v:{_label(model)}:{'*' if pk is None else pk}"
+
+def _new_version():
+    # Seeded from the clock so an evicted version key never reuses old entries
+    return time.time_ns()
+
+def get_versions(model, pk=None):
+    """Return (collection version, object version) for a model and optional pk."""
+    cache = _cache()
+    keys = [_version_key(model)]
+    if pk is not None:
+        keys.append(_version_key(model, pk))
+
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        versions.append(version)
+
+    return versions[0], versions[1] if pk is not None else None
+
+def invalidate(model, pks=()):
+    """
+    Invalidate cached responses for a model.
+
+    Bumps the collection version (every cached list) and the version of each
+    given object (its cached detail responses). Other objects' detail entries
+    stay cached.
+
+    Inside a transaction the bump is deferred until commit; bumping earlier
+    would let a concurrent GET re-cache pre-commit data under the new version.
+    """
+    pks = list(pks)
+    transaction.on_commit(lambda: _bump_versions(model, pks))
+
+def _bump_versions(model, pks):
+    cache = _cache()
+    keys = [_version_key(model)] + [_version_key(model, pk) for pk in pks]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate response cache key {key}: {e}")
+
+class CachedResponseMixin:
+    """
+    Server-side cache of list/retrieve response data for model viewsets.
+
+    Entries vary on query string, host, negotiated media type and the caller's
+    auth scope (anonymous, authenticated or staff; or the user id when
+    ``cache_vary_on_user`` is set). Keys embed the model's collection version
+    (lists) or object version (details), which ``invalidate()`` bumps from
+    model signals, so writes purge exactly the affected entries.
+
+    Permission checks still run on every request because DRF performs them
+    before the handler is called.
+    """
+    cache_vary_on_user = False
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        collection_version, _ = get_versions(self.get_queryset().model)
+        return self._cached(request, 'list', [collection_version],
+                            lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self._lookup_value()
+        _, object_version = get_versions(self.get_queryset().model, pk)
+        return self._cached(request, f'detail:{pk}', [object_version],
+                            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
+
+    def _lookup_value(self):
+        """The URL lookup in canonical form, so ``/01/`` shares the version key that ``invalidate()`` bumps."""
+        model = self.get_queryset().model
+        field = model._meta.pk if self.lookup_field == 'pk' else model._meta.get_field(self.lookup_field)
+        try:
+            return field.to_python(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValidationError:
+            raise Http404
+
+    def _cached(self, request, scope, versions, build_response):
+        key = self._response_key(request, scope, versions)
+        cache = _cache()
+
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed for {key}: {e}")
+            cached = None
+
+        if cached is not None:
+            status_code, data = cached
+            response = Response(data, status=status_code)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = build_response()
+        if response.status_code == 200:
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+            try:
+                cache.set(key, (response.status_code, response.data), timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Response cache store failed for {key}: {e}")
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _auth_scope(self, request):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return 'anon'
+        if self.cache_vary_on_user:
+            return f'user-{user.pk}'
+        return 'staff' if user.is_staff else 'auth'
+
+    def _response_key(self, request, scope, versions):
+        media_type = getattr(request, 'accepted_media_type', '') or ''
+        variant = '|'.join([
+            request.get_host(),
+            request.META.get('QUERY_STRING', ''),
+            media_type,
+            self._auth_scope(request),
+        ])
+        digest = hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+        model_label = _label(self.get_queryset().model)
+        version = ':'.join(str(v) for v in versions)
+        return f"{KEY_PREFIX}:{model_label}:{scope}:{version}:{digest}"
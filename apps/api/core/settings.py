@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'catalog',
     'circulation',
     'users',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -87,6 +88,27 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache is per-process; point this at Redis/Memcached in production so
+# all workers share cached responses and signed URLs.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': '3dlibrary',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Seconds a cached list/retrieve response is kept for catalog viewsets
+RESPONSE_CACHE_TIMEOUT = 300
+RESPONSE_CACHE_ALIAS = 'default'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -175,11 +197,95 @@ ASSET_FOLDERS = {
     'covers': 'assets/covers/',
     'models': 'assets/models/',
     'pages': 'assets/pages/',
+    # Content-addressed blobs (CONTENT_ADDRESSED_ASSETS)
+    'blobs': 'assets/blobs/',
+    # Generated derivatives such as cover thumbnails
+    'derived': 'assets/derived/',
 }
 
+# Store confirmed uploads once per distinct content under SHA-256 keys, shared
+# between books through a reference-counted table
+CONTENT_ADDRESSED_ASSETS = False
+# Serve blobs from unsigned URLs (needs a public bucket or CDN) so each URL
+# never changes for the lifetime of the content
+CONTENT_ADDRESSED_PUBLIC_URLS = False
+
 # Use local storage instead of S3
 USE_LOCAL_STORAGE = True
 
+# S3 client tuning (used when USE_LOCAL_STORAGE is False)
+AWS_S3_MAX_POOL_CONNECTIONS = 32
+AWS_S3_MAX_WORKERS = 16  # thread pool for parallel HEAD/DELETE fan-out
+AWS_S3_CONNECT_TIMEOUT = 5
+AWS_S3_READ_TIMEOUT = 30
+AWS_S3_MAX_ATTEMPTS = 5
+
+# Serve asset endpoints with async views; enable when running under ASGI
+ASYNC_ASSET_VIEWS = False
+# Upper bound on concurrent storage calls per ASGI worker
+ASYNC_STORAGE_MAX_CONCURRENCY = 64
+
+# Holds: hours a copy set aside for a hold waits to be borrowed
+HOLD_PICKUP_HOURS = 48
+# Long-poll hold status: maximum wait per request and database check interval
+HOLD_LONG_POLL_TIMEOUT = 25
+HOLD_LONG_POLL_INTERVAL = 1.0
+# Maximum wait when served under WSGI, where a waiting request occupies a
+# worker thread; 0 answers immediately. Serve core.asgi for real long polls.
+HOLD_LONG_POLL_WSGI_TIMEOUT = 0
+
+# Overdue fines applied by python manage.py process_overdue, per started day late
+OVERDUE_FINE_PER_DAY = '0.25'
+OVERDUE_FINE_MAX = '10.00'
+
+# Background jobs (python manage.py run_worker)
+JOB_MAX_ATTEMPTS = 5
+# Retry delay doubles from JOB_RETRY_BACKOFF seconds up to JOB_RETRY_BACKOFF_MAX
+JOB_RETRY_BACKOFF = 10
+JOB_RETRY_BACKOFF_MAX = 3600
+# Seconds a claimed job is hidden from other workers; must exceed the longest job
+JOB_VISIBILITY_TIMEOUT = 300
+JOB_POLL_INTERVAL = 1.0
+# Run jobs in-process after the enqueuing transaction commits, without a worker
+JOBS_EAGER = False
+
+# GLB inspection budgets; models over any of them, or without Draco/meshopt
+# geometry or KTX2 textures, are flagged with model_needs_optimization
+MODEL_WARN_SIZE_MB = 25
+MODEL_MAX_TRIANGLES = 500000
+MODEL_MAX_TEXTURE_SIZE = 4096
+
+# WebP cover thumbnails generated by a background job after upload, exposed as cover_srcset
+COVER_THUMBNAIL_WIDTHS = [160, 320, 640]
+COVER_THUMBNAIL_QUALITY = 80
+
+# Signed asset URLs
+SIGNED_URL_EXPIRATION = 3600  # 1 hour
+# Local signed URL expiry is rounded up to this many seconds so URLs stay stable
+SIGNED_URL_GRANULARITY = 300
+# Reject unsigned requests for local media files
+LOCAL_MEDIA_REQUIRE_SIGNED_URLS = False
+# Delegate local media transfers to the web server: 'X-Accel-Redirect' (nginx,
+# served from an internal location at LOCAL_MEDIA_ACCEL_PREFIX) or 'X-Sendfile'
+LOCAL_MEDIA_SENDFILE_HEADER = None
+LOCAL_MEDIA_ACCEL_PREFIX = '/protected-media/'
+LOCAL_MEDIA_BLOCK_SIZE = 64 * 1024
+# Presign S3 GET URLs with a local SigV4 implementation instead of boto3
+AWS_S3_LOCAL_PRESIGN = True
+
+# Signed URLs are reused until this fraction of their lifetime has elapsed
+SIGNED_URL_CACHE_TTL_FRACTION = 0.25
+SIGNED_URL_CACHE_MAX_ENTRIES = 10000
+# Django cache alias shared by all workers (None keeps the cache per-process)
+SIGNED_URL_CACHE_ALIAS = 'default'
+
+# Seconds before a worker reloads its in-memory autocomplete index
+SUGGEST_INDEX_TTL = 300
+# Autocomplete prefixes up to this length are ranked when the index loads;
+# longer prefixes matching more than SUGGEST_SCAN_LIMIT keys are ranked once
+SUGGEST_PRECOMPUTED_PREFIX_LENGTH = 2
+SUGGEST_SCAN_LIMIT = 1000
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -202,3 +308,6 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
 ]
+
+# Multipart upload clients read each part's ETag from the PUT response
+CORS_EXPOSE_HEADERS = ['etag']
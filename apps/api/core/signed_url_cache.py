@@ -0,0 +1,130 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class SignedURLCache:
+    """Two-tier cache for signed asset URLs.
+
+    URLs are cached per (object key, expiration) and per time bucket, so every
+    worker signing the same key inside one bucket hands out the same URL string.
+    Entries are dropped after a fraction of the URL lifetime, which guarantees
+    clients always receive a URL with most of its validity remaining.
+
+    The first tier is a bounded in-process LRU; the second tier is an optional
+    Django cache alias shared by all workers.
+    """
+
+    KEY_PREFIX = 'signed-url'
+
+    def __init__(self, max_entries: int = None, ttl_fraction: float = None, cache_alias: str = None):
+        self.max_entries = max_entries or getattr(settings, 'SIGNED_URL_CACHE_MAX_ENTRIES', 10000)
+        self.ttl_fraction = ttl_fraction or getattr(settings, 'SIGNED_URL_CACHE_TTL_FRACTION', 0.25)
+        self.cache_alias = cache_alias or getattr(settings, 'SIGNED_URL_CACHE_ALIAS', 'default')
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared_cache(self):
+        """Django cache backing the shared tier, or None if disabled."""
+        if not self.cache_alias:
+            return None
+        try:
+            return caches[self.cache_alias]
+        except Exception as e:
+            logger.warning(f"Signed URL cache alias {self.cache_alias} unavailable: {e}")
+            return None
+
+    def _ttl(self, expiration: int) -> int:
+        """Seconds an entry may be served; always well below the URL lifetime."""
+        return max(1, int(expiration * self.ttl_fraction))
+
+    def _cache_key(self, object_key: str, expiration: int, now: float) -> str:
+        bucket = int(now // self._ttl(expiration))
+        return f"{self.KEY_PREFIX}:{expiration}:{bucket}:{object_key}"
+
+    def get(self, object_key: str, expiration: int) -> Optional[str]:
+        """Return a cached URL for the key, or None if missing or stale."""
+        now = time.time()
+        cache_key = self._cache_key(object_key, expiration, now)
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                url, evict_at = entry
+                if evict_at > now:
+                    self._entries.move_to_end(cache_key)
+                    return url
+                del self._entries[cache_key]
+
+        shared = self.shared_cache
+        if shared is None:
+            return None
+
+        try:
+            url = shared.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Shared signed URL cache lookup failed for {object_key}: {e}")
+            return None
+
+        if url:
+            self._store_local(cache_key, url, now + self._ttl(expiration))
+        return url
+
+    def set(self, object_key: str, expiration: int, url: str) -> None:
+        """Cache a freshly signed URL in both tiers."""
+        now = time.time()
+        cache_key = self._cache_key(object_key, expiration, now)
+        ttl = self._ttl(expiration)
+
+        self._store_local(cache_key, url, now + ttl)
+
+        shared = self.shared_cache
+        if shared is None:
+            return
+
+        try:
+            # add() keeps the first URL written by any worker for this bucket
+            if not shared.add(cache_key, url, timeout=ttl):
+                shared_url = shared.get(cache_key)
+                if shared_url:
+                    self._store_local(cache_key, shared_url, now + ttl)
+        except Exception as e:
+            logger.warning(f"Shared signed URL cache store failed for {object_key}: {e}")
+
+    def get_or_sign(self, object_key: str, expiration: int, sign) -> Optional[str]:
+        """Return a cached URL, calling ``sign()`` and caching the result on a miss."""
+        url = self.get(object_key, expiration)
+        if url:
+            return url
+
+        url = sign()
+        if url:
+            self.set(object_key, expiration, url)
+            # Another worker may have won the race; serve the shared URL
+            return self.get(object_key, expiration) or url
+        return url
+
+    def invalidate(self, object_key: str) -> None:
+        """Drop in-process entries for an object key (e.g. after deletion)."""
+        suffix = f":{object_key}"
+        with self._lock:
+            for cache_key in [k for k in self._entries if k.endswith(suffix)]:
+                del self._entries[cache_key]
+
+    def clear(self) -> None:
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, cache_key: str, url: str, evict_at: float) -> None:
+        with self._lock:
+            self._entries[cache_key] = (url, evict_at)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,9 +1,19 @@
+import base64
 import boto3
+import hashlib
 import logging
+import os
+import re
+import tempfile
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from django.conf import settings
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from urllib.parse import urljoin
+from .signed_url_cache import SignedURLCache
+from .url_signing import SigV4Presigner
 
 logger = logging.getLogger(__name__)
 
@@ -30,21 +40,73 @@ class S3StorageService:
         }
     }
     
+    # DeleteObjects accepts at most 1000 keys per request
+    DELETE_BATCH_SIZE = 1000
+    
+    # Multipart uploads: parts are 5 MB minimum (except the last), 10000 maximum
+    MULTIPART_PART_SIZE = 8 * 1024 * 1024
+    MULTIPART_MIN_PART_SIZE = 5 * 1024 * 1024
+    MULTIPART_MAX_PARTS = 10000
+    
     def __init__(self):
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
         self.region = settings.AWS_S3_REGION_NAME
         self.folders = settings.ASSET_FOLDERS
+        self.url_cache = SignedURLCache()
+        
+        # Bounded pool for fanning out independent per-key requests. Its size
+        # must not exceed the connection pool or workers queue for sockets.
+        max_workers = getattr(settings, 'AWS_S3_MAX_WORKERS', 16)
+        max_connections = max(getattr(settings, 'AWS_S3_MAX_POOL_CONNECTIONS', 32), max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='s3-storage')
+        
+        client_config = Config(
+            max_pool_connections=max_connections,
+            connect_timeout=getattr(settings, 'AWS_S3_CONNECT_TIMEOUT', 5),
+            read_timeout=getattr(settings, 'AWS_S3_READ_TIMEOUT', 30),
+            retries={
+                'max_attempts': getattr(settings, 'AWS_S3_MAX_ATTEMPTS', 5),
+                'mode': 'standard'
+            }
+        )
         
         try:
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                 aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=self.region
+                region_name=self.region,
+                config=client_config
             )
         except NoCredentialsError:
             logger.error("AWS credentials not found")
             self.s3_client = None
+        
+        # Presign GET URLs with hmac/hashlib when static credentials are
+        # configured; otherwise fall back to boto3's presigner
+        self.presigner = None
+        if (getattr(settings, 'AWS_S3_LOCAL_PRESIGN', True)
+                and getattr(settings, 'AWS_ACCESS_KEY_ID', None)
+                and getattr(settings, 'AWS_SECRET_ACCESS_KEY', None)
+                and SigV4Presigner.supports_bucket(self.bucket_name)):
+            self.presigner = SigV4Presigner(
+                settings.AWS_ACCESS_KEY_ID,
+                settings.AWS_SECRET_ACCESS_KEY,
+                self.region,
+                self.bucket_name,
+                session_token=getattr(settings, 'AWS_SESSION_TOKEN', None)
+            )
+    
+    def _fan_out(self, func, items: List[Any]) -> List[Any]:
+        """Run func over items on the thread pool, returning results in input order.
+        
+        boto3 clients are thread-safe, so request latency becomes the slowest
+        call rather than the sum of all calls. Must not be called from inside
+        the pool itself.
+        """
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        return list(self.executor.map(func, items))
     
     def create_bucket_if_not_exists(self) -> bool:
         """Create S3 bucket with required folder structure if it doesn't exist."""
@@ -94,6 +156,15 @@ class S3StorageService:
             return None
             
         expiration = expiration or settings.SIGNED_URL_EXPIRATION
+        return self.url_cache.get_or_sign(
+            object_key, expiration,
+            lambda: self._sign_url(object_key, expiration)
+        )
+    
+    def _sign_url(self, object_key: str, expiration: int) -> Optional[str]:
+        """Presign a GET URL, bypassing the URL cache."""
+        if self.presigner:
+            return self.presigner.presign_get(object_key, expiration)
         
         try:
             response = self.s3_client.generate_presigned_url(
@@ -161,6 +232,145 @@ class S3StorageService:
             logger.error(f"Failed to generate presigned POST for {object_key}: {e}")
             return None
     
+    def create_multipart_upload(self, object_key: str, content_type: str = None) -> Optional[str]:
+        """
+        Start a multipart upload
+        
+        Args:
+            object_key: Key the assembled object will be stored under
+            content_type: MIME type of the assembled object
+            
+        Returns:
+            Upload ID, or None on failure
+        """
+        if not self.s3_client:
+            return None
+        
+        try:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=object_key,
+                ContentType=content_type or 'application/octet-stream'
+            )
+            return response['UploadId']
+        except ClientError as e:
+            logger.error(f"Failed to create multipart upload for {object_key}: {e}")
+            return None
+    
+    def generate_part_urls(self, object_key: str, upload_id: str, part_numbers: List[int],
+                           expiration: int = None) -> Dict[int, str]:
+        """
+        Presign PUT URLs for parts of a multipart upload
+        
+        Args:
+            object_key: Key of the multipart upload
+            upload_id: Upload ID from create_multipart_upload
+            part_numbers: Part numbers (1-10000) to presign
+            expiration: URL lifetime in seconds
+            
+        Returns:
+            Dict of part number -> URL
+        """
+        if not self.s3_client:
+            return {}
+        
+        expiration = expiration or settings.SIGNED_URL_EXPIRATION
+        urls = {}
+        for part_number in part_numbers:
+            if self.presigner:
+                urls[part_number] = self.presigner.presign('PUT', object_key, expiration, query={
+                    'partNumber': str(part_number),
+                    'uploadId': upload_id,
+                })
+                continue
+            try:
+                urls[part_number] = self.s3_client.generate_presigned_url(
+                    'upload_part',
+                    Params={
+                        'Bucket': self.bucket_name,
+                        'Key': object_key,
+                        'UploadId': upload_id,
+                        'PartNumber': part_number
+                    },
+                    ExpiresIn=expiration
+                )
+            except ClientError as e:
+                logger.error(f"Failed to presign part {part_number} of {object_key}: {e}")
+        return urls
+    
+    def list_parts(self, object_key: str, upload_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        List the parts already uploaded, so an interrupted upload can resume
+        
+        Args:
+            object_key: Key of the multipart upload
+            upload_id: Upload ID from create_multipart_upload
+            
+        Returns:
+            List of dicts with 'part_number', 'etag' and 'size', or None if the
+            upload does not exist
+        """
+        if not self.s3_client:
+            return None
+        
+        parts = []
+        try:
+            paginator = self.s3_client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=object_key, UploadId=upload_id):
+                for part in page.get('Parts', []):
+                    parts.append({
+                        'part_number': part['PartNumber'],
+                        'etag': part['ETag'].strip('"'),
+                        'size': part['Size'],
+                    })
+        except ClientError as e:
+            logger.error(f"Failed to list parts of {object_key}: {e}")
+            return None
+        return parts
+    
+    def complete_multipart_upload(self, object_key: str, upload_id: str, parts: List[Dict[str, Any]]) -> bool:
+        """
+        Assemble uploaded parts into the final object
+        
+        Args:
+            object_key: Key of the multipart upload
+            upload_id: Upload ID from create_multipart_upload
+            parts: Dicts with 'part_number' and 'etag' for every part
+            
+        Returns:
+            True if the object was assembled, False otherwise
+        """
+        if not self.s3_client:
+            return False
+        
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [
+                    {'PartNumber': part['part_number'], 'ETag': '"%s"' % part['etag'].strip('"')}
+                    for part in sorted(parts, key=lambda part: part['part_number'])
+                ]}
+            )
+            self.url_cache.invalidate(object_key)
+            return True
+        except ClientError as e:
+            logger.error(f"Failed to complete multipart upload for {object_key}: {e}")
+            return False
+    
+    def abort_multipart_upload(self, object_key: str, upload_id: str) -> bool:
+        """Abort a multipart upload and discard its parts."""
+        if not self.s3_client:
+            return False
+        
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=object_key, UploadId=upload_id)
+            return True
+        except ClientError as e:
+            logger.error(f"Failed to abort multipart upload for {object_key}: {e}")
+            return False
+    
     def validate_object_exists(self, key: str) -> bool:
         """Validate that an object exists in S3 using HEAD request."""
         if not self.s3_client:
@@ -202,6 +412,51 @@ class S3StorageService:
             logger.error(f"Unexpected error getting metadata for {key}: {e}")
             return None
     
+    def read_object(self, key: str) -> Optional[bytes]:
+        """Download a (small) object's body into memory."""
+        if not self.s3_client:
+            return None
+        
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read()
+        except ClientError as e:
+            logger.error(f"Failed to read {key}: {e}")
+            return None
+    
+    def read_range(self, key: str, start: int, length: int) -> Optional[bytes]:
+        """Read ``length`` bytes of an object from ``start`` with a ranged GET."""
+        if not self.s3_client:
+            return None
+        
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name, Key=key, Range=f'bytes={start}-{start + length - 1}'
+            )
+            return response['Body'].read()
+        except ClientError as e:
+            logger.error(f"Failed to read bytes {start}-{start + length - 1} of {key}: {e}")
+            return None
+    
+    @contextmanager
+    def local_file(self, key: str) -> Iterator[str]:
+        """
+        Download an object to a temporary file for tools that need a real path
+        (such as memory-mapped parsing); the file is removed on exit.
+        
+        Args:
+            key: S3 object key
+            
+        Yields:
+            Path of the temporary copy
+        """
+        if not self.s3_client:
+            raise RuntimeError('S3 client is not configured')
+        
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(key)[1]) as f:
+            self.s3_client.download_fileobj(self.bucket_name, key, f)
+            f.flush()
+            yield f.name
+    
     def upload_file(self, file_obj, object_key: str, content_type: str = None) -> bool:
         """Upload a file to S3."""
         if not self.s3_client:
@@ -234,12 +489,125 @@ class S3StorageService:
                 Bucket=self.bucket_name,
                 Key=object_key
             )
+            self.url_cache.invalidate(object_key)
             logger.info(f"Successfully deleted {object_key}")
             return True
         except ClientError as e:
             logger.error(f"Failed to delete {object_key}: {e}")
             return False
     
+    def delete_many(self, object_keys: List[str]) -> Dict[str, Any]:
+        """
+        Delete many objects using batched DeleteObjects requests.
+        
+        Args:
+            object_keys: Keys to delete (duplicates are ignored)
+            
+        Returns:
+            Dict with 'deleted' (list of keys) and 'errors' (key -> message)
+        """
+        keys = list(dict.fromkeys(object_keys))
+        result = {'deleted': [], 'errors': {}}
+        
+        if not self.s3_client:
+            result['errors'] = {key: 'Storage client unavailable' for key in keys}
+            return result
+        
+        batches = [
+            keys[start:start + self.DELETE_BATCH_SIZE]
+            for start in range(0, len(keys), self.DELETE_BATCH_SIZE)
+        ]
+        
+        for batch, batch_errors in zip(batches, self._fan_out(self._delete_batch, batches)):
+            result['errors'].update(batch_errors)
+            result['deleted'].extend(key for key in batch if key not in batch_errors)
+        
+        for key in result['deleted']:
+            self.url_cache.invalidate(key)
+        logger.info(f"Deleted {len(result['deleted'])} objects, {len(result['errors'])} failures")
+        return result
+    
+    def _delete_batch(self, batch: List[str]) -> Dict[str, str]:
+        """Delete up to DELETE_BATCH_SIZE keys, returning per-key errors."""
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        except ClientError as e:
+            logger.error(f"Failed to delete batch of {len(batch)} objects: {e}")
+            return {key: str(e) for key in batch}
+        
+        return {
+            error['Key']: error.get('Message', error.get('Code', 'Unknown error'))
+            for error in response.get('Errors', [])
+        }
+    
+    def exists_many(self, keys: List[str], prefix: str = None) -> Dict[str, bool]:
+        """
+        Check existence of many objects.
+        
+        Args:
+            keys: Object keys to check
+            prefix: Optional prefix containing every key; when given, one
+                paginated listing answers all keys instead of a HEAD per key
+            
+        Returns:
+            Dict mapping each key to whether it exists
+        """
+        if prefix is not None:
+            listed = {obj['key'] for obj in self.list_prefix(prefix)}
+            return {key: key in listed for key in keys}
+        
+        return {key: metadata is not None for key, metadata in self.head_many(keys).items()}
+    
+    def head_many(self, keys: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get metadata for many objects with parallel HEAD requests; missing objects map to None."""
+        keys = list(dict.fromkeys(keys))
+        return dict(zip(keys, self._fan_out(self.get_object_metadata, keys)))
+    
+    def list_prefix(self, prefix: str, strict: bool = False) -> List[Dict[str, Any]]:
+        """
+        List every object under a prefix using paginated ListObjectsV2.
+        
+        Args:
+            prefix: Key prefix, e.g. a folder such as 'pages/42/'
+            strict: Raise when the listing fails instead of returning the
+                objects listed so far
+            
+        Returns:
+            List of dicts with key, size, last_modified and etag
+        """
+        if not self.s3_client:
+            if strict:
+                raise RuntimeError('Storage client unavailable')
+            return []
+        
+        objects = []
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    objects.append({
+                        'key': obj['Key'],
+                        'size': obj.get('Size', 0),
+                        'last_modified': obj.get('LastModified'),
+                        'etag': obj.get('ETag', '').strip('"'),
+                    })
+        except ClientError as e:
+            logger.error(f"Failed to list objects under {prefix}: {e}")
+            if strict:
+                raise
+        
+        return objects
+    
+    def parse_page_key(self, key: str) -> Optional[Tuple[int, int]]:
+        """Return (book_id, page_number) for a page texture key, or None."""
+        match = re.match(rf"^{re.escape(self.folders.get('pages', ''))}(\d+)/(\d+)\.\w+$", key)
+        if not match:
+            return None
+        return int(match.group(1)), int(match.group(2))
+    
     def get_asset_key(self, asset_type: str, book_id: int, filename: str = None) -> str:
         """Generate S3 object key for book assets."""
         folder = self.folders.get(asset_type, '')
@@ -255,6 +623,86 @@ class S3StorageService:
         else:
             return f"{folder}{book_id}/{filename or 'asset'}"
     
+    def get_blob_key(self, sha256: str, extension: str = '') -> str:
+        """Generate the content-addressed key for a blob, fanned out by hash prefix."""
+        return f"{self.folders.get('blobs', 'assets/blobs/')}{sha256[:2]}/{sha256}{extension}"
+    
+    def get_derived_key(self, source_key: str, variant: str) -> str:
+        """Generate the key of a derivative (e.g. a thumbnail) of another object."""
+        base = os.path.splitext(source_key)[0].removeprefix('assets/')
+        return f"{self.folders.get('derived', 'assets/derived/')}{base}/{variant}"
+    
+    def is_blob_key(self, key: str) -> bool:
+        return key.startswith(self.folders.get('blobs', 'assets/blobs/'))
+    
+    def hash_object(self, key: str) -> Optional[str]:
+        """
+        Compute the SHA-256 of an object
+        
+        Uses the checksum S3 stored at upload time when the object has a
+        full-object SHA-256, and otherwise streams the body through hashlib.
+        
+        Args:
+            key: Object key
+            
+        Returns:
+            Hex digest, or None on failure
+        """
+        if not self.s3_client:
+            return None
+        
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key, ChecksumMode='ENABLED')
+            checksum = response.get('ChecksumSHA256')
+            # Multipart objects carry a checksum of part checksums ("...-N")
+            if checksum and '-' not in checksum and response.get('ChecksumType', 'FULL_OBJECT') == 'FULL_OBJECT':
+                return base64.b64decode(checksum).hex()
+            
+            body = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body']
+            digest = hashlib.sha256()
+            for chunk in body.iter_chunks(chunk_size=1024 * 1024):
+                digest.update(chunk)
+            return digest.hexdigest()
+        except ClientError as e:
+            logger.error(f"Failed to hash {key}: {e}")
+            return None
+    
+    def copy_object(self, source_key: str, dest_key: str, content_type: str = None,
+                    cache_control: str = None) -> bool:
+        """
+        Server-side copy of an object, replacing its metadata
+        
+        Args:
+            source_key: Key to copy from
+            dest_key: Key to copy to
+            content_type: Content-Type to store on the copy
+            cache_control: Cache-Control to store on the copy
+            
+        Returns:
+            True if copied, False otherwise
+        """
+        if not self.s3_client:
+            return False
+        
+        extra = {}
+        if content_type:
+            extra['ContentType'] = content_type
+        if cache_control:
+            extra['CacheControl'] = cache_control
+        
+        try:
+            self.s3_client.copy_object(
+                Bucket=self.bucket_name,
+                Key=dest_key,
+                CopySource={'Bucket': self.bucket_name, 'Key': source_key},
+                MetadataDirective='REPLACE',
+                **extra
+            )
+            return True
+        except ClientError as e:
+            logger.error(f"Failed to copy {source_key} to {dest_key}: {e}")
+            return False
+    
     def get_public_url(self, object_key: str) -> str:
         """Get public URL for an object (if bucket is public)."""
         return f"https://{settings.AWS_S3_CUSTOM_DOMAIN}/{object_key}"
@@ -0,0 +1,150 @@
+import logging
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework import status
+from .local_storage import UploadTooLarge, storage_service
+from .url_signing import url_signer
+
+logger = logging.getLogger(__name__)
+
+# Query params signed into the URL by LocalStorageService.generate_presigned_post
+UPLOAD_PARAMS = ('key', 'content_type', 'max_size')
+# ... and by LocalStorageService.generate_part_urls
+PART_PARAMS = ('upload_id', 'part_number', 'max_size')
+
+class AssetUploadHandler(FileUploadHandler):
+    """
+    Multipart upload handler that streams the ``file`` field straight into
+    storage, enforcing the size limit chunk by chunk.
+
+    Other file fields are skipped. When the limit is exceeded the upload is
+    stopped and ``error`` is set; the partially written file is discarded.
+    """
+    chunk_size = storage_service.UPLOAD_CHUNK_SIZE
+
+    def __init__(self, object_key, max_size, request=None):
+        super().__init__(request)
+        self.object_key = object_key
+        self.max_size = max_size
+        self.writer = None
+        self.result = None
+        self.error = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if field_name != 'file' or self.writer is not None:
+            raise SkipFile()
+        self.writer = storage_service.open_upload(self.object_key, self.max_size)
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.writer.write(raw_data)
+        except UploadTooLarge as e:
+            self.error = str(e)
+            self.writer.abort()
+            raise StopUpload(connection_reset=True)
+        return None
+
+    def file_complete(self, file_size):
+        self.result = self.writer.commit()
+        return UploadedFile(name=self.file_name, content_type=self.content_type, size=file_size)
+
+    def upload_interrupted(self):
+        if self.writer is not None and self.result is None:
+            self.writer.abort()
+
+def _error(message, status_code):
+    return JsonResponse({'error': message}, status=status_code)
+
+@csrf_exempt
+@require_http_methods(['POST', 'PUT'])
+def upload_asset(request):
+    """
+    Receive a direct upload for the local storage backend.
+
+    Accepts either a multipart form with a ``file`` field (the same shape as
+    an S3 presigned POST) or the raw file as the request body. Data is written
+    in fixed-size chunks to a temp file, hashed on the way, and renamed into
+    place only once the whole body is within the signed size limit.
+    """
+    params = {name: request.GET.get(name, '') for name in UPLOAD_PARAMS}
+    if not url_signer.verify(request.path, request.GET.get(url_signer.expires_param),
+                             request.GET.get(url_signer.signature_param), params=params):
+        return _error('Invalid or expired upload URL', status.HTTP_403_FORBIDDEN)
+
+    object_key = params['key']
+    max_size = int(params['max_size'])
+
+    try:
+        if request.content_type == 'multipart/form-data':
+            handler = AssetUploadHandler(object_key, max_size, request)
+            request.upload_handlers = [handler]
+            request.FILES  # parse the body through the handler
+            if handler.error:
+                return _error(handler.error, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            if handler.result is None:
+                return _error('No file provided', status.HTTP_400_BAD_REQUEST)
+            result = handler.result
+        else:
+            if request.content_type != params['content_type']:
+                return _error('Content type does not match upload URL', status.HTTP_400_BAD_REQUEST)
+
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            if content_length > max_size:
+                return _error(f"Upload exceeds maximum size of {max_size} bytes",
+                              status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            chunk_size = storage_service.UPLOAD_CHUNK_SIZE
+            result = storage_service.save_stream(iter(lambda: request.read(chunk_size), b''),
+                                                 object_key, max_size)
+    except UploadTooLarge as e:
+        return _error(str(e), status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        logger.error(f"Error receiving upload for {object_key}: {str(e)}")
+        return _error('Upload failed', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return JsonResponse({
+        'key': object_key,
+        'size': result['size'],
+        'sha256': result['sha256'],
+    }, status=status.HTTP_201_CREATED)
+
+@csrf_exempt
+@require_http_methods(['PUT'])
+def upload_part(request):
+    """
+    Receive one part of a local multipart upload as the raw request body.
+
+    Mirrors S3's UploadPart: the part's ETag is returned in the ETag header
+    (and the JSON body) and must be passed back when completing the upload.
+    Re-uploading a part number replaces the earlier attempt.
+    """
+    params = {name: request.GET.get(name, '') for name in PART_PARAMS}
+    if not url_signer.verify(request.path, request.GET.get(url_signer.expires_param),
+                             request.GET.get(url_signer.signature_param), params=params):
+        return _error('Invalid or expired upload URL', status.HTTP_403_FORBIDDEN)
+
+    max_size = int(params['max_size'])
+    content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if content_length > max_size:
+        return _error(f"Part exceeds maximum size of {max_size} bytes", status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    chunk_size = storage_service.UPLOAD_CHUNK_SIZE
+    try:
+        part = storage_service.save_part(params['upload_id'], int(params['part_number']),
+                                         iter(lambda: request.read(chunk_size), b''), max_size)
+    except UploadTooLarge as e:
+        return _error(str(e), status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        logger.error(f"Error receiving part {params['part_number']} of upload {params['upload_id']}: {str(e)}")
+        return _error('Upload failed', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    if part is None:
+        return _error('Upload not found', status.HTTP_404_NOT_FOUND)
+
+    response = JsonResponse(part)
+    response['ETag'] = f'"{part["etag"]}"'
+    return response
@@ -16,7 +16,8 @@ Including another URLconf
 """
 # core/urls.py
 from django.contrib import admin
-from django.urls import path, include
+import re
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
@@ -24,8 +25,10 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from core.media import serve_media
 from catalog.views import BookViewSet, AuthorViewSet, GenreViewSet
-from circulation.views import BorrowViewSet
+from circulation.async_views import hold_wait
+from circulation.views import BorrowViewSet, HoldViewSet
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 router = DefaultRouter()
@@ -33,6 +36,7 @@ router.register('books', BookViewSet)
 router.register('authors', AuthorViewSet)
 router.register('genres', GenreViewSet)
 router.register('borrows', BorrowViewSet)
+router.register('holds', HoldViewSet, basename='hold')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -40,11 +44,24 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema')),
+    # Async asset views take precedence over the router's sync actions under ASGI
+    *([path('api/', include('catalog.async_urls'))] if getattr(settings, 'ASYNC_ASSET_VIEWS', False) else []),
+    # Long-poll for hold status changes (async; waits are capped under WSGI, serve under ASGI)
+    path('api/holds/<int:pk>/wait/', hold_wait, name='hold_wait'),
     path('api/', include(router.urls)),
     path('api/auth/', include('users.urls')),  # Custom authentication endpoints
     path('api/auth/', include('rest_framework.urls')),  # browsable API login (dev)
 ]
 
+# Local storage media: signed URL checks, range requests and conditional GETs
+if getattr(settings, 'USE_LOCAL_STORAGE', False):
+    from core.uploads import upload_asset, upload_part
+
+    urlpatterns += [
+        path('api/assets/upload/', upload_asset, name='upload_asset'),
+        path('api/assets/upload/part/', upload_part, name='upload_part'),
+        re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', serve_media, name='media'),
+    ]
 # Serve media files in development
-if settings.DEBUG:
+elif settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,49 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+from django.utils import timezone
+from jobs.models import Job
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Report queue depth, latency and throughput of background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='Window of finished jobs to report on.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        since = now - timedelta(minutes=options['minutes'])
+
+        due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        depth = due.values('task').annotate(count=Count('id'), oldest=Min('run_at'))
+        for row in depth.order_by('task'):
+            lag = (now - row['oldest']).total_seconds()
+            self.stdout.write(f"{row['task']}: {row['count']} due, oldest waiting {lag:.1f}s")
+
+        finished = Job.objects.filter(finished_at__gte=since).values_list(
+            'task', 'status', 'run_at', 'started_at', 'finished_at')
+        waits, runs, counts = defaultdict(list), defaultdict(list), defaultdict(lambda: defaultdict(int))
+        for task, status, run_at, started_at, finished_at in finished.iterator():
+            counts[task][status] += 1
+            # Time spent due but unclaimed, then time spent running (final attempt)
+            waits[task].append((started_at - run_at).total_seconds())
+            runs[task].append((finished_at - started_at).total_seconds())
+
+        self.stdout.write(f"Finished in the last {options['minutes']} minutes:")
+        for task in sorted(counts):
+            succeeded = counts[task][Job.SUCCEEDED]
+            self.stdout.write(
+                f"{task}: {succeeded} succeeded, {counts[task][Job.FAILED]} failed, "
+                f"{succeeded / options['minutes']:.2f}/min; "
+                f"wait p50 {percentile(waits[task], 0.5):.3f}s p95 {percentile(waits[task], 0.95):.3f}s; "
+                f"run p50 {percentile(runs[task], 0.5):.3f}s p95 {percentile(runs[task], 0.95):.3f}s"
+            )
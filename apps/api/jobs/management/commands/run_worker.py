@@ -0,0 +1,39 @@
+import signal
+import time
+from django.core.management.base import BaseCommand
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = ('Run a background job worker. Start several processes to work the '
+            'queue in parallel; each runs one job at a time.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', help='Comma-separated task names to run (default: all).')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty.')
+        parser.add_argument('--max-jobs', type=int, help='Exit after processing this many jobs.')
+        parser.add_argument('--poll-interval', type=float, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--visibility-timeout', type=int,
+                            help='Seconds a claimed job stays hidden from other workers.')
+        parser.add_argument('--name', help='Worker name recorded on claimed jobs (default: host:pid).')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            name=options['name'],
+            tasks=options['tasks'].split(',') if options['tasks'] else None,
+            visibility_timeout=options['visibility_timeout'],
+            poll_interval=options['poll_interval'],
+        )
+        signal.signal(signal.SIGTERM, worker.stop)
+        signal.signal(signal.SIGINT, worker.stop)
+
+        self.stdout.write(f'Worker {worker.name} started.')
+        started = time.monotonic()
+        processed = worker.work(burst=options['burst'], max_jobs=options['max_jobs'])
+        elapsed = time.monotonic() - started
+
+        stats = worker.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} jobs in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f}/s): "
+            f"{stats['succeeded']} succeeded, {stats['retried']} retried, {stats['failed']} failed."
+        ))
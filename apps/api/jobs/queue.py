@@ -0,0 +1,61 @@
+import logging
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Task name -> (handler, max_attempts)
+_registry = {}
+
+def task(name, max_attempts=None):
+    """
+    Register a function as a job handler under ``name``.
+
+    The handler is called with the job payload as keyword arguments. Raising
+    schedules a retry with exponential backoff until ``max_attempts`` (default
+    JOB_MAX_ATTEMPTS) is used up. Jobs may run more than once if a worker dies
+    mid-job, so handlers should be idempotent.
+    """
+    def decorator(func):
+        _registry[name] = (func, max_attempts)
+        return func
+    return decorator
+
+def get_task(name):
+    entry = _registry.get(name)
+    return entry[0] if entry else None
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter for a job that has failed ``attempts`` times."""
+    base = getattr(settings, 'JOB_RETRY_BACKOFF', 10)
+    cap = getattr(settings, 'JOB_RETRY_BACKOFF_MAX', 3600)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    # Jitter spreads out retries of jobs that failed together
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+def enqueue(name, delay=0, **payload):
+    """
+    Queue a job for ``name`` with ``payload`` as its keyword arguments.
+
+    With JOBS_EAGER set the job runs in-process once the current transaction
+    commits, which keeps development and tests free of a separate worker.
+    """
+    if name not in _registry:
+        raise LookupError(f"Unknown task {name}")
+
+    max_attempts = _registry[name][1] or getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+    job = Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+    if getattr(settings, 'JOBS_EAGER', False):
+        from .worker import Worker
+        transaction.on_commit(lambda: Worker(name='eager').run_claimed(job.pk))
+    return job
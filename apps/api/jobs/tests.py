@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import enqueue, retry_delay, task
+from .worker import Worker
+
+calls = []
+
+
+@task('jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task('jobs.tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('boom')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_unknown_tasks_are_refused(self):
+        with self.assertRaises(LookupError):
+            enqueue('jobs.tests.missing')
+
+    def test_runs_due_jobs_in_order(self):
+        later = enqueue('jobs.tests.record', delay=3600, value='later')
+        enqueue('jobs.tests.record', value='first')
+        enqueue('jobs.tests.record', value='second')
+
+        processed = Worker(name='worker').work(burst=True)
+
+        self.assertEqual(processed, 2)
+        self.assertEqual(calls, ['first', 'second'])
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.QUEUED)
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        job = enqueue('jobs.tests.fail')
+        worker = Worker(name='worker')
+
+        worker.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError: boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        worker.work(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(worker.stats, {'succeeded': 0, 'retried': 1, 'failed': 1})
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        with mock.patch('jobs.queue.random.uniform', side_effect=lambda low, high: high):
+            delays = [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3, 20)]
+
+        self.assertEqual(delays, [10, 20, 40, 3600])
+
+    def test_a_job_is_claimed_by_one_worker(self):
+        job = enqueue('jobs.tests.record', value='once')
+
+        claimed = Worker(name='first').claim()
+
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(Worker(name='second').claim())
+
+    def test_abandoned_jobs_are_reclaimed_after_the_visibility_timeout(self):
+        job = enqueue('jobs.tests.record', value='reclaimed')
+        stale = Worker(name='dead', visibility_timeout=60).claim()
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        rescuer = Worker(name='rescuer')
+        self.assertTrue(rescuer.run(rescuer.claim()))
+        # The first worker finishing late must not overwrite the outcome
+        self.assertFalse(Worker(name='dead').run(stale))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.SUCCEEDED, 2, ''))
+
+    def test_only_selected_tasks_are_claimed(self):
+        enqueue('jobs.tests.fail')
+
+        self.assertIsNone(Worker(tasks=['jobs.tests.record']).claim())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_jobs_run_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('jobs.tests.record', value='eager')
+            self.assertEqual(calls, [])
+
+        self.assertEqual(calls, ['eager'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_job_stats_reports_depth_and_throughput(self):
+        enqueue('jobs.tests.record', value='done')
+        Worker().work(burst=True)
+        enqueue('jobs.tests.record', value='waiting')
+
+        out = StringIO()
+        call_command('job_stats', stdout=out)
+
+        self.assertIn('jobs.tests.record: 1 due', out.getvalue())
+        self.assertIn('jobs.tests.record: 1 succeeded, 0 failed', out.getvalue())
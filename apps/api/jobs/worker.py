@@ -0,0 +1,139 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+from .queue import get_task, retry_delay
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """
+    Polls the Job table and runs due jobs one at a time.
+
+    Jobs are claimed with a conditional UPDATE, so any number of worker
+    processes can share the table without row locks (SQLite included). A
+    claimed job is hidden from other workers for ``visibility_timeout``
+    seconds; if its worker dies it becomes claimable again after that, so
+    the timeout must exceed the longest job.
+    """
+
+    # Due jobs fetched per claim attempt, so workers racing for the head of
+    # the queue fall through to the next job instead of polling again
+    claim_candidates = 10
+
+    def __init__(self, name=None, tasks=None, visibility_timeout=None, poll_interval=None):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.tasks = tasks
+        self.visibility_timeout = timedelta(
+            seconds=visibility_timeout or getattr(settings, 'JOB_VISIBILITY_TIMEOUT', 300))
+        self.poll_interval = poll_interval or getattr(settings, 'JOB_POLL_INTERVAL', 1.0)
+        self.stopping = False
+        self.stats = {'succeeded': 0, 'retried': 0, 'failed': 0}
+
+    def _due(self, now):
+        jobs = Job.objects.filter(
+            Q(status=Job.QUEUED) | Q(status=Job.RUNNING, locked_until__lt=now),
+            run_at__lte=now,
+        )
+        if self.tasks:
+            jobs = jobs.filter(task__in=self.tasks)
+        return jobs
+
+    def claim(self):
+        """Claim the next due job, or return None if there is none."""
+        now = timezone.now()
+        due = self._due(now)
+
+        for pk in due.values_list('pk', flat=True)[:self.claim_candidates]:
+            # Re-checks the due conditions at write time; 0 rows means another
+            # worker got there first
+            claimed = due.filter(pk=pk).update(
+                status=Job.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_by=self.name,
+                locked_until=now + self.visibility_timeout,
+                started_at=now,
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+        return None
+
+    def run_claimed(self, pk):
+        """Claim a specific job and run it (used by JOBS_EAGER)."""
+        now = timezone.now()
+        if self._due(now).filter(pk=pk).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1, locked_by=self.name,
+            locked_until=now + self.visibility_timeout, started_at=now,
+        ):
+            self.run(Job.objects.get(pk=pk))
+
+    def _finish(self, job, **fields):
+        # Matches only while we still own this attempt; a job reclaimed after
+        # its visibility timeout belongs to the other worker
+        return Job.objects.filter(
+            pk=job.pk, status=Job.RUNNING, locked_by=self.name, attempts=job.attempts
+        ).update(locked_by='', locked_until=None, **fields)
+
+    def run(self, job):
+        """Run a claimed job and record its outcome."""
+        handler = get_task(job.task)
+        started = time.monotonic()
+
+        try:
+            if handler is None:
+                raise LookupError(f"Unknown task {job.task}")
+            if job.attempts > job.max_attempts:
+                # Abandoned by workers that died on every attempt
+                raise RuntimeError(f"Job exceeded {job.max_attempts} attempts")
+            handler(**job.payload)
+        except Exception:
+            error = traceback.format_exc()
+            if handler is not None and job.attempts < job.max_attempts:
+                if self._finish(job, status=Job.QUEUED, run_at=timezone.now() + retry_delay(job.attempts),
+                                last_error=error):
+                    self.stats['retried'] += 1
+                    logger.warning(f"Job {job.pk} ({job.task}) failed on attempt {job.attempts}, retrying: {error}")
+            elif self._finish(job, status=Job.FAILED, finished_at=timezone.now(), last_error=error):
+                self.stats['failed'] += 1
+                logger.error(f"Job {job.pk} ({job.task}) failed permanently: {error}")
+            return False
+
+        if not self._finish(job, status=Job.SUCCEEDED, finished_at=timezone.now()):
+            logger.warning(f"Job {job.pk} ({job.task}) finished after its visibility timeout and was reclaimed")
+            return False
+        self.stats['succeeded'] += 1
+        wait = (job.started_at - job.run_at).total_seconds()
+        logger.info(f"Job {job.pk} ({job.task}) succeeded in {time.monotonic() - started:.3f}s "
+                    f"after waiting {wait:.3f}s")
+        return True
+
+    def work(self, burst=False, max_jobs=None):
+        """
+        Run jobs until stopped. With ``burst`` the worker exits as soon as the
+        queue is empty; ``max_jobs`` bounds the number of jobs processed.
+        """
+        processed = 0
+        while not self.stopping and (max_jobs is None or processed < max_jobs):
+            # Long-lived process: drop connections the database has timed out
+            close_old_connections()
+            job = self.claim()
+            if job is None:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run(job)
+            processed += 1
+        close_old_connections()
+        return processed
+
+    def stop(self, *args):
+        """Finish the current job, then exit the work loop."""
+        self.stopping = True